@@ -0,0 +1,145 @@
+"""particionar asistencias_log
+
+Revision ID: 318d70f8dabf
+Revises: 3f6c2a9d1b47
+Create Date: 2026-10-19 15:02:17.640913
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '318d70f8dabf'
+down_revision: Union[str, Sequence[str], None] = '3f6c2a9d1b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses a futuro con partición creada desde la migración
+MESES_ADELANTE = 2
+
+
+def _mes_siguiente(mes: date) -> date:
+    return date(mes.year + (mes.month == 12), mes.month % 12 + 1, 1)
+
+
+def _crear_particion(mes: date) -> None:
+    op.execute(
+        f"CREATE TABLE asistencias_log_{mes:%Y_%m} PARTITION OF asistencias_log "
+        f"FOR VALUES FROM ('{mes:%Y-%m-%d} 00:00:00+00') TO ('{_mes_siguiente(mes):%Y-%m-%d} 00:00:00+00')"
+    )
+
+
+def _crear_indices_originales() -> None:
+    op.create_index(op.f('ix_asistencias_log_id'), 'asistencias_log', ['id'], unique=False)
+    op.create_index(op.f('ix_asistencias_log_persona_id'), 'asistencias_log', ['persona_id'], unique=False)
+    op.create_index(op.f('ix_asistencias_log_timestamp'), 'asistencias_log', ['timestamp'], unique=False)
+    op.create_index(op.f('ix_asistencias_log_tipo'), 'asistencias_log', ['tipo'], unique=False)
+
+
+def _borrar_indices_originales() -> None:
+    op.drop_index(op.f('ix_asistencias_log_tipo'), table_name='asistencias_log')
+    op.drop_index(op.f('ix_asistencias_log_timestamp'), table_name='asistencias_log')
+    op.drop_index(op.f('ix_asistencias_log_persona_id'), table_name='asistencias_log')
+    op.drop_index(op.f('ix_asistencias_log_id'), table_name='asistencias_log')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # La clave de partición no admite NULL
+    op.execute('UPDATE asistencias_log SET "timestamp" = CURRENT_TIMESTAMP WHERE "timestamp" IS NULL')
+
+    if op.get_bind().dialect.name != 'postgresql':
+        # Sin particiones (SQLite): solo el índice compuesto en lugar de los sueltos
+        with op.batch_alter_table('asistencias_log') as batch_op:
+            batch_op.drop_index(op.f('ix_asistencias_log_id'))
+            batch_op.drop_index(op.f('ix_asistencias_log_persona_id'))
+            batch_op.drop_index(op.f('ix_asistencias_log_tipo'))
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(timezone=True), nullable=False)
+            batch_op.create_index('ix_asistencias_log_tipo_persona_id', ['tipo', 'persona_id'], unique=False)
+        return
+
+    # La tabla actual queda aparte para copiar sus filas; la secuencia de ids
+    # se conserva para que los ids nuevos sigan después de los existentes
+    _borrar_indices_originales()
+    op.execute('ALTER SEQUENCE asistencias_log_id_seq OWNED BY NONE')
+    op.execute('ALTER TABLE asistencias_log RENAME TO asistencias_log_anterior')
+    op.execute('ALTER TABLE asistencias_log_anterior RENAME CONSTRAINT asistencias_log_pkey TO asistencias_log_anterior_pkey')
+
+    # La clave primaria de una tabla particionada debe incluir la clave de partición
+    op.execute("""
+        CREATE TABLE asistencias_log (
+            id INTEGER NOT NULL DEFAULT nextval('asistencias_log_id_seq'),
+            persona_id INTEGER NOT NULL,
+            tipo VARCHAR(20) NOT NULL,
+            "timestamp" TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT asistencias_log_pkey PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    op.execute('ALTER SEQUENCE asistencias_log_id_seq OWNED BY asistencias_log.id')
+    # Recibe las filas fuera de las particiones mensuales creadas
+    op.execute('CREATE TABLE asistencias_log_default PARTITION OF asistencias_log DEFAULT')
+
+    # Una partición por cada mes con registros y por los próximos meses
+    meses_con_datos = op.get_bind().execute(sa.text(
+        "SELECT DISTINCT date_trunc('month', \"timestamp\" AT TIME ZONE 'UTC')::date FROM asistencias_log_anterior"
+    )).scalars().all()
+    hoy = datetime.now(timezone.utc).date()
+    mes = date(hoy.year, hoy.month, 1)
+    proximos = [mes]
+    for _ in range(MESES_ADELANTE):
+        mes = _mes_siguiente(mes)
+        proximos.append(mes)
+    for mes in sorted(set(meses_con_datos) | set(proximos)):
+        _crear_particion(mes)
+
+    op.execute(
+        'INSERT INTO asistencias_log (id, persona_id, tipo, "timestamp") '
+        'SELECT id, persona_id, tipo, "timestamp" FROM asistencias_log_anterior'
+    )
+    op.drop_table('asistencias_log_anterior')
+
+    # Índices en la tabla padre: PostgreSQL los crea en cada partición.
+    # BRIN guarda un rango de timestamp por bloque de páginas: el log se escribe
+    # en orden de llegada, así ocupa una fracción de un b-tree y casi no cuesta al insertar.
+    op.create_index('ix_asistencias_log_tipo_persona_id', 'asistencias_log', ['tipo', 'persona_id'], unique=False)
+    op.create_index('ix_asistencias_log_timestamp', 'asistencias_log', ['timestamp'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('asistencias_log') as batch_op:
+            batch_op.drop_index('ix_asistencias_log_tipo_persona_id')
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(timezone=True), nullable=True)
+            batch_op.create_index(op.f('ix_asistencias_log_id'), ['id'], unique=False)
+            batch_op.create_index(op.f('ix_asistencias_log_persona_id'), ['persona_id'], unique=False)
+            batch_op.create_index(op.f('ix_asistencias_log_tipo'), ['tipo'], unique=False)
+        return
+
+    op.drop_index('ix_asistencias_log_timestamp', table_name='asistencias_log')
+    op.drop_index('ix_asistencias_log_tipo_persona_id', table_name='asistencias_log')
+    op.execute('ALTER SEQUENCE asistencias_log_id_seq OWNED BY NONE')
+    op.execute('ALTER TABLE asistencias_log RENAME TO asistencias_log_particionada')
+    op.execute('ALTER TABLE asistencias_log_particionada RENAME CONSTRAINT asistencias_log_pkey TO asistencias_log_particionada_pkey')
+
+    op.execute("""
+        CREATE TABLE asistencias_log (
+            id INTEGER NOT NULL DEFAULT nextval('asistencias_log_id_seq'),
+            persona_id INTEGER NOT NULL,
+            tipo VARCHAR(20) NOT NULL,
+            "timestamp" TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT asistencias_log_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute('ALTER SEQUENCE asistencias_log_id_seq OWNED BY asistencias_log.id')
+    op.execute(
+        'INSERT INTO asistencias_log (id, persona_id, tipo, "timestamp") '
+        'SELECT id, persona_id, tipo, "timestamp" FROM asistencias_log_particionada'
+    )
+    # Borra también todas las particiones
+    op.drop_table('asistencias_log_particionada')
+    _crear_indices_originales()
@@ -0,0 +1,46 @@
+"""cambios_sync
+
+Revision ID: 3f6c2a9d1b47
+Revises: 20e0118b3d26
+Create Date: 2026-10-19 09:12:31.184220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6c2a9d1b47'
+down_revision: Union[str, Sequence[str], None] = '20e0118b3d26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cambios_sync',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entidad', sa.String(length=20), nullable=False),
+    sa.Column('entidad_id', sa.Integer(), nullable=False),
+    sa.Column('operacion', sa.String(length=10), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Las filas existentes entran al feed como upserts para que un cliente
+    # que arranca con since=0 reciba la lista completa
+    op.execute(
+        "INSERT INTO cambios_sync (entidad, entidad_id, operacion) "
+        "SELECT 'invitado', id, 'upsert' FROM invitados ORDER BY id"
+    )
+    op.execute(
+        "INSERT INTO cambios_sync (entidad, entidad_id, operacion) "
+        "SELECT 'acompanante', id, 'upsert' FROM acompanantes ORDER BY id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cambios_sync')
@@ -0,0 +1,102 @@
+"""indices de las rutas frecuentes
+
+Revision ID: a7c41e9b2d05
+Revises: 318d70f8dabf
+Create Date: 2026-10-19 18:40:52.108377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c41e9b2d05'
+down_revision: Union[str, Sequence[str], None] = '318d70f8dabf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Índices que ninguna consulta usa y que cada importación y cada confirmación
+# deben mantener:
+# - *_id repiten la clave primaria.
+# - nombre es un b-tree que no sirve para ILIKE '%texto%' (la búsqueda del check-in).
+# - campana_area, eps y parentesco no se usan en ningún filtro; el reporte
+#   ordena por campana_area solo las filas de una sede, ya filtradas por sede.
+INDICES_RETIRADOS = [
+    ('ix_invitados_id', 'invitados', ['id']),
+    ('ix_invitados_nombre', 'invitados', ['nombre']),
+    ('ix_invitados_campana_area', 'invitados', ['campana_area']),
+    ('ix_invitados_eps', 'invitados', ['eps']),
+    ('ix_acompanantes_id', 'acompanantes', ['id']),
+    ('ix_acompanantes_nombre', 'acompanantes', ['nombre']),
+    ('ix_acompanantes_parentesco', 'acompanantes', ['parentesco']),
+    ('ix_acompanantes_eps', 'acompanantes', ['eps']),
+    ('ix_usuarios_id', 'usuarios', ['id']),
+]
+
+# Mismo predicado que compila la consulta: NOT estado_asistencia en PostgreSQL,
+# estado_asistencia = 0 en SQLite (si no calza, SQLite no usa el índice parcial)
+PENDIENTES = ~sa.column('estado_asistencia', sa.Boolean())
+
+# Búsqueda por nombre con ILIKE '%texto%': solo la acelera un índice de trigramas
+INDICES_TRIGRAMAS = [
+    ('ix_invitados_nombre_trgm', 'invitados'),
+    ('ix_acompanantes_nombre_trgm', 'acompanantes'),
+]
+
+
+def _pg_trgm_disponible() -> bool:
+    """
+    Instalar pg_trgm si el servidor lo trae. Es una extensión confiable desde
+    PostgreSQL 13: basta con permiso CREATE en la base. Si no se puede, la
+    migración sigue sin los índices de trigramas.
+    """
+    bind = op.get_bind()
+    if not bind.execute(sa.text("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")).scalar():
+        print("pg_trgm no está disponible: la búsqueda por nombre seguirá sin índice")
+        return False
+    try:
+        with bind.begin_nested():
+            bind.execute(sa.text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    except sa.exc.DBAPIError as e:
+        print(f"No se pudo instalar pg_trgm: {e.orig}")
+        return False
+    return True
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for nombre, tabla, _ in INDICES_RETIRADOS:
+        op.drop_index(nombre, table_name=tabla)
+
+    # Clave foránea sin índice: la usan el selectinload de cada búsqueda,
+    # la confirmación de acompañantes y el borrado en cascada
+    op.create_index('ix_acompanantes_invitado_id', 'acompanantes', ['invitado_id'], unique=False)
+
+    # Parcial: solo los invitados que no han llegado. Se achica a medida que
+    # avanza el evento y sirve la lista de pendientes (GET /invitados?solo_pendientes=true).
+    # Confirmar cambia la columna del predicado, así que esa actualización no es
+    # HOT, pero ocurre una sola vez por invitado.
+    op.create_index(
+        'ix_invitados_pendientes', 'invitados', ['id'], unique=False,
+        postgresql_where=PENDIENTES, sqlite_where=PENDIENTES,
+    )
+
+    if op.get_bind().dialect.name == 'postgresql' and _pg_trgm_disponible():
+        for nombre, tabla in INDICES_TRIGRAMAS:
+            op.create_index(
+                nombre, tabla, ['nombre'], unique=False,
+                postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'},
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        for nombre, _ in INDICES_TRIGRAMAS:
+            op.execute(f'DROP INDEX IF EXISTS {nombre}')
+    op.drop_index('ix_invitados_pendientes', table_name='invitados')
+    op.drop_index('ix_acompanantes_invitado_id', table_name='acompanantes')
+    for nombre, tabla, columnas in INDICES_RETIRADOS:
+        op.create_index(nombre, tabla, columnas, unique=False)
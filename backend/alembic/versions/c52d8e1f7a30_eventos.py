@@ -0,0 +1,250 @@
+"""eventos
+
+Revision ID: c52d8e1f7a30
+Revises: a7c41e9b2d05
+Create Date: 2026-10-19 21:12:06.531842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52d8e1f7a30'
+down_revision: Union[str, Sequence[str], None] = 'a7c41e9b2d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Los invitados existentes quedan en este evento, que queda activo
+EVENTO_INICIAL = 'Evento inicial'
+
+ACTIVO = sa.column('activo', sa.Boolean())
+PENDIENTES = ~sa.column('estado_asistencia', sa.Boolean())
+
+COLUMNAS_INVITADOS = 'id, nombre, cedula, campana_area, eps, sede, estado_asistencia, created_at, updated_at'
+COLUMNAS_ACOMPANANTES = 'id, invitado_id, nombre, cedula, edad, parentesco, eps, estado_asistencia, created_at, updated_at'
+
+INDICES_TRIGRAMAS = [
+    ('ix_invitados_nombre_trgm', 'invitados'),
+    ('ix_acompanantes_nombre_trgm', 'acompanantes'),
+]
+
+
+def _pg_trgm_instalado() -> bool:
+    return bool(op.get_bind().execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+    )).scalar())
+
+
+def _borrar_indices_invitados(trigramas: bool) -> None:
+    op.drop_index('ix_invitados_pendientes', table_name='invitados')
+    op.drop_index('ix_invitados_sede', table_name='invitados')
+    op.drop_index('ix_acompanantes_invitado_id', table_name='acompanantes')
+    if trigramas:
+        for nombre, _ in INDICES_TRIGRAMAS:
+            op.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+
+def _crear_indices_invitados(trigramas: bool) -> None:
+    op.create_index('ix_invitados_sede', 'invitados', ['sede'], unique=False)
+    op.create_index(
+        'ix_invitados_pendientes', 'invitados', ['id'], unique=False,
+        postgresql_where=PENDIENTES, sqlite_where=PENDIENTES,
+    )
+    op.create_index('ix_acompanantes_invitado_id', 'acompanantes', ['invitado_id'], unique=False)
+    if trigramas:
+        for nombre, tabla in INDICES_TRIGRAMAS:
+            op.create_index(
+                nombre, tabla, ['nombre'], unique=False,
+                postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'},
+            )
+
+
+def _apartar_tablas(sufijo: str) -> None:
+    """Renombrar invitados y acompañantes (y sus claves primarias) para copiar sus filas"""
+    for tabla in ('acompanantes', 'invitados'):
+        op.execute(f'ALTER SEQUENCE {tabla}_id_seq OWNED BY NONE')
+        op.execute(f'ALTER TABLE {tabla} RENAME TO {tabla}_{sufijo}')
+        op.execute(f'ALTER TABLE {tabla}_{sufijo} RENAME CONSTRAINT {tabla}_pkey TO {tabla}_{sufijo}_pkey')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    eventos = op.create_table('eventos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(length=255), nullable=False),
+        sa.Column('fecha', sa.Date(), nullable=True),
+        sa.Column('activo', sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column('archivado', sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_eventos_activo', 'eventos', ['activo'], unique=True, postgresql_where=ACTIVO, sqlite_where=ACTIVO)
+    evento_id = bind.execute(
+        sa.insert(eventos).values(nombre=EVENTO_INICIAL, activo=True).returning(eventos.c.id)
+    ).scalar()
+
+    # El log y el feed de /changes solo ganan la columna: el log sigue
+    # particionado por mes y el feed se filtra por evento con un índice
+    for tabla in ('asistencias_log', 'cambios_sync'):
+        op.add_column(tabla, sa.Column('evento_id', sa.Integer(), nullable=True))
+        op.execute(sa.text(f'UPDATE {tabla} SET evento_id = :evento_id').bindparams(evento_id=evento_id))
+    op.create_index('ix_cambios_sync_evento_id_id', 'cambios_sync', ['evento_id', 'id'], unique=False)
+
+    if bind.dialect.name != 'postgresql':
+        # Sin particiones (SQLite): la columna y la cédula única por evento
+        with op.batch_alter_table('asistencias_log') as batch_op:
+            batch_op.alter_column('evento_id', existing_type=sa.Integer(), nullable=False)
+        with op.batch_alter_table('cambios_sync') as batch_op:
+            batch_op.alter_column('evento_id', existing_type=sa.Integer(), nullable=False)
+        for tabla in ('invitados', 'acompanantes'):
+            op.add_column(tabla, sa.Column('evento_id', sa.Integer(), nullable=True))
+            op.execute(sa.text(f'UPDATE {tabla} SET evento_id = :evento_id').bindparams(evento_id=evento_id))
+            with op.batch_alter_table(tabla) as batch_op:
+                batch_op.alter_column('evento_id', existing_type=sa.Integer(), nullable=False)
+                batch_op.create_foreign_key(f'{tabla}_evento_id_fkey', 'eventos', ['evento_id'], ['id'])
+                batch_op.drop_index(f'ix_{tabla}_cedula')
+                batch_op.create_index(f'ix_{tabla}_evento_cedula', ['evento_id', 'cedula'], unique=True)
+        return
+
+    for tabla in ('asistencias_log', 'cambios_sync'):
+        op.alter_column(tabla, 'evento_id', existing_type=sa.Integer(), nullable=False)
+
+    # invitados y acompanantes se reconstruyen particionadas por lista de
+    # evento_id. Las claves primaria, única y foránea deben incluir la clave
+    # de partición; las secuencias de ids se conservan.
+    trigramas = _pg_trgm_instalado()
+    _borrar_indices_invitados(trigramas)
+    op.drop_index('ix_acompanantes_cedula', table_name='acompanantes')
+    op.drop_index('ix_invitados_cedula', table_name='invitados')
+    _apartar_tablas('anterior')
+
+    op.execute("""
+        CREATE TABLE invitados (
+            id INTEGER NOT NULL DEFAULT nextval('invitados_id_seq'),
+            evento_id INTEGER NOT NULL REFERENCES eventos (id),
+            nombre VARCHAR(255) NOT NULL,
+            cedula VARCHAR(20) NOT NULL,
+            campana_area VARCHAR(255),
+            eps VARCHAR(255),
+            sede VARCHAR(255),
+            estado_asistencia BOOLEAN NOT NULL DEFAULT false,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT invitados_pkey PRIMARY KEY (id, evento_id)
+        ) PARTITION BY LIST (evento_id)
+    """)
+    op.execute("""
+        CREATE TABLE acompanantes (
+            id INTEGER NOT NULL DEFAULT nextval('acompanantes_id_seq'),
+            evento_id INTEGER NOT NULL REFERENCES eventos (id),
+            invitado_id INTEGER NOT NULL,
+            nombre VARCHAR(255) NOT NULL,
+            cedula VARCHAR(20) NOT NULL,
+            edad INTEGER,
+            parentesco VARCHAR(100),
+            eps VARCHAR(255),
+            estado_asistencia BOOLEAN NOT NULL DEFAULT false,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT acompanantes_pkey PRIMARY KEY (id, evento_id),
+            CONSTRAINT acompanantes_invitado_id_fkey FOREIGN KEY (invitado_id, evento_id)
+                REFERENCES invitados (id, evento_id)
+        ) PARTITION BY LIST (evento_id)
+    """)
+    for tabla in ('invitados', 'acompanantes'):
+        op.execute(f'ALTER SEQUENCE {tabla}_id_seq OWNED BY {tabla}.id')
+        op.execute(f'CREATE TABLE {tabla}_evento_{evento_id} PARTITION OF {tabla} FOR VALUES IN ({evento_id})')
+
+    op.execute(
+        f'INSERT INTO invitados (evento_id, {COLUMNAS_INVITADOS}) '
+        f'SELECT {evento_id}, {COLUMNAS_INVITADOS} FROM invitados_anterior'
+    )
+    op.execute(
+        f'INSERT INTO acompanantes (evento_id, {COLUMNAS_ACOMPANANTES}) '
+        f'SELECT {evento_id}, {COLUMNAS_ACOMPANANTES} FROM acompanantes_anterior'
+    )
+    op.drop_table('acompanantes_anterior')
+    op.drop_table('invitados_anterior')
+
+    # Índices en las tablas padre: PostgreSQL los crea en cada partición
+    op.create_index('ix_invitados_evento_cedula', 'invitados', ['evento_id', 'cedula'], unique=True)
+    op.create_index('ix_acompanantes_evento_cedula', 'acompanantes', ['evento_id', 'cedula'], unique=True)
+    _crear_indices_invitados(trigramas)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    # El esquema anterior admite una sola lista de invitados
+    eventos_con_datos = bind.execute(sa.text(
+        'SELECT count(DISTINCT evento_id) FROM invitados'
+    )).scalar()
+    if eventos_con_datos > 1:
+        raise RuntimeError(
+            f"Hay {eventos_con_datos} eventos con invitados y el esquema anterior admite uno solo: "
+            "elimine los demás eventos antes de revertir esta migración"
+        )
+
+    if bind.dialect.name != 'postgresql':
+        for tabla in ('acompanantes', 'invitados'):
+            with op.batch_alter_table(tabla) as batch_op:
+                batch_op.drop_index(f'ix_{tabla}_evento_cedula')
+                batch_op.create_index(f'ix_{tabla}_cedula', ['cedula'], unique=True)
+                batch_op.drop_constraint(f'{tabla}_evento_id_fkey', type_='foreignkey')
+                batch_op.drop_column('evento_id')
+    else:
+        trigramas = _pg_trgm_instalado()
+        _borrar_indices_invitados(trigramas)
+        op.drop_index('ix_acompanantes_evento_cedula', table_name='acompanantes')
+        op.drop_index('ix_invitados_evento_cedula', table_name='invitados')
+        _apartar_tablas('particionada')
+
+        op.execute("""
+            CREATE TABLE invitados (
+                id INTEGER NOT NULL DEFAULT nextval('invitados_id_seq'),
+                nombre VARCHAR(255) NOT NULL,
+                cedula VARCHAR(20) NOT NULL,
+                campana_area VARCHAR(255),
+                eps VARCHAR(255),
+                sede VARCHAR(255),
+                estado_asistencia BOOLEAN NOT NULL DEFAULT false,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+                CONSTRAINT invitados_pkey PRIMARY KEY (id)
+            )
+        """)
+        op.execute("""
+            CREATE TABLE acompanantes (
+                id INTEGER NOT NULL DEFAULT nextval('acompanantes_id_seq'),
+                invitado_id INTEGER NOT NULL REFERENCES invitados (id),
+                nombre VARCHAR(255) NOT NULL,
+                cedula VARCHAR(20) NOT NULL,
+                edad INTEGER,
+                parentesco VARCHAR(100),
+                eps VARCHAR(255),
+                estado_asistencia BOOLEAN NOT NULL DEFAULT false,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+                CONSTRAINT acompanantes_pkey PRIMARY KEY (id)
+            )
+        """)
+        for tabla, columnas in (('invitados', COLUMNAS_INVITADOS), ('acompanantes', COLUMNAS_ACOMPANANTES)):
+            op.execute(f'ALTER SEQUENCE {tabla}_id_seq OWNED BY {tabla}.id')
+            op.execute(f'INSERT INTO {tabla} ({columnas}) SELECT {columnas} FROM {tabla}_particionada')
+        # Borra también las particiones
+        op.drop_table('acompanantes_particionada')
+        op.drop_table('invitados_particionada')
+        op.create_index('ix_invitados_cedula', 'invitados', ['cedula'], unique=True)
+        op.create_index('ix_acompanantes_cedula', 'acompanantes', ['cedula'], unique=True)
+        _crear_indices_invitados(trigramas)
+
+    op.drop_index('ix_cambios_sync_evento_id_id', table_name='cambios_sync')
+    for tabla in ('cambios_sync', 'asistencias_log'):
+        with op.batch_alter_table(tabla) as batch_op:
+            batch_op.drop_column('evento_id')
+    op.drop_index('ix_eventos_activo', table_name='eventos')
+    op.drop_table('eventos')
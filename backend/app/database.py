@@ -1,13 +1,104 @@
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.pool import NullPool
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .utils.metricas import instrumentar_sql
+from .utils.pool import PoolAsyncInstrumentado, PoolInstrumentado, instrumentar_engine
+from .utils.sqlite import OPCION_BEGIN, configurar_sqlite
 
-# Crear el engine de SQLAlchemy
-engine = create_engine(settings.database_url)
+# Drivers async equivalentes a cada motor soportado
+DRIVERS_ASYNC = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _opciones_pool(url: URL, poolclass) -> dict:
+    """Configuración del pool; SQLite en memoria usa un pool propio sin tamaño"""
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _url_async(url: URL) -> tuple:
+    """
+    URL equivalente con el driver async y los connect_args que necesita.
+    asyncpg no entiende sslmode de libpq: se pasa como ssl. asyncpg prepara
+    cada sentencia en el servidor y guarda las más usadas por conexión.
+    """
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        connect_args["prepared_statement_cache_size"] = settings.db_sentencias_preparadas
+        if "sslmode" in url.query:
+            connect_args["ssl"] = url.query["sslmode"]
+            url = url.difference_update_query(["sslmode"])
+    return url.set(drivername=DRIVERS_ASYNC[url.get_backend_name()]), connect_args
+
+
+def _instrumentar(engine, nombre: str = "principal") -> None:
+    """Métricas del pool y, si están habilitadas, de cada sentencia SQL y de las consultas lentas"""
+    instrumentar_engine(engine, nombre)
+    if settings.metricas_habilitadas or settings.consultas_lentas_umbral_ms > 0:
+        instrumentar_sql(engine, nombre)
+
+
+# Crear el engine de SQLAlchemy (scripts, importaciones y reportes)
+_url = make_url(settings.database_url)
+engine = create_engine(_url, **_opciones_pool(_url, PoolInstrumentado))
+_instrumentar(engine)
+
+# Engine async para las rutas de atención en el evento (búsqueda, confirmación,
+# usuarios): sus consultas no bloquean el event loop
+_url_asincrona, _connect_args_async = _url_async(_url)
+async_engine = create_async_engine(
+    _url_asincrona, connect_args=_connect_args_async, **_opciones_pool(_url_asincrona, PoolAsyncInstrumentado)
+)
+_instrumentar(async_engine.sync_engine, "async")
+
+# En SQLite las transacciones de escritura toman el bloqueo desde el BEGIN
+engine_escritura = engine
+async_engine_escritura = async_engine
+if _url.get_backend_name() == "sqlite":
+    configurar_sqlite(engine)
+    configurar_sqlite(async_engine.sync_engine)
+    engine_escritura = engine.execution_options(**{OPCION_BEGIN: "IMMEDIATE"})
+    async_engine_escritura = async_engine.execution_options(**{OPCION_BEGIN: "IMMEDIATE"})
 
 # Crear la sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: después del commit no se puede recargar un atributo sin await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Réplica opcional para las lecturas frecuentes; sin ella todo va al primario
+replica_async_engine = None
+AsyncSessionLectura = AsyncSessionLocal
+if settings.database_read_url:
+    _url_replica, _connect_args_replica = _url_async(make_url(settings.database_read_url))
+    replica_async_engine = create_async_engine(
+        _url_replica, connect_args=_connect_args_replica, **_opciones_pool(_url_replica, PoolAsyncInstrumentado)
+    )
+    _instrumentar(replica_async_engine.sync_engine, "replica")
+    AsyncSessionLectura = async_sessionmaker(replica_async_engine, autoflush=False, expire_on_commit=False)
+
+# Engine sync sobre la misma base de cada engine instrumentado, por nombre: el
+# plan de una consulta lenta se captura en un hilo aparte, donde los engines
+# async no pueden abrir conexiones
+engines_explain = {"principal": engine, "async": engine}
+if settings.database_read_url:
+    # Mismo driver sync que el primario (la URL de la réplica puede no indicarlo)
+    engines_explain["replica"] = create_engine(
+        make_url(settings.database_read_url).set(drivername=_url.drivername), poolclass=NullPool
+    )
 
 # Base para los modelos
 Base = declarative_base()
@@ -17,9 +108,35 @@ metadata = MetaData()
 
 
 def get_db():
-    """Dependency para obtener sesión de base de datos"""
+    """Dependency para obtener sesión de base de datos (solo lectura en SQLite)"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_db_escritura():
+    """
+    Dependency para las rutas que escriben. En SQLite la transacción toma el
+    bloqueo de escritura desde el BEGIN (IMMEDIATE) y lo retiene hasta
+    confirmar: solo deben usarla las rutas que de verdad escriben, no por
+    ser POST (el login verifica bcrypt ~300 ms y no escribe).
+    """
+    db = SessionLocal(bind=engine_escritura)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Dependency para obtener una sesión async de base de datos (solo lectura en SQLite)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_db_escritura():
+    """get_db_escritura con una sesión async"""
+    async with AsyncSessionLocal(bind=async_engine_escritura) as db:
+        yield db
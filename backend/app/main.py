@@ -1,15 +1,35 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from .config import settings
-from .routers import asistencia, import_router, auth, usuarios
+from .database import engine
+from .routers import asistencia, import_router, auth, usuarios, sync, diagnostico, eventos
+from .services.particiones_service import preparar_particiones
+from .services.report_service import cerrar_pool
+from .utils.hashing import HashingSaturado
+from .utils.metricas import CONTENT_TYPE_PROMETHEUS, MiddlewareMetricas, exponer_metricas
 import re
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Al iniciar: particiones de asistencias_log para los próximos meses.
+    Al apagar: terminar los procesos del reporte por sedes.
+    """
+    await run_in_threadpool(preparar_particiones, engine, settings.asistencias_log_meses_adelante)
+    yield
+    cerrar_pool()
+
+
 # Crear la aplicación FastAPI
 app = FastAPI(
     title="Sistema de Confirmación de Asistencia",
     description="API para gestionar confirmación de asistencia a eventos",
     version="1.0.0",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # Función para validar orígenes Railway
@@ -45,18 +65,44 @@ app.add_middleware(
         "Content-Type",
         "Authorization",
         "X-Requested-With",
-        "X-CSRFToken"
+        "X-CSRFToken",
+        "If-None-Match",
+        "X-Ultima-Escritura",
+        "X-Evento-Id"
     ],
-    expose_headers=["*"],
+    # Con credenciales los navegadores no aplican el comodín: se nombra explícitamente
+    expose_headers=["*", "X-Ultima-Escritura"],
     max_age=3600,
 )
 
+# Métricas por ruta: va después de CORS para medir también las respuestas de preflight
+if settings.metricas_habilitadas:
+    app.add_middleware(MiddlewareMetricas)
+
 # Incluir routers
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(usuarios.router, prefix="/api/v1")
+app.include_router(eventos.router, prefix="/api/v1")
+app.include_router(diagnostico.router, prefix="/api/v1")
 app.include_router(asistencia.router)
+app.include_router(sync.router)
 app.include_router(import_router.router, prefix="/import", tags=["import"])
 
+@app.exception_handler(HashingSaturado)
+async def hashing_saturado_handler(request: Request, exc: HashingSaturado):
+    """Con la cola de bcrypt llena se responde de inmediato en lugar de encolar más trabajo"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "El servidor está procesando muchos inicios de sesión, intenta de nuevo en unos segundos"},
+        headers={"Retry-After": "1"}
+    )
+
+if settings.metricas_habilitadas:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Métricas en formato de texto de Prometheus"""
+        return Response(exponer_metricas(), media_type=CONTENT_TYPE_PROMETHEUS)
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -79,7 +125,9 @@ async def root():
             "health": "/health",
             "docs": "/docs",
             "auth": "/api/v1/auth",
+            "eventos": "/api/v1/eventos",
             "search": "/api/v1/search",
+            "changes": "/api/v1/changes",
             "import": "/import"
         }
     }
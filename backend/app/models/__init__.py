@@ -1,59 +1,140 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import false, func
 from ..database import Base
 
 
+class Evento(Base):
+    __tablename__ = "eventos"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(255), nullable=False)
+    fecha = Column(Date, nullable=True)
+    # El evento activo es el que usan las rutas cuando la petición no indica otro
+    activo = Column(Boolean, default=False, nullable=False, server_default=false())
+    # Sus particiones se separaron de las tablas: ya no aparece en las consultas
+    archivado = Column(Boolean, default=False, nullable=False, server_default=false())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# A lo sumo un evento activo
+Index("ix_eventos_activo", Evento.activo, unique=True, postgresql_where=Evento.activo, sqlite_where=Evento.activo)
+
+
 class Invitado(Base):
     __tablename__ = "invitados"
+    __table_args__ = (
+        # La misma cédula puede estar en varios eventos
+        Index("ix_invitados_evento_cedula", "evento_id", "cedula", unique=True),
+    )
+
+    # En PostgreSQL la tabla está particionada por lista de evento_id (una
+    # partición por evento) y su clave primaria es (id, evento_id). El ORM usa
+    # el mismo par como identidad: sus UPDATE filtran por evento_id y solo
+    # tocan la partición del evento
+    __mapper_args__ = {"primary_key": ["id", "evento_id"]}
 
-    id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String(255), nullable=False, index=True)
-    cedula = Column(String(20), unique=True, nullable=False, index=True)
-    campana_area = Column(String(255), nullable=True, index=True)
-    eps = Column(String(255), nullable=True, index=True)
+    id = Column(Integer, primary_key=True)
+    evento_id = Column(Integer, ForeignKey("eventos.id"), nullable=False)
+    # En PostgreSQL con pg_trgm la migración agrega un índice GIN de trigramas
+    # sobre nombre para la búsqueda con ILIKE '%texto%'
+    nombre = Column(String(255), nullable=False)
+    cedula = Column(String(20), nullable=False)
+    campana_area = Column(String(255), nullable=True)
+    eps = Column(String(255), nullable=True)
     sede = Column(String(255), nullable=True, index=True)
-    estado_asistencia = Column(Boolean, default=False, nullable=False, server_default='false')
+    estado_asistencia = Column(Boolean, default=False, nullable=False, server_default=false())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
-    # Relación con acompañantes
-    acompanantes = relationship("Acompanante", back_populates="invitado", cascade="all, delete-orphan")
+    # Relación con acompañantes; el evento en la condición acota el
+    # selectinload a la partición del evento
+    acompanantes = relationship(
+        "Acompanante",
+        primaryjoin="and_(Invitado.id == foreign(Acompanante.invitado_id), Invitado.evento_id == foreign(Acompanante.evento_id))",
+        back_populates="invitado",
+        cascade="all, delete-orphan",
+    )
 
 
 class Acompanante(Base):
     __tablename__ = "acompanantes"
+    __table_args__ = (
+        Index("ix_acompanantes_evento_cedula", "evento_id", "cedula", unique=True),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    invitado_id = Column(Integer, ForeignKey("invitados.id"), nullable=False)
-    nombre = Column(String(255), nullable=False, index=True)
-    cedula = Column(String(20), unique=True, nullable=False, index=True)
+    # Particionada igual que invitados; en PostgreSQL la clave foránea al
+    # invitado es (invitado_id, evento_id), así que el acompañante queda en su evento
+    __mapper_args__ = {"primary_key": ["id", "evento_id"]}
+
+    id = Column(Integer, primary_key=True)
+    evento_id = Column(Integer, ForeignKey("eventos.id"), nullable=False)
+    invitado_id = Column(Integer, ForeignKey("invitados.id"), nullable=False, index=True)
+    nombre = Column(String(255), nullable=False)
+    cedula = Column(String(20), nullable=False)
     edad = Column(Integer, nullable=True)
-    parentesco = Column(String(100), nullable=True, index=True)
-    eps = Column(String(255), nullable=True, index=True)
-    estado_asistencia = Column(Boolean, default=False, nullable=False, server_default='false')
+    parentesco = Column(String(100), nullable=True)
+    eps = Column(String(255), nullable=True)
+    estado_asistencia = Column(Boolean, default=False, nullable=False, server_default=false())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relación con invitado
-    invitado = relationship("Invitado", back_populates="acompanantes")
+    invitado = relationship(
+        "Invitado",
+        primaryjoin="and_(Invitado.id == foreign(Acompanante.invitado_id), Invitado.evento_id == foreign(Acompanante.evento_id))",
+        back_populates="acompanantes",
+    )
+
+
+# Parcial: solo los invitados que no han llegado (lista de pendientes). Se
+# declara con la columna para que el predicado compile igual que las consultas.
+Index(
+    "ix_invitados_pendientes", Invitado.id,
+    postgresql_where=~Invitado.estado_asistencia, sqlite_where=~Invitado.estado_asistencia,
+)
 
 
 class AsistenciaLog(Base):
     __tablename__ = "asistencias_log"
+    __table_args__ = (
+        # Búsquedas por persona: siempre filtran también por tipo
+        Index("ix_asistencias_log_tipo_persona_id", "tipo", "persona_id"),
+        Index("ix_asistencias_log_timestamp", "timestamp", postgresql_using="brin"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    persona_id = Column(Integer, nullable=False, index=True)
-    tipo = Column(String(20), nullable=False, index=True)  # 'principal' o 'acompanante'
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # En PostgreSQL la tabla está particionada por mes de timestamp y su clave
+    # primaria es (id, timestamp); id sigue siendo único (secuencia) y el ORM lo usa como identidad
+    id = Column(Integer, primary_key=True)
+    evento_id = Column(Integer, nullable=False)
+    persona_id = Column(Integer, nullable=False)
+    tipo = Column(String(20), nullable=False)  # 'principal' o 'acompanante'
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
 class Usuario(Base):
     __tablename__ = "usuarios"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String(50), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
     nombre_completo = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class CambioSync(Base):
+    __tablename__ = "cambios_sync"
+    __table_args__ = (
+        # Feed de /changes de un evento a partir de un cursor
+        Index("ix_cambios_sync_evento_id_id", "evento_id", "id"),
+    )
+
+    # El id autoincremental es el cursor que usan los clientes de /changes; sync_service
+    # asigna los ids en orden de confirmación (ver _guardar_cambios_pendientes)
+    id = Column(Integer, primary_key=True)
+    evento_id = Column(Integer, nullable=False)
+    entidad = Column(String(20), nullable=False)  # 'invitado' o 'acompanante'
+    entidad_id = Column(Integer, nullable=False)
+    operacion = Column(String(10), nullable=False)  # 'upsert' o 'delete'
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
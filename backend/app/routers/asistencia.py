@@ -1,24 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from ..database import get_db
-from ..services.asistencia_service import AsistenciaService
+from ..database import get_async_db_escritura
+from ..services.asistencia_service import AsistenciaServiceAsync
+from ..utils.etag import get_data_version_async, make_etag, check_not_modified
+from ..utils.eventos import evento_actual
+from ..utils.replica import get_lectura_db, registrar_escritura
 from ..schemas import SearchResponse, ConfirmarAsistenciaRequest, ConfirmarAsistenciaResponse
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/v1", tags=["asistencia"])
 
 
 @router.get("/search", response_model=Optional[SearchResponse])
 async def search_invitado(
+    request: Request,
+    response: Response,
     query: str = Query(..., min_length=1, description="Cédula o nombre del invitado"),
-    db: Session = Depends(get_db)
+    evento_id: int = Depends(evento_actual),
+    db: AsyncSession = Depends(get_lectura_db)
 ):
     """
-    Busca un invitado por cédula o nombre.
+    Busca un invitado del evento por cédula o nombre.
     Retorna el invitado con sus acompañantes si se encuentra.
     """
-    service = AsistenciaService(db)
-    result = service.search_invitado(query)
+    etag = make_etag(await get_data_version_async(db), "search", str(evento_id), query.strip())
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    
+    service = AsistenciaServiceAsync(db, evento_id)
+    result = await service.search_invitado(query)
     
     if not result:
         raise HTTPException(
@@ -32,18 +47,21 @@ async def search_invitado(
 @router.post("/confirmar_asistencia", response_model=ConfirmarAsistenciaResponse)
 async def confirmar_asistencia(
     request: ConfirmarAsistenciaRequest,
-    db: Session = Depends(get_db)
+    response: Response,
+    evento_id: int = Depends(evento_actual),
+    db: AsyncSession = Depends(get_async_db_escritura)
 ):
     """
     Confirma la asistencia del invitado y opcionalmente de sus acompañantes.
     Actualiza el estado en la base de datos y crea logs de asistencia.
     """
-    service = AsistenciaService(db)
-    result = service.confirmar_asistencia(request)
+    service = AsistenciaServiceAsync(db, evento_id)
+    result = await service.confirmar_asistencia(request)
     
     if not result.success:
         raise HTTPException(status_code=400, detail=result.message)
     
+    await registrar_escritura(response, db)
     return result
 
 
@@ -51,15 +69,19 @@ async def confirmar_asistencia(
 async def agregar_invitado_rapido(
     nombre: str,
     cedula: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    evento_id: int = Depends(evento_actual),
+    db: AsyncSession = Depends(get_async_db_escritura)
 ):
     """
-    Agrega un invitado nuevo al momento (para casos no previstos)
+    Agrega un invitado nuevo al evento al momento (para casos no previstos)
     """
     from ..models import Invitado
     
-    # Verificar si ya existe
-    existing = db.query(Invitado).filter(Invitado.cedula == cedula).first()
+    # Verificar si ya existe en el evento
+    existing = (await db.execute(
+        select(Invitado.id).where(Invitado.evento_id == evento_id, Invitado.cedula == cedula)
+    )).first()
     if existing:
         raise HTTPException(
             status_code=400, 
@@ -68,23 +90,26 @@ async def agregar_invitado_rapido(
     
     # Crear nuevo invitado
     nuevo_invitado = Invitado(
+        evento_id=evento_id,
         nombre=nombre,
         cedula=cedula,
         estado_asistencia=True  # Se agrega ya confirmado
     )
     
     db.add(nuevo_invitado)
-    db.commit()
-    db.refresh(nuevo_invitado)
+    await db.commit()
+    await db.refresh(nuevo_invitado)
     
     # Crear log de asistencia
     from ..models import AsistenciaLog
     log = AsistenciaLog(
+        evento_id=evento_id,
         persona_id=nuevo_invitado.id,
         tipo="principal"
     )
     db.add(log)
-    db.commit()
+    await db.commit()
+    await registrar_escritura(response, db)
     
     return {
         "success": True,
@@ -102,15 +127,17 @@ async def agregar_acompanante_extra(
     invitado_id: int,
     nombre_acompanante: str,
     cedula_acompanante: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    evento_id: int = Depends(evento_actual),
+    db: AsyncSession = Depends(get_async_db_escritura)
 ):
     """
-    Agrega un acompañante extra a un invitado existente
+    Agrega un acompañante extra a un invitado existente del evento
     """
     from ..models import Invitado, Acompanante, AsistenciaLog
     
-    # Verificar que el invitado existe
-    invitado = db.query(Invitado).filter(Invitado.id == invitado_id).first()
+    # Verificar que el invitado existe (la identidad es el par id, evento)
+    invitado = await db.get(Invitado, (invitado_id, evento_id))
     if not invitado:
         raise HTTPException(
             status_code=404,
@@ -118,9 +145,9 @@ async def agregar_acompanante_extra(
         )
     
     # Verificar si ya existe un acompañante con esta cédula
-    existing_acompanante = db.query(Acompanante).filter(
-        Acompanante.cedula == cedula_acompanante
-    ).first()
+    existing_acompanante = (await db.execute(
+        select(Acompanante.id).where(Acompanante.evento_id == evento_id, Acompanante.cedula == cedula_acompanante)
+    )).first()
     
     if existing_acompanante:
         raise HTTPException(
@@ -130,6 +157,7 @@ async def agregar_acompanante_extra(
     
     # Crear nuevo acompañante
     nuevo_acompanante = Acompanante(
+        evento_id=evento_id,
         nombre=nombre_acompanante,
         cedula=cedula_acompanante,
         invitado_id=invitado_id,
@@ -137,16 +165,18 @@ async def agregar_acompanante_extra(
     )
     
     db.add(nuevo_acompanante)
-    db.commit()
-    db.refresh(nuevo_acompanante)
+    await db.commit()
+    await db.refresh(nuevo_acompanante)
     
     # Crear log de asistencia
     log = AsistenciaLog(
+        evento_id=evento_id,
         persona_id=nuevo_acompanante.id,
         tipo="acompanante"
     )
     db.add(log)
-    db.commit()
+    await db.commit()
+    await registrar_escritura(response, db)
     
     return {
         "success": True,
@@ -160,50 +190,80 @@ async def agregar_acompanante_extra(
 
 
 @router.get("/stats")
-async def get_stats(db: Session = Depends(get_db)):
+async def get_stats(
+    request: Request,
+    response: Response,
+    evento_id: int = Depends(evento_actual),
+    db: AsyncSession = Depends(get_lectura_db)
+):
     """
-    Obtiene estadísticas de asistencia para dashboard (funcionalidad futura).
+    Obtiene estadísticas de asistencia del evento para dashboard (funcionalidad futura).
     """
-    service = AsistenciaService(db)
-    return service.get_asistencias_stats()
+    etag = make_etag(await get_data_version_async(db), "stats", str(evento_id))
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    
+    service = AsistenciaServiceAsync(db, evento_id)
+    return await service.get_asistencias_stats()
 
 
 @router.get("/invitados")
-async def get_all_invitados(db: Session = Depends(get_db)):
+async def get_all_invitados(
+    request: Request,
+    response: Response,
+    solo_pendientes: bool = Query(False, description="Solo los invitados que aún no han llegado"),
+    evento_id: int = Depends(evento_actual),
+    db: AsyncSession = Depends(get_lectura_db)
+):
     """
-    Obtiene la lista completa de invitados con sus acompañantes.
+    Obtiene la lista completa de invitados del evento con sus acompañantes.
+    Con solo_pendientes=true retorna solo los que no han confirmado asistencia.
     """
-    service = AsistenciaService(db)
-    invitados = service.get_all_invitados()
+    etag = make_etag(
+        await get_data_version_async(db), "invitados-pendientes" if solo_pendientes else "invitados", str(evento_id)
+    )
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    
+    service = AsistenciaServiceAsync(db, evento_id)
+    invitados = await service.get_all_invitados(solo_pendientes=solo_pendientes)
     return invitados
 
 
 @router.delete("/invitados/eliminar-todos/")
-async def eliminar_todos_invitados(db: Session = Depends(get_db)):
+async def eliminar_todos_invitados(
+    response: Response,
+    evento_id: int = Depends(evento_actual),
+    db: AsyncSession = Depends(get_async_db_escritura)
+):
     """
-    Elimina todos los invitados y sus acompañantes de la base de datos.
-    Esta acción es irreversible.
+    Elimina todos los invitados y sus acompañantes del evento.
+    Esta acción es irreversible. Para dejar atrás un evento pasado conviene
+    DELETE /api/v1/eventos/{id}, que borra o archiva sus particiones.
     """
     try:
         # Importar modelos correctamente
         from ..models import Invitado, Acompanante, AsistenciaLog
         
-        # Obtener el número de registros antes de eliminar
-        total_invitados = db.query(Invitado).count()
-        total_acompanantes = db.query(Acompanante).count()
-        total_logs = db.query(AsistenciaLog).count()
+        # Registrar tombstones para los clientes de /changes antes de borrar
+        from ..services.sync_service import registrar_eliminacion_masiva
+        await db.run_sync(registrar_eliminacion_masiva, Acompanante, evento_id)
+        await db.run_sync(registrar_eliminacion_masiva, Invitado, evento_id)
         
-        # Eliminar todos los logs de asistencia primero
-        logs_deleted = db.query(AsistenciaLog).delete()
+        # Eliminar todos los logs de asistencia del evento primero
+        logs_deleted = (await db.execute(delete(AsistenciaLog).where(AsistenciaLog.evento_id == evento_id))).rowcount
         
         # Eliminar todos los acompañantes explícitamente
-        acompanantes_deleted = db.query(Acompanante).delete()
+        acompanantes_deleted = (await db.execute(delete(Acompanante).where(Acompanante.evento_id == evento_id))).rowcount
         
         # Eliminar todos los invitados
-        invitados_deleted = db.query(Invitado).delete()
+        invitados_deleted = (await db.execute(delete(Invitado).where(Invitado.evento_id == evento_id))).rowcount
         
         # Confirmar los cambios
-        db.commit()
+        await db.commit()
+        await registrar_escritura(response, db)
         
         return {
             "success": True,
@@ -215,10 +275,8 @@ async def eliminar_todos_invitados(db: Session = Depends(get_db)):
             }
         }
     except Exception as e:
-        db.rollback()
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Error detallado: {error_details}")
+        await db.rollback()
+        logger.exception(f"Error al eliminar los invitados: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Error al eliminar los invitados: {str(e)}"
@@ -1,19 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from ..database import get_db
+from ..database import get_async_db
 from ..schemas.auth import UserLogin, Token, User
 from ..utils.auth import (
     authenticate_user, 
     create_access_token, 
-    verify_token, 
-    get_user_by_username,
+    get_current_user,
     ACCESS_TOKEN_EXPIRE_HOURS
 )
+from ..utils.throttling import ip_cliente, verificar_limite_login
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
-security = HTTPBearer()
 
 
 @router.options("/login")
@@ -32,9 +30,18 @@ async def auth_test():
 
 
 @router.post("/login", response_model=Token)
-async def login(user_login: UserLogin, db: Session = Depends(get_db)):
+async def login(user_login: UserLogin, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Iniciar sesión"""
-    user = authenticate_user(db, user_login.username, user_login.password)
+    # Limitar antes de bcrypt: cada intento con un username válido cuesta ~250 ms de CPU
+    espera = verificar_limite_login(user_login.username, ip_cliente(request))
+    if espera:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiados intentos de inicio de sesión, intenta de nuevo más tarde",
+            headers={"Retry-After": str(espera)},
+        )
+    
+    user = await authenticate_user(db, user_login.username, user_login.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -54,54 +61,19 @@ async def login(user_login: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=User)
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
+async def get_me(current_user: User = Depends(get_current_user)):
     """Obtener información del usuario actual"""
-    token_data = verify_token(credentials.credentials)
-    if token_data is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user = get_user_by_username(db, token_data.username)
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Usuario no encontrado"
-        )
-    
-    return user
+    return current_user
 
 
 @router.post("/verify")
-async def verify_auth_token(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
+async def verify_auth_token(current_user: User = Depends(get_current_user)):
     """Verificar si el token es válido"""
-    token_data = verify_token(credentials.credentials)
-    if token_data is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido"
-        )
-    
-    user = get_user_by_username(db, token_data.username)
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Usuario no encontrado"
-        )
-    
     return {
         "valid": True,
         "user": {
-            "id": user.id,
-            "username": user.username,
-            "nombre_completo": user.nombre_completo
+            "id": current_user.id,
+            "username": current_user.username,
+            "nombre_completo": current_user.nombre_completo
         }
     }
@@ -0,0 +1,81 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ..config import settings
+from ..database import engine
+from ..services.indices_service import analizar_indices, planes_consultas_lentas
+from ..utils.auth import get_current_user, estadisticas_cache_principales
+from ..utils.consultas_lentas import consultas_lentas
+from ..utils.hashing import estadisticas_hashing
+from ..utils.pool import estadisticas_pool
+from ..utils.replica import estadisticas_replica
+from ..utils.throttling import estadisticas_login
+
+router = APIRouter(prefix="/diagnostico", tags=["diagnostico"], dependencies=[Depends(get_current_user)])
+
+
+@router.get("/hashing")
+async def diagnostico_hashing():
+    """
+    Estado del pool de bcrypt: operaciones en cola y en ejecución, rechazos
+    por saturación y percentiles del tiempo de espera en cola y de ejecución.
+    """
+    return estadisticas_hashing()
+
+
+@router.get("/auth")
+async def diagnostico_auth():
+    """Estado de la caché de usuarios autenticados: entradas, aciertos y fallos"""
+    return estadisticas_cache_principales()
+
+
+@router.get("/login")
+async def diagnostico_login():
+    """Estado de los limitadores de login por username y por IP"""
+    return estadisticas_login()
+
+
+@router.get("/pool")
+async def diagnostico_pool():
+    """
+    Estado del pool de conexiones: conexiones en uso y disponibles, overflow,
+    conexiones invalidadas, timeouts y percentiles de la espera por conexión.
+    """
+    return estadisticas_pool()
+
+
+@router.get("/replica")
+async def diagnostico_replica():
+    """Lecturas servidas por la réplica y lecturas desviadas al primario por retraso o error"""
+    return estadisticas_replica()
+
+
+@router.get("/consultas-lentas")
+async def diagnostico_consultas_lentas(
+    limite: int = Query(50, ge=1, le=1000),
+    ruta: Optional[str] = Query(None, description="Filtrar por ruta, p. ej. 'GET /api/v1/search'"),
+    solo_con_plan: bool = False
+):
+    """
+    Sentencias que superaron el umbral de consultas lentas, las más recientes
+    primero: duración, ruta que las originó, forma de los parámetros y, para
+    las muestreadas, el plan de EXPLAIN (ANALYZE, BUFFERS).
+    """
+    return consultas_lentas(limite, ruta, solo_con_plan)
+
+
+@router.get("/indices")
+def diagnostico_indices(
+    max_lecturas: int = Query(0, ge=0, description="Lecturas hasta las que un índice se considera sin uso"),
+    min_filas: int = Query(1000, ge=0, description="Filas mínimas de una tabla para sugerir índices")
+):
+    """
+    Asesor de índices (PostgreSQL): índices sin uso según pg_stat_user_indexes,
+    duplicados o cubiertos por otro, y faltantes según las claves foráneas y
+    los planes de las rutas frecuentes y de las consultas lentas capturadas.
+    """
+    planes = planes_consultas_lentas(consultas_lentas(limite=settings.consultas_lentas_max_registros)["consultas"])
+    try:
+        with engine.connect() as conn:
+            return analizar_indices(conn, planes, max_lecturas, min_filas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List
+from ..database import engine_escritura
+from ..services import eventos_service
+from ..schemas import Evento, EventoCreate
+from ..utils.auth import get_current_user
+from ..utils.eventos import invalidar_eventos
+
+# Las particiones se crean y se separan con DDL: rutas síncronas sobre el engine
+router = APIRouter(prefix="/eventos", tags=["eventos"], dependencies=[Depends(get_current_user)])
+
+
+def _buscar(conn, evento_id: int) -> Evento:
+    for evento in eventos_service.listar_eventos(conn):
+        if evento["id"] == evento_id:
+            return Evento(**evento)
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento no encontrado")
+
+
+@router.get('/', response_model=List[Evento])
+def list_eventos():
+    """Obtener los eventos, con el activo marcado y sus invitados"""
+    with engine_escritura.connect() as conn:
+        return eventos_service.listar_eventos(conn)
+
+
+@router.post('/', response_model=Evento, status_code=status.HTTP_201_CREATED)
+def create_evento(evento: EventoCreate):
+    """Crear un evento con sus particiones; con activar=true pasa a ser el activo"""
+    with engine_escritura.begin() as conn:
+        evento_id = eventos_service.crear_evento(conn, evento.nombre, evento.fecha, evento.activar)
+    invalidar_eventos()
+    with engine_escritura.connect() as conn:
+        return _buscar(conn, evento_id)
+
+
+@router.post('/{evento_id}/activar', response_model=Evento)
+def activar_evento(evento_id: int):
+    """Activar un evento: las rutas sin X-Evento-Id pasan a usarlo"""
+    try:
+        with engine_escritura.begin() as conn:
+            eventos_service.activar_evento(conn, evento_id)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    invalidar_eventos()
+    with engine_escritura.connect() as conn:
+        return _buscar(conn, evento_id)
+
+
+@router.delete('/{evento_id}')
+def delete_evento(
+    evento_id: int,
+    archivar: bool = Query(False, description="Separar y conservar sus particiones en lugar de borrarlas")
+):
+    """
+    Eliminar un evento pasado: borra (o separa, con archivar=true) sus
+    particiones de invitados y acompañantes. El evento activo no se puede eliminar.
+    """
+    try:
+        with engine_escritura.begin() as conn:
+            eventos_service.eliminar_evento(conn, evento_id, archivar=archivar)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    invalidar_eventos()
+    return {
+        "success": True,
+        "message": f"Evento {evento_id} {'archivado' if archivar else 'eliminado'} exitosamente"
+    }
@@ -1,23 +1,49 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Invitado, Acompanante
-from app.schemas import InvitadoCreate, AcompananteCreate
+from app.config import settings
+from app.database import get_db, get_db_escritura, SessionLocal
+from app.schemas import TrabajoImportacion
+from app.services.import_service import ImportService, validar_libro, COLUMNAS_INVITADOS, COLUMNAS_ACOMPANANTES, COLUMNAS_RECHAZOS
+from app.services.copy_import_service import CopyImportService, FORMATOS, parquet_disponible
+from app.services.import_jobs import crear_trabajo, obtener_trabajo, obtener_rechazos
+from app.services.export_service import ExportService
+from app.services.report_service import ReportService
+from app.utils.eventos import evento_actual
+from app.utils.excel import archivo_temporal, guardar_temporal, leer_y_eliminar, LectorExcel
+from fastapi.responses import StreamingResponse
 import pandas as pd
 import io
-from typing import List
+import os
+import tempfile
+from datetime import datetime
 import logging
+from contextlib import ExitStack
+from typing import List, Optional
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+MODO_QUERY = Query(
+    "insertar",
+    pattern="^(insertar|actualizar)$",
+    description="'insertar' solo crea cédulas nuevas; 'actualizar' también aplica cambios a las existentes sin tocar el estado de asistencia"
+)
+
+
 @router.post("/import-excel")
-async def import_excel(
+def import_excel(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    modo: str = MODO_QUERY,
+    dry_run: bool = Query(False, description="Simular la importación y retornar el diff sin escribir nada"),
+    evento_id: int = Depends(evento_actual),
+    db: Session = Depends(get_db_escritura)
 ):
     """
-    Importar invitados y acompañantes desde un archivo Excel.
+    Importar invitados y acompañantes de un evento desde un archivo Excel.
+    
+    Con dry_run=true no se escribe nada: la respuesta trae los mismos contadores
+    y un diff con los invitados nuevos, los ya existentes y los acompañantes
+    cuyo invitado principal no existe ni viene en el archivo.
     
     Formato esperado del Excel:
     - Hoja 1: Invitados (nombre, cedula, telefono, email)
@@ -31,175 +57,52 @@ async def import_excel(
         )
     
     try:
-        # Leer el archivo Excel
-        contents = await file.read()
-        excel_file = pd.ExcelFile(io.BytesIO(contents))
-        
-        # Verificar que existan las hojas necesarias
-        if 'Invitados' not in excel_file.sheet_names:
-            raise HTTPException(
-                status_code=400, 
-                detail="El archivo Excel debe contener una hoja llamada 'Invitados'"
-            )
-        
-        # Leer hoja de invitados
-        df_invitados = pd.read_excel(io.BytesIO(contents), sheet_name='Invitados')
-        
-        # Validar columnas requeridas para invitados
-        required_cols_invitados = ['cedula', 'nombre', 'campana_area', 'eps', 'sede']
-        missing_cols = [col for col in required_cols_invitados if col not in df_invitados.columns]
-        if missing_cols:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Faltan columnas en la hoja 'Invitados': {missing_cols}"
-            )
-        
-        # Procesar invitados
-        invitados_creados = 0
-        invitados_saltados = 0
-        acompanantes_creados = 0
-        acompanantes_saltados = 0
-        
-        for _, row in df_invitados.iterrows():
-            # Validar que la cédula no sea nula, vacía o 'nan'
-            cedula_value = str(row['cedula']).strip()
-            if not cedula_value or cedula_value.lower() == 'nan' or pd.isna(row['cedula']):
-                logger.warning(f"Saltando invitado con cédula inválida: {row['cedula']} - Nombre: {row.get('nombre', 'N/A')}")
-                invitados_saltados += 1
-                continue
+        # Copiar el upload a disco y abrir el libro una sola vez
+        with archivo_temporal(file) as ruta:
+            streaming = os.path.getsize(ruta) >= settings.import_streaming_umbral_mb * 1024 * 1024
+            with LectorExcel(ruta, streaming=streaming) as excel_file:
+                sheet_names = excel_file.sheet_names
+                logger.info(f"Hojas encontradas en el Excel: {sheet_names} (streaming: {excel_file.streaming})")
                 
-            # Limpiar cédula: quitar .0 si es un número decimal
-            if cedula_value.endswith('.0'):
-                cedula_value = cedula_value[:-2]
-            
-            # Verificar si el invitado ya existe
-            existing_invitado = db.query(Invitado).filter(
-                Invitado.cedula == cedula_value
-            ).first()
-            
-            if not existing_invitado:
-                invitado = Invitado(
-                    nombre=str(row['nombre']),
-                    cedula=cedula_value,
-                    campana_area=str(row['campana_area']) if pd.notna(row.get('campana_area')) else None,
-                    eps=str(row['eps']) if pd.notna(row.get('eps')) else None,
-                    sede=str(row['sede']) if pd.notna(row.get('sede')) else None,
-                    estado_asistencia=False
-                )
-                db.add(invitado)
-                invitados_creados += 1
-        
-        # Leer hoja de acompañantes si existe
-        sheet_names = excel_file.sheet_names
-        logger.info(f"Hojas encontradas en el Excel: {sheet_names}")
-        
-        # Buscar hoja de acompañantes (aceptar variaciones comunes)
-        acompanantes_sheet = None
-        for sheet in sheet_names:
-            if sheet.lower().strip() in ['acompanantes', 'acompañantes', 'acompanante', 'acompañante']:
-                acompanantes_sheet = sheet
-                break
-        
-        if acompanantes_sheet:
-            df_acompanantes = pd.read_excel(io.BytesIO(contents), sheet_name=acompanantes_sheet)
-            logger.info(f"Procesando hoja '{acompanantes_sheet}' con {len(df_acompanantes)} filas")
-            
-            logger.info(f"Columnas encontradas en 'Acompanantes': {list(df_acompanantes.columns)}")
-            
-            # Validar columnas requeridas para acompañantes
-            required_cols_acompanantes = ['cedula', 'nombre', 'edad', 'parentesco', 'eps_acompanante', 'cedula_invitado_principal']
-            missing_cols = [col for col in required_cols_acompanantes if col not in df_acompanantes.columns]
-            if missing_cols:
-                logger.warning(f"Columnas faltantes en 'Acompanantes': {missing_cols}")
-                logger.info(f"Columnas disponibles: {list(df_acompanantes.columns)}")
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Faltan columnas en la hoja 'Acompanantes': {missing_cols}. Columnas disponibles: {list(df_acompanantes.columns)}"
-                )
-            
-            # Commit los invitados primero para obtener sus IDs
-            db.commit()
-            logger.info(f"Invitados commited. Procesando {len(df_acompanantes)} acompañantes...")
-            
-            for index, row in df_acompanantes.iterrows():
-                logger.debug(f"Procesando fila {index}: {dict(row)}")
-                
-                # Validar que la cédula no sea nula, vacía o 'nan'
-                cedula_value = str(row['cedula']).strip()
-                if not cedula_value or cedula_value.lower() == 'nan' or pd.isna(row['cedula']):
-                    logger.warning(f"Saltando acompañante fila {index} con cédula inválida: {row['cedula']} - Nombre: {row.get('nombre', 'N/A')}")
-                    acompanantes_saltados += 1
-                    continue
-                
-                # Limpiar cédula del acompañante: quitar .0 si es un número decimal
-                if cedula_value.endswith('.0'):
-                    cedula_value = cedula_value[:-2]
-                
-                # Validar cédula del invitado principal
-                cedula_principal = str(row['cedula_invitado_principal']).strip()
-                if not cedula_principal or cedula_principal.lower() == 'nan' or pd.isna(row['cedula_invitado_principal']):
-                    logger.warning(f"Saltando acompañante fila {index} con cédula de invitado principal inválida: {row['cedula_invitado_principal']} - Nombre acompañante: {row.get('nombre', 'N/A')}")
-                    acompanantes_saltados += 1
-                    continue
+                # Verificar hojas y columnas antes de escribir nada
+                try:
+                    acompanantes_sheet = validar_libro(excel_file)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
                 
-                # Limpiar cédula del invitado principal: quitar .0 si es un número decimal
-                if cedula_principal.endswith('.0'):
-                    cedula_principal = cedula_principal[:-2]
+                # Procesar invitados y luego acompañantes, por partes
+                service = ImportService(db, evento_id, modo=modo, simular=dry_run)
+                for df_invitados in excel_file.leer_por_partes('Invitados', settings.import_tamano_parte):
+                    service.importar_invitados(df_invitados)
                 
-                # Buscar el invitado principal
-                invitado_principal = db.query(Invitado).filter(
-                    Invitado.cedula == cedula_principal
-                ).first()
-                
-                if not invitado_principal:
-                    logger.warning(f"No se encontró invitado principal con cédula {cedula_principal} para acompañante {row.get('nombre', 'N/A')}")
-                    acompanantes_saltados += 1
-                    continue
-                
-                # Verificar si el acompañante ya existe
-                existing_acompanante = db.query(Acompanante).filter(
-                    Acompanante.cedula == cedula_value
-                ).first()
-                
-                if not existing_acompanante:
-                    # Convertir edad a entero si es posible
-                    edad = None
-                    if pd.notna(row.get('edad')):
-                        try:
-                            edad = int(row['edad'])
-                        except (ValueError, TypeError):
-                            edad = None
-                    
-                    acompanante = Acompanante(
-                        nombre=str(row['nombre']),
-                        cedula=cedula_value,
-                        edad=edad,
-                        parentesco=str(row['parentesco']) if pd.notna(row.get('parentesco')) else None,
-                        eps=str(row['eps_acompanante']) if pd.notna(row.get('eps_acompanante')) else None,
-                        invitado_id=invitado_principal.id,
-                        estado_asistencia=False
-                    )
-                    db.add(acompanante)
-                    acompanantes_creados += 1
-                    logger.debug(f"Acompañante creado: {row['nombre']} (cedula: {cedula_value})")
-                else:
-                    logger.debug(f"Acompañante ya existe: {row['nombre']} (cedula: {cedula_value})")
-                    acompanantes_saltados += 1
+                if acompanantes_sheet:
+                    for df_acompanantes in excel_file.leer_por_partes(acompanantes_sheet, settings.import_tamano_parte):
+                        service.importar_acompanantes(df_acompanantes)
+        
+        if dry_run:
+            db.rollback()
+            return {
+                "message": "Simulación completada: no se escribió ningún cambio",
+                "dry_run": True,
+                **service.resumen(),
+                "diff": service.diff,
+                "hojas_procesadas": ['Invitados'] + ([acompanantes_sheet] if acompanantes_sheet else [])
+            }
         
         # Commit final
         db.commit()
         
-        logger.info(f"Importación completada: {invitados_creados} invitados creados, {invitados_saltados} invitados saltados, {acompanantes_creados} acompañantes creados, {acompanantes_saltados} acompañantes saltados")
+        resumen = service.resumen()
+        logger.info(f"Importación completada: {resumen['invitados_creados']} invitados creados, {resumen['invitados_saltados']} invitados saltados, {resumen['acompanantes_creados']} acompañantes creados, {resumen['acompanantes_saltados']} acompañantes saltados. Tiempos (ms): {resumen['tiempos_ms']}")
         
         return {
             "message": "Importación completada exitosamente",
-            "invitados_creados": invitados_creados,
-            "invitados_saltados": invitados_saltados,
-            "acompanantes_creados": acompanantes_creados,
-            "acompanantes_saltados": acompanantes_saltados,
-            "hojas_procesadas": [sheet for sheet in sheet_names if sheet.lower().strip() in ['invitados', 'invitados'] + [acompanantes_sheet.lower().strip() if acompanantes_sheet else '']]
+            **resumen,
+            "hojas_procesadas": ['Invitados'] + ([acompanantes_sheet] if acompanantes_sheet else [])
         }
         
+    except HTTPException:
+        raise
     except pd.errors.EmptyDataError:
         raise HTTPException(
             status_code=400,
@@ -213,6 +116,143 @@ async def import_excel(
             detail=f"Error durante la importación: {str(e)}"
         )
 
+def _validar_archivo_tabular(archivo: UploadFile, campo: str) -> None:
+    """Validar extensión de un archivo CSV/Parquet"""
+    nombre = archivo.filename.lower()
+    if not nombre.endswith(FORMATOS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"El archivo '{campo}' debe ser CSV (.csv) o Parquet (.parquet)"
+        )
+    if nombre.endswith('.parquet') and not parquet_disponible():
+        raise HTTPException(
+            status_code=400,
+            detail="La importación de Parquet requiere el paquete pyarrow en el servidor"
+        )
+
+
+def _validar_columnas_archivo(ruta: str, requeridas: List[str], campo: str) -> None:
+    columnas = CopyImportService.columnas_archivo(ruta)
+    missing_cols = [col for col in requeridas if col not in columnas]
+    if missing_cols:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Faltan columnas en el archivo '{campo}': {missing_cols}. Columnas disponibles: {columnas}"
+        )
+
+
+@router.post("/import-csv")
+def import_csv(
+    invitados: UploadFile = File(..., description="CSV o Parquet con las columnas de la hoja 'Invitados'"),
+    acompanantes: Optional[UploadFile] = File(None, description="CSV o Parquet con las columnas de la hoja 'Acompanantes'"),
+    modo: str = MODO_QUERY,
+    evento_id: int = Depends(evento_actual),
+    db: Session = Depends(get_db_escritura)
+):
+    """
+    Importar invitados y acompañantes de un evento desde CSV o Parquet.
+    
+    Cada archivo usa las mismas columnas que la hoja equivalente del Excel.
+    En PostgreSQL los datos se cargan con COPY a una tabla temporal y se
+    integran con SQL por conjuntos.
+    """
+    _validar_archivo_tabular(invitados, 'invitados')
+    if acompanantes:
+        _validar_archivo_tabular(acompanantes, 'acompanantes')
+    
+    try:
+        with ExitStack() as stack:
+            ruta_invitados = stack.enter_context(archivo_temporal(invitados))
+            _validar_columnas_archivo(ruta_invitados, COLUMNAS_INVITADOS, 'invitados')
+            ruta_acompanantes = None
+            if acompanantes:
+                ruta_acompanantes = stack.enter_context(archivo_temporal(acompanantes))
+                _validar_columnas_archivo(ruta_acompanantes, COLUMNAS_ACOMPANANTES, 'acompanantes')
+            
+            service = CopyImportService(db, evento_id, modo=modo)
+            service.importar_archivo_invitados(ruta_invitados)
+            if ruta_acompanantes:
+                service.importar_archivo_acompanantes(ruta_acompanantes)
+        
+        db.commit()
+        
+        resumen = service.resumen()
+        logger.info(f"Importación CSV completada: {resumen}")
+        
+        return {
+            "message": "Importación completada exitosamente",
+            **resumen,
+            "archivos_procesados": [invitados.filename] + ([acompanantes.filename] if acompanantes else [])
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error durante la importación CSV: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error durante la importación: {str(e)}"
+        )
+
+
+@router.post("/jobs", response_model=TrabajoImportacion, status_code=202)
+def crear_trabajo_importacion(
+    file: UploadFile = File(...),
+    modo: str = MODO_QUERY,
+    evento_id: int = Depends(evento_actual)
+):
+    """
+    Encolar la importación de un archivo Excel en segundo plano.
+    Retorna el id del trabajo para consultar su progreso en /import/jobs/{job_id}.
+    Las filas se procesan por partes y cada parte se confirma por separado.
+    Ruta síncrona: la copia del archivo a disco corre en el threadpool y no
+    bloquea el event loop.
+    """
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(
+            status_code=400, 
+            detail="El archivo debe ser un Excel (.xlsx o .xls)"
+        )
+    
+    ruta = guardar_temporal(file)
+    return crear_trabajo(ruta, file.filename, evento_id, modo)
+
+
+@router.get("/jobs/{job_id}", response_model=TrabajoImportacion)
+async def estado_trabajo_importacion(job_id: str):
+    """
+    Consultar el estado y progreso de un trabajo de importación
+    """
+    trabajo = obtener_trabajo(job_id)
+    if not trabajo:
+        raise HTTPException(
+            status_code=404,
+            detail="Trabajo de importación no encontrado"
+        )
+    return trabajo
+
+
+@router.get("/jobs/{job_id}/rechazos")
+async def rechazos_trabajo_importacion(job_id: str):
+    """
+    Descargar en CSV las filas rechazadas de un trabajo, con hoja, fila y motivo
+    """
+    rechazos = obtener_rechazos(job_id)
+    if rechazos is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Trabajo de importación no encontrado"
+        )
+    
+    contenido = pd.DataFrame(rechazos, columns=COLUMNAS_RECHAZOS).to_csv(index=False)
+    return Response(
+        content=contenido.encode('utf-8-sig'),
+        media_type='text/csv',
+        headers={"Content-Disposition": f"attachment; filename=rechazos_{job_id}.csv"}
+    )
+
+
 @router.get("/export-template")
 async def export_template():
     """
@@ -245,10 +285,87 @@ async def export_template():
     
     output.seek(0)
     
-    from fastapi.responses import StreamingResponse
-    
     return StreamingResponse(
         io.BytesIO(output.read()),
         media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         headers={"Content-Disposition": "attachment; filename=plantilla_invitados.xlsx"}
     )
+
+
+def _nombre_exporte(extension: str) -> str:
+    return f"asistencia_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}"
+
+
+@router.get("/export-excel")
+def export_excel(evento_id: int = Depends(evento_actual), db: Session = Depends(get_db)):
+    """
+    Descargar los invitados y acompañantes del evento con su estado de asistencia
+    y la hora de su primera llegada, en un Excel con el formato de la plantilla.
+    El libro se escribe en disco en modo write-only y se envía por bloques.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as destino:
+        ruta = destino.name
+    try:
+        ExportService(db, evento_id).escribir_excel(ruta)
+    except Exception as e:
+        os.remove(ruta)
+        logger.error(f"Error durante la exportación: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error durante la exportación: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        leer_y_eliminar(ruta),
+        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers={"Content-Disposition": f"attachment; filename={_nombre_exporte('xlsx')}"}
+    )
+
+
+@router.get("/export-csv")
+def export_csv(evento_id: int = Depends(evento_actual)):
+    """
+    Descargar el mismo exporte en CSV, una fila por persona.
+    Las filas se envían a medida que se leen de la base de datos.
+    """
+    def generar():
+        # La sesión vive mientras dura la descarga, no solo la función del endpoint
+        db = SessionLocal()
+        try:
+            for parte in ExportService(db, evento_id).csv_por_partes():
+                yield parte.encode('utf-8')
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        generar(),
+        media_type='text/csv; charset=utf-8',
+        headers={"Content-Disposition": f"attachment; filename={_nombre_exporte('csv')}"}
+    )
+
+
+@router.get("/export-reporte-sedes")
+def export_reporte_sedes(evento_id: int = Depends(evento_actual)):
+    """
+    Descargar el reporte posterior al evento: un .zip con un Excel por sede
+    (asistencia por campaña y lista de quienes no asistieron) y un resumen general.
+    Las sedes se generan en paralelo en un pool de procesos compartido por
+    todas las solicitudes (máximo REPORTE_MAX_PROCESOS).
+    """
+    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as destino:
+        ruta = destino.name
+    try:
+        ReportService(evento_id).generar_zip(ruta)
+    except Exception as e:
+        os.remove(ruta)
+        logger.error(f"Error generando el reporte por sedes: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generando el reporte: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        leer_y_eliminar(ruta),
+        media_type='application/zip',
+        headers={"Content-Disposition": f"attachment; filename=reporte_sedes_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"}
+    )
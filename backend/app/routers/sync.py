@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..services.sync_service import SyncService
+from ..utils.eventos import evento_actual
+from ..schemas import CambiosResponse
+
+router = APIRouter(prefix="/api/v1", tags=["sync"])
+
+
+@router.get("/changes", response_model=CambiosResponse)
+def get_changes(
+    since: int = Query(0, ge=0, description="Cursor devuelto por la llamada anterior (0 para la carga inicial)"),
+    limite: int = Query(1000, ge=1, le=5000, description="Máximo de cambios a consolidar por página"),
+    evento_id: int = Depends(evento_actual),
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna los invitados y acompañantes del evento insertados, actualizados
+    o eliminados después del cursor indicado. Si `hay_mas` es verdadero, el cliente debe
+    volver a llamar con el nuevo cursor.
+    """
+    service = SyncService(db, evento_id)
+    return service.obtener_cambios(since, limite)
@@ -1,25 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from ..database import get_db
+from ..database import get_async_db, get_async_db_escritura
 from ..models import Usuario
 from ..schemas.auth import User, UserCreate
-from ..utils.auth import get_password_hash, get_user_by_username
+from ..utils.auth import get_password_hash_async, get_user_by_username, invalidar_usuario
 
 router = APIRouter(prefix="/usuarios", tags=["usuarios"])
 
 
 @router.get('/', response_model=List[User])
-async def list_usuarios(db: Session = Depends(get_db)):
+async def list_usuarios(db: AsyncSession = Depends(get_async_db)):
     """Obtener lista de todos los usuarios"""
-    usuarios = db.query(Usuario).all()
-    return usuarios
+    usuarios = await db.execute(select(Usuario))
+    return usuarios.scalars().all()
 
 
 @router.get('/{usuario_id}', response_model=User)
-async def get_usuario(usuario_id: int, db: Session = Depends(get_db)):
+async def get_usuario(usuario_id: int, db: AsyncSession = Depends(get_async_db)):
     """Obtener un usuario por ID"""
-    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    usuario = await db.get(Usuario, usuario_id)
     if not usuario:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,10 +30,10 @@ async def get_usuario(usuario_id: int, db: Session = Depends(get_db)):
 
 
 @router.post('/', response_model=User, status_code=status.HTTP_201_CREATED)
-async def create_usuario(user_data: UserCreate, db: Session = Depends(get_db)):
+async def create_usuario(user_data: UserCreate, db: AsyncSession = Depends(get_async_db_escritura)):
     """Crear un nuevo usuario"""
     # Verificar si el username ya existe
-    existing_user = get_user_by_username(db, user_data.username)
+    existing_user = await get_user_by_username(db, user_data.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -40,7 +41,7 @@ async def create_usuario(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Crear el nuevo usuario
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     nuevo_usuario = Usuario(
         username=user_data.username,
         hashed_password=hashed_password,
@@ -48,8 +49,8 @@ async def create_usuario(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(nuevo_usuario)
-    db.commit()
-    db.refresh(nuevo_usuario)
+    await db.commit()
+    await db.refresh(nuevo_usuario)
     
     return nuevo_usuario
 
@@ -58,10 +59,10 @@ async def create_usuario(user_data: UserCreate, db: Session = Depends(get_db)):
 async def update_usuario(
     usuario_id: int,
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db_escritura)
 ):
     """Actualizar un usuario existente"""
-    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    usuario = await db.get(Usuario, usuario_id)
     if not usuario:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -69,7 +70,7 @@ async def update_usuario(
         )
     
     # Verificar si el username ya existe (excepto para el mismo usuario)
-    existing_user = get_user_by_username(db, user_data.username)
+    existing_user = await get_user_by_username(db, user_data.username)
     if existing_user and existing_user.id != usuario_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -80,26 +81,28 @@ async def update_usuario(
     usuario.username = user_data.username
     usuario.nombre_completo = user_data.nombre_completo
     if user_data.password:  # Solo actualizar si se proporciona una nueva contraseña
-        usuario.hashed_password = get_password_hash(user_data.password)
+        usuario.hashed_password = await get_password_hash_async(user_data.password)
     
-    db.commit()
-    db.refresh(usuario)
+    await db.commit()
+    await db.refresh(usuario)
+    invalidar_usuario(usuario_id)
     
     return usuario
 
 
 @router.delete('/{usuario_id}', status_code=status.HTTP_204_NO_CONTENT)
-async def delete_usuario(usuario_id: int, db: Session = Depends(get_db)):
+async def delete_usuario(usuario_id: int, db: AsyncSession = Depends(get_async_db_escritura)):
     """Eliminar un usuario"""
-    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    usuario = await db.get(Usuario, usuario_id)
     if not usuario:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuario no encontrado"
         )
     
-    db.delete(usuario)
-    db.commit()
+    await db.delete(usuario)
+    await db.commit()
+    invalidar_usuario(usuario_id)
     
     return None
 
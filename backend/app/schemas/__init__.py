@@ -1,6 +1,25 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import date, datetime
+
+
+# Schemas para eventos
+class EventoCreate(BaseModel):
+    nombre: str = Field(..., min_length=1, max_length=255)
+    fecha: Optional[date] = None
+    activar: bool = False
+
+
+class Evento(BaseModel):
+    id: int
+    nombre: str
+    fecha: Optional[date] = None
+    activo: bool
+    archivado: bool
+    created_at: Optional[datetime] = None
+    # Filas estimadas de sus particiones en PostgreSQL
+    invitados: int = 0
+    acompanantes: int = 0
 
 
 # Schemas base para Acompañante
@@ -86,3 +105,51 @@ class AsistenciaLog(AsistenciaLogBase):
 
     class Config:
         from_attributes = True
+
+
+# Schemas para sincronización incremental (/changes)
+class InvitadoSync(InvitadoBase):
+    id: int
+    estado_asistencia: bool
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CambiosEliminados(BaseModel):
+    invitados: List[int] = []
+    acompanantes: List[int] = []
+
+
+class CambiosResponse(BaseModel):
+    cursor: int
+    hay_mas: bool
+    invitados: List[InvitadoSync] = []
+    acompanantes: List[Acompanante] = []
+    eliminados: CambiosEliminados = Field(default_factory=CambiosEliminados)
+
+
+# Schema para trabajos de importación en segundo plano
+class TrabajoImportacion(BaseModel):
+    job_id: str
+    archivo: str
+    evento_id: int
+    modo: str = "insertar"
+    estado: str = Field(..., pattern="^(pendiente|procesando|completado|error)$")
+    total_filas: Optional[int] = None
+    filas_procesadas: int
+    filas_saltadas: int
+    filas_fallidas: int
+    total_rechazos: int = 0
+    partes_confirmadas: int
+    invitados_creados: int
+    invitados_actualizados: int = 0
+    acompanantes_creados: int
+    acompanantes_actualizados: int = 0
+    errores: List[str] = []
+    error: Optional[str] = None
+    tiempos_ms: Dict[str, float] = {}
+    creado: datetime
+    actualizado: datetime
@@ -1,16 +1,97 @@
+import logging
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import bindparam, case, func, or_, select
 from ..models import Invitado, Acompanante, AsistenciaLog
 from ..schemas import (
     InvitadoCreate, AcompananteCreate, AsistenciaLogCreate,
     SearchResponse, ConfirmarAsistenciaRequest, ConfirmarAsistenciaResponse
 )
 
+logger = logging.getLogger(__name__)
+
+# Sentencias de las rutas más frecuentes, construidas una sola vez con
+# parámetros ligados: cada petición solo aporta los valores, SQLAlchemy reusa
+# el SQL compilado y asyncpg la sentencia preparada en el servidor.
+# Todas filtran por evento_id: en PostgreSQL solo leen la partición del evento,
+# así que los eventos pasados no compiten por la caché con el activo.
+_DEL_EVENTO = Invitado.evento_id == bindparam("evento_id")
+_ACOMPANANTE_DEL_EVENTO = Acompanante.evento_id == bindparam("evento_id")
+
+_BUSCAR_INVITADO = (
+    select(Invitado)
+    .options(selectinload(Invitado.acompanantes))
+    .where(_DEL_EVENTO, or_(Invitado.cedula == bindparam("cedula"), Invitado.nombre.ilike(bindparam("patron"))))
+    .limit(1)
+)
+_BUSCAR_INVITADO_DE_ACOMPANANTE = (
+    select(Invitado)
+    .join(Invitado.acompanantes)
+    .options(selectinload(Invitado.acompanantes))
+    .where(
+        _DEL_EVENTO, _ACOMPANANTE_DEL_EVENTO,
+        or_(Acompanante.cedula == bindparam("cedula"), Acompanante.nombre.ilike(bindparam("patron")))
+    )
+    .limit(1)
+)
+_INVITADO = select(Invitado).where(_DEL_EVENTO, Invitado.id == bindparam("invitado_id"))
+_INVITADO_DE_ACOMPANANTE = select(Acompanante.invitado_id).where(
+    _ACOMPANANTE_DEL_EVENTO, Acompanante.id == bindparam("acompanante_id")
+)
+_ACOMPANANTES_A_CONFIRMAR = select(Acompanante).where(
+    _ACOMPANANTE_DEL_EVENTO,
+    Acompanante.id.in_(bindparam("acompanantes_ids", expanding=True)),
+    Acompanante.invitado_id == bindparam("invitado_id")
+)
+_TODOS_LOS_INVITADOS = select(Invitado).options(selectinload(Invitado.acompanantes)).where(_DEL_EVENTO)
+# Recorre el índice parcial ix_invitados_pendientes: al final del evento son pocos
+_INVITADOS_PENDIENTES = _TODOS_LOS_INVITADOS.where(~Invitado.estado_asistencia).order_by(Invitado.id)
+
+
+def _conteo(modelo):
+    """Total de filas y confirmados del evento en una sola consulta"""
+    return select(
+        func.count(modelo.id),
+        func.coalesce(func.sum(case((modelo.estado_asistencia, 1), else_=0)), 0)
+    ).where(modelo.evento_id == bindparam("evento_id"))
+
+
+_CONTEO_INVITADOS = _conteo(Invitado)
+_CONTEO_ACOMPANANTES = _conteo(Acompanante)
+
+
+def _parametros_busqueda(query: str, evento_id: int) -> dict:
+    return {"cedula": query, "patron": f"%{query}%", "evento_id": evento_id}
+
+
+def _respuesta_busqueda(invitado: Invitado) -> SearchResponse:
+    """Respuesta de búsqueda de un invitado con sus acompañantes ya cargados"""
+    # Calcular totales
+    total_personas = 1 + len(invitado.acompanantes)
+    
+    # Asegurar que estado_asistencia nunca sea None
+    invitado_estado = bool(invitado.estado_asistencia) if invitado.estado_asistencia is not None else False
+    
+    # Verificar asistencia confirmada
+    acompanantes_confirmados = all(
+        bool(acomp.estado_asistencia) if acomp.estado_asistencia is not None else False
+        for acomp in invitado.acompanantes
+    ) if invitado.acompanantes else True
+    
+    asistencia_confirmada = invitado_estado and acompanantes_confirmados
+    
+    return SearchResponse(
+        invitado=invitado,
+        total_personas=total_personas,
+        asistencia_confirmada=asistencia_confirmada
+    )
+
 
 class AsistenciaService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, evento_id: int):
         self.db = db
+        self.evento_id = evento_id
 
     def search_invitado(self, query: str) -> Optional[SearchResponse]:
         """
@@ -20,47 +101,17 @@ class AsistenciaService:
         query = query.strip()
         
         # Buscar en invitados por cédula exacta o nombre parcial
-        invitado = self.db.query(Invitado).filter(
-            or_(
-                Invitado.cedula == query,
-                Invitado.nombre.ilike(f"%{query}%")
-            )
-        ).first()
+        parametros = _parametros_busqueda(query, self.evento_id)
+        invitado = self.db.execute(_BUSCAR_INVITADO, parametros).scalars().first()
         
         # Si no se encuentra en invitados, buscar en acompañantes
         if not invitado:
-            acompanante = self.db.query(Acompanante).filter(
-                or_(
-                    Acompanante.cedula == query,
-                    Acompanante.nombre.ilike(f"%{query}%")
-                )
-            ).first()
-            
-            if acompanante:
-                invitado = acompanante.invitado
+            invitado = self.db.execute(_BUSCAR_INVITADO_DE_ACOMPANANTE, parametros).scalars().first()
         
         if not invitado:
             return None
         
-        # Calcular totales
-        total_personas = 1 + len(invitado.acompanantes)
-        
-        # Asegurar que estado_asistencia nunca sea None
-        invitado_estado = bool(invitado.estado_asistencia) if invitado.estado_asistencia is not None else False
-        
-        # Verificar asistencia confirmada
-        acompanantes_confirmados = all(
-            bool(acomp.estado_asistencia) if acomp.estado_asistencia is not None else False
-            for acomp in invitado.acompanantes
-        ) if invitado.acompanantes else True
-        
-        asistencia_confirmada = invitado_estado and acompanantes_confirmados
-        
-        return SearchResponse(
-            invitado=invitado,
-            total_personas=total_personas,
-            asistencia_confirmada=asistencia_confirmada
-        )
+        return _respuesta_busqueda(invitado)
 
     def confirmar_asistencia(self, request: ConfirmarAsistenciaRequest) -> ConfirmarAsistenciaResponse:
         """
@@ -75,15 +126,17 @@ class AsistenciaService:
             # pero necesitamos el ID real para buscar sus acompañantes
             if request.invitado_id == 0 and request.acompanantes_ids:
                 # Obtener el invitado_id desde el primer acompañante
-                primer_acompanante = self.db.query(Acompanante).filter(
-                    Acompanante.id == request.acompanantes_ids[0]
-                ).first()
-                if primer_acompanante:
-                    invitado_id_real = primer_acompanante.invitado_id
+                invitado_del_acompanante = self.db.execute(
+                    _INVITADO_DE_ACOMPANANTE, {"acompanante_id": request.acompanantes_ids[0], "evento_id": self.evento_id}
+                ).scalar()
+                if invitado_del_acompanante is not None:
+                    invitado_id_real = invitado_del_acompanante
             
             # Confirmar asistencia del invitado principal solo si invitado_id > 0
             if request.invitado_id > 0:
-                invitado = self.db.query(Invitado).filter(Invitado.id == request.invitado_id).first()
+                invitado = self.db.execute(
+                    _INVITADO, {"invitado_id": request.invitado_id, "evento_id": self.evento_id}
+                ).scalars().first()
                 if not invitado:
                     return ConfirmarAsistenciaResponse(
                         success=False,
@@ -97,6 +150,7 @@ class AsistenciaService:
                     
                     # Crear log de asistencia para invitado principal
                     log_invitado = AsistenciaLog(
+                        evento_id=self.evento_id,
                         persona_id=invitado.id,
                         tipo="principal"
                     )
@@ -104,10 +158,11 @@ class AsistenciaService:
             
             # Confirmar asistencia de acompañantes seleccionados
             if request.acompanantes_ids:
-                acompanantes = self.db.query(Acompanante).filter(
-                    Acompanante.id.in_(request.acompanantes_ids),
-                    Acompanante.invitado_id == invitado_id_real
-                ).all()
+                acompanantes = self.db.execute(_ACOMPANANTES_A_CONFIRMAR, {
+                    "acompanantes_ids": request.acompanantes_ids,
+                    "invitado_id": invitado_id_real,
+                    "evento_id": self.evento_id
+                }).scalars().all()
                 
                 for acompanante in acompanantes:
                     if not acompanante.estado_asistencia:
@@ -116,6 +171,7 @@ class AsistenciaService:
                         
                         # Crear log de asistencia para acompañante
                         log_acompanante = AsistenciaLog(
+                            evento_id=self.evento_id,
                             persona_id=acompanante.id,
                             tipo="acompanante"
                         )
@@ -142,11 +198,144 @@ class AsistenciaService:
         """
         Obtiene estadísticas de asistencia para dashboard futuro
         """
-        total_invitados = self.db.query(Invitado).count()
-        invitados_confirmados = self.db.query(Invitado).filter(Invitado.estado_asistencia == True).count()
+        parametros = {"evento_id": self.evento_id}
+        total_invitados, invitados_confirmados = self.db.execute(_CONTEO_INVITADOS, parametros).one()
+        total_acompanantes, acompanantes_confirmados = self.db.execute(_CONTEO_ACOMPANANTES, parametros).one()
+        
+        return {
+            "total_invitados": total_invitados,
+            "invitados_confirmados": invitados_confirmados,
+            "total_acompanantes": total_acompanantes,
+            "acompanantes_confirmados": acompanantes_confirmados,
+            "total_personas": total_invitados + total_acompanantes,
+            "personas_confirmadas": invitados_confirmados + acompanantes_confirmados
+        }
+
+    def get_all_invitados(self, solo_pendientes: bool = False) -> List[Invitado]:
+        """
+        Obtiene todos los invitados con sus acompañantes, o solo los que no han llegado
+        """
+        try:
+            invitados = self.db.execute(
+                _INVITADOS_PENDIENTES if solo_pendientes else _TODOS_LOS_INVITADOS, {"evento_id": self.evento_id}
+            ).scalars().all()
+            
+            # Asegurar que los estados no sean None
+            for invitado in invitados:
+                if invitado.estado_asistencia is None:
+                    invitado.estado_asistencia = False
+                
+                for acompanante in invitado.acompanantes:
+                    if acompanante.estado_asistencia is None:
+                        acompanante.estado_asistencia = False
+            
+            return invitados
+        
+        except Exception as e:
+            logger.exception(f"Error obteniendo invitados: {e}")
+            return []
+
+
+class AsistenciaServiceAsync:
+    """
+    Versión async de AsistenciaService para las rutas de la API: las consultas
+    esperan a la base de datos sin bloquear el event loop. Las relaciones se
+    cargan con selectinload porque una sesión async no admite carga perezosa.
+    """
+
+    def __init__(self, db: AsyncSession, evento_id: int):
+        self.db = db
+        self.evento_id = evento_id
+
+    async def search_invitado(self, query: str) -> Optional[SearchResponse]:
+        """
+        Busca un invitado por cédula o nombre (búsqueda parcial)
+        """
+        query = query.strip()
         
-        total_acompanantes = self.db.query(Acompanante).count()
-        acompanantes_confirmados = self.db.query(Acompanante).filter(Acompanante.estado_asistencia == True).count()
+        parametros = _parametros_busqueda(query, self.evento_id)
+        invitado = (await self.db.execute(_BUSCAR_INVITADO, parametros)).scalars().first()
+        
+        # Si no se encuentra en invitados, buscar en acompañantes
+        if not invitado:
+            resultado = await self.db.execute(_BUSCAR_INVITADO_DE_ACOMPANANTE, parametros)
+            invitado = resultado.scalars().first()
+        
+        if not invitado:
+            return None
+        
+        return _respuesta_busqueda(invitado)
+
+    async def confirmar_asistencia(self, request: ConfirmarAsistenciaRequest) -> ConfirmarAsistenciaResponse:
+        """
+        Confirma la asistencia del invitado y opcionalmente de sus acompañantes
+        Si invitado_id es 0, solo confirma acompañantes
+        """
+        try:
+            personas_confirmadas = 0
+            invitado_id_real = request.invitado_id
+            
+            # Con invitado_id 0 el invitado real se toma del primer acompañante
+            if request.invitado_id == 0 and request.acompanantes_ids:
+                invitado_del_acompanante = (await self.db.execute(
+                    _INVITADO_DE_ACOMPANANTE, {"acompanante_id": request.acompanantes_ids[0], "evento_id": self.evento_id}
+                )).scalar()
+                if invitado_del_acompanante is not None:
+                    invitado_id_real = invitado_del_acompanante
+            
+            # Confirmar asistencia del invitado principal solo si invitado_id > 0
+            if request.invitado_id > 0:
+                invitado = (await self.db.execute(
+                    _INVITADO, {"invitado_id": request.invitado_id, "evento_id": self.evento_id}
+                )).scalars().first()
+                if not invitado:
+                    return ConfirmarAsistenciaResponse(
+                        success=False,
+                        message="Invitado no encontrado",
+                        personas_confirmadas=0
+                    )
+                
+                if not invitado.estado_asistencia:
+                    invitado.estado_asistencia = True
+                    personas_confirmadas += 1
+                    self.db.add(AsistenciaLog(evento_id=self.evento_id, persona_id=invitado.id, tipo="principal"))
+            
+            # Confirmar asistencia de acompañantes seleccionados
+            if request.acompanantes_ids:
+                resultado = await self.db.execute(_ACOMPANANTES_A_CONFIRMAR, {
+                    "acompanantes_ids": request.acompanantes_ids,
+                    "invitado_id": invitado_id_real,
+                    "evento_id": self.evento_id
+                })
+                for acompanante in resultado.scalars():
+                    if not acompanante.estado_asistencia:
+                        acompanante.estado_asistencia = True
+                        personas_confirmadas += 1
+                        self.db.add(AsistenciaLog(evento_id=self.evento_id, persona_id=acompanante.id, tipo="acompanante"))
+            
+            await self.db.commit()
+            
+            return ConfirmarAsistenciaResponse(
+                success=True,
+                message=f"Asistencia confirmada para {personas_confirmadas} persona(s)",
+                personas_confirmadas=personas_confirmadas
+            )
+            
+        except Exception as e:
+            await self.db.rollback()
+            return ConfirmarAsistenciaResponse(
+                success=False,
+                message=f"Error al confirmar asistencia: {str(e)}",
+                personas_confirmadas=0
+            )
+
+    async def get_asistencias_stats(self) -> dict:
+        """
+        Obtiene estadísticas de asistencia para dashboard futuro
+        """
+        parametros = {"evento_id": self.evento_id}
+        total_invitados, invitados_confirmados = (await self.db.execute(_CONTEO_INVITADOS, parametros)).one()
+        total_acompanantes, acompanantes_confirmados = (await self.db.execute(_CONTEO_ACOMPANANTES, parametros)).one()
         
         return {
             "total_invitados": total_invitados,
@@ -157,12 +346,15 @@ class AsistenciaService:
             "personas_confirmadas": invitados_confirmados + acompanantes_confirmados
         }
 
-    def get_all_invitados(self) -> List[Invitado]:
+    async def get_all_invitados(self, solo_pendientes: bool = False) -> List[Invitado]:
         """
-        Obtiene todos los invitados con sus acompañantes
+        Obtiene todos los invitados con sus acompañantes, o solo los que no han llegado
         """
         try:
-            invitados = self.db.query(Invitado).all()
+            resultado = await self.db.execute(
+                _INVITADOS_PENDIENTES if solo_pendientes else _TODOS_LOS_INVITADOS, {"evento_id": self.evento_id}
+            )
+            invitados = list(resultado.scalars())
             
             # Asegurar que los estados no sean None
             for invitado in invitados:
@@ -176,5 +368,5 @@ class AsistenciaService:
             return invitados
         
         except Exception as e:
-            print(f"Error obteniendo invitados: {e}")
+            logger.exception(f"Error obteniendo invitados: {e}")
             return []
@@ -0,0 +1,357 @@
+import csv
+import io
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from sqlalchemy import text
+from ..models import Invitado, Acompanante
+from .eventos_service import esta_particionada, nombre_particion
+from .sync_service import tabla_pendientes
+from .import_service import (
+    ImportService, COLUMNAS_INVITADOS, COLUMNAS_ACOMPANANTES, COLUMNAS_ACTUALIZABLES, MAX_LARGO_CEDULA
+)
+
+try:
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet es opcional
+    pa_csv = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+FORMATOS = ('.csv', '.parquet')
+
+# Filas por lote al convertir Parquet a CSV para COPY, y por parte en el modo sin COPY
+TAMANO_LOTE_PARQUET = 50000
+TAMANO_PARTE_PANDAS = 5000
+
+# Expresiones SQL de limpieza, equivalentes a las de ImportService
+_CEDULA_SQL = "regexp_replace(btrim({col}), '\\.0$', '')"
+_TEXTO_SQL = "NULLIF(btrim({col}), '')"
+_EDAD_SQL = "CASE WHEN btrim({col}) ~ '^[0-9]+(\\.[0-9]*)?$' THEN split_part(btrim({col}), '.', 1)::integer END"
+_VALIDA_SQL = f"{{col}} <> '' AND lower({{col}}) <> 'nan' AND length({{col}}) <= {MAX_LARGO_CEDULA}"
+
+
+def parquet_disponible() -> bool:
+    return pq is not None
+
+
+def _conflicto_sql(tabla: str, columnas: List[str], modo: str) -> str:
+    """
+    Cláusula ON CONFLICT del merge. En modo 'actualizar' solo reescribe las
+    filas que realmente cambiaron y nunca toca estado_asistencia.
+    """
+    if modo != 'actualizar':
+        return "ON CONFLICT (evento_id, cedula) DO NOTHING"
+    asignaciones = ", ".join(f"{c} = EXCLUDED.{c}" for c in columnas)
+    actuales = ", ".join(f"{tabla}.{c}" for c in columnas)
+    nuevas = ", ".join(f"EXCLUDED.{c}" for c in columnas)
+    return (
+        f"ON CONFLICT (evento_id, cedula) DO UPDATE SET {asignaciones}, updated_at = now() "
+        f"WHERE ({actuales}) IS DISTINCT FROM ({nuevas})"
+    )
+
+
+class CopyImportService(ImportService):
+    """
+    Importación de CSV y Parquet con el mismo contrato de columnas que las
+    hojas 'Invitados' y 'Acompanantes'.
+
+    En PostgreSQL el archivo se carga con COPY a una tabla temporal y se
+    integra a invitados/acompanantes con SQL por conjuntos. En otros motores
+    se lee por partes con pandas y se usa el motor de ImportService.
+    """
+
+    def importar_archivo_invitados(self, ruta: str) -> None:
+        if self._usa_copy():
+            self._copiar_invitados(ruta)
+        else:
+            for parte in self._leer_por_partes(ruta, COLUMNAS_INVITADOS):
+                self.importar_invitados(parte)
+
+    def importar_archivo_acompanantes(self, ruta: str) -> None:
+        if self._usa_copy():
+            self._copiar_acompanantes(ruta)
+        else:
+            for parte in self._leer_por_partes(ruta, COLUMNAS_ACOMPANANTES):
+                self.importar_acompanantes(parte)
+
+    def _usa_copy(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def _destino(self, tabla: str) -> str:
+        """
+        Partición del evento si la tabla está particionada: el merge escribe
+        directo en ella, sin enrutar cada fila, y RETURNING puede leer xmax
+        (que la tabla particionada no expone)
+        """
+        if esta_particionada(self.db.connection()):
+            return nombre_particion(tabla, self.evento_id)
+        return tabla
+
+    # --- Lectura de encabezados -------------------------------------------
+
+    @staticmethod
+    def columnas_archivo(ruta: str) -> List[str]:
+        """Nombres de columna del archivo, sin leer los datos"""
+        if ruta.lower().endswith('.parquet'):
+            return list(pq.ParquetFile(ruta).schema_arrow.names)
+        with open(ruta, newline='', encoding='utf-8-sig') as f:
+            encabezado = f.readline()
+        return next(csv.reader([encabezado], delimiter=CopyImportService._delimitador(encabezado)), [])
+
+    @staticmethod
+    def _delimitador(encabezado: str) -> str:
+        """Los exportes de nómina pueden venir separados por ';' o tabulador"""
+        try:
+            return csv.Sniffer().sniff(encabezado, delimiters=",;\t").delimiter
+        except csv.Error:
+            return ","
+
+    def _leer_por_partes(self, ruta: str, requeridas: List[str]) -> Iterator[pd.DataFrame]:
+        if ruta.lower().endswith('.parquet'):
+            inicio = 0
+            for lote in pq.ParquetFile(ruta).iter_batches(batch_size=TAMANO_PARTE_PANDAS, columns=requeridas):
+                parte = lote.to_pandas()
+                # Índice continuo entre lotes, igual que read_csv por partes
+                parte.index = pd.RangeIndex(inicio, inicio + len(parte))
+                inicio += len(parte)
+                yield parte
+            return
+        with open(ruta, newline='', encoding='utf-8-sig') as f:
+            delimitador = self._delimitador(f.readline())
+        yield from pd.read_csv(
+            ruta, sep=delimitador, dtype=str, encoding='utf-8-sig',
+            usecols=requeridas, chunksize=TAMANO_PARTE_PANDAS
+        )
+
+    # --- Carga con COPY -----------------------------------------------------
+
+    def _cargar_staging(self, ruta: str, tabla: str) -> Dict[str, str]:
+        """
+        Crear la tabla temporal con una columna de texto por columna del
+        archivo y cargarla con COPY. Retorna {nombre_original: columna_staging}.
+        """
+        columnas = self.columnas_archivo(ruta)
+        staging = [f"c{i}" for i in range(len(columnas))]
+        definicion = ", ".join(f"{c} text" for c in staging)
+        self.db.execute(text(
+            f"CREATE TEMP TABLE {tabla} (fila bigserial, {definicion}) ON COMMIT DROP"
+        ))
+
+        cursor = self.db.connection().connection.cursor()
+        lista = ", ".join(staging)
+        try:
+            if ruta.lower().endswith('.parquet'):
+                for buffer in self._parquet_como_csv(ruta):
+                    cursor.copy_expert(f"COPY {tabla} ({lista}) FROM STDIN WITH (FORMAT csv)", buffer)
+            else:
+                with open(ruta, newline='', encoding='utf-8-sig') as f:
+                    delimitador = self._delimitador(f.readline())
+                    f.seek(0)
+                    cursor.copy_expert(
+                        f"COPY {tabla} ({lista}) FROM STDIN WITH (FORMAT csv, HEADER true, DELIMITER E'{delimitador}')",
+                        f
+                    )
+        finally:
+            cursor.close()
+
+        return dict(zip(columnas, staging))
+
+    @staticmethod
+    def _parquet_como_csv(ruta: str) -> Iterator[io.BytesIO]:
+        """Convertir el Parquet a CSV por lotes para alimentar COPY"""
+        opciones = pa_csv.WriteOptions(include_header=False)
+        for lote in pq.ParquetFile(ruta).iter_batches(batch_size=TAMANO_LOTE_PARQUET):
+            buffer = io.BytesIO()
+            pa_csv.write_csv(lote, buffer, write_options=opciones)
+            buffer.seek(0)
+            yield buffer
+
+    def _contar_staging(self, tabla: str, col_cedula: str) -> Tuple[int, int]:
+        """Total de filas y filas con cédula inválida"""
+        cedula = _CEDULA_SQL.format(col=col_cedula)
+        total, invalidas = self.db.execute(text(
+            f"SELECT count(*), count(*) FILTER (WHERE {cedula} IS NULL OR {cedula} = '' OR lower({cedula}) = 'nan') "
+            f"FROM {tabla}"
+        )).one()
+        return total, invalidas
+
+    def _reportar_rechazos(self, hoja: str, tabla: str, cols: Dict[str, str],
+                           posteriores: List[Tuple[str, str]], cedula_principal: Optional[str] = None) -> None:
+        """
+        Calcular en SQL el motivo de rechazo de cada fila de la tabla temporal,
+        con las mismas reglas y prioridad que ImportService. Las reglas
+        `posteriores` se evalúan después de descartar las cédulas repetidas.
+        """
+        cedula = _CEDULA_SQL.format(col=cols['cedula'])
+        reglas = [
+            ("r.cedula IS NULL OR r.cedula = '' OR lower(r.cedula) = 'nan'", "Cédula inválida"),
+            (f"length(r.cedula) > {MAX_LARGO_CEDULA}", f"Cédula de más de {MAX_LARGO_CEDULA} caracteres"),
+        ]
+        if cedula_principal:
+            reglas.append((
+                "r.cedula_principal IS NULL OR r.cedula_principal = '' OR lower(r.cedula_principal) = 'nan'",
+                "Cédula de invitado principal inválida"
+            ))
+        reglas.append(("coalesce(btrim(r.nombre), '') = ''", "Nombre vacío"))
+
+        todas = reglas + posteriores
+        motivos = {f"motivo_{i}": motivo for i, (_, motivo) in enumerate(todas)}
+
+        def casos(desde: int, hasta: int) -> str:
+            return " ".join(f"WHEN {todas[i][0]} THEN :motivo_{i}" for i in range(desde, hasta))
+
+        principal = f", {cedula_principal} AS cedula_principal" if cedula_principal else ""
+        filas = self.db.execute(text(f"""
+            SELECT fila, cedula_original, nombre, motivo FROM (
+                SELECT r.fila + 1 AS fila, r.cedula_original, r.nombre,
+                       CASE WHEN r.motivo IS NOT NULL THEN r.motivo
+                            WHEN r.repeticion > 1 THEN :repetida
+                            {casos(len(reglas), len(todas))}
+                       END AS motivo
+                FROM (
+                    SELECT b.*, row_number() OVER (PARTITION BY b.motivo IS NULL, b.cedula ORDER BY b.fila) AS repeticion
+                    FROM (
+                        SELECT r.*, CASE {casos(0, len(reglas))} END AS motivo
+                        FROM (
+                            SELECT fila, {cedula} AS cedula, {cols['cedula']} AS cedula_original,
+                                   {cols['nombre']} AS nombre{principal}
+                            FROM {tabla}
+                        ) r
+                    ) b
+                ) r
+            ) rechazadas
+            WHERE motivo IS NOT NULL
+            ORDER BY fila
+        """), {"repetida": "Cédula repetida en el archivo", "evento_id": self.evento_id, **motivos}).all()
+
+        self.rechazos.extend(
+            {"hoja": hoja, "fila": fila, "cedula": cedula_original, "nombre": nombre, "motivo": motivo}
+            for fila, cedula_original, nombre, motivo in filas
+        )
+        if filas:
+            logger.warning(f"'{hoja}': {len(filas)} filas rechazadas")
+
+    def _copiar_invitados(self, ruta: str) -> None:
+        with self._etapa("copia_invitados"):
+            cols = self._cargar_staging(ruta, "staging_invitados")
+            total, invalidas = self._contar_staging("staging_invitados", cols['cedula'])
+
+        with self._etapa("rechazos_invitados"):
+            self._reportar_rechazos("Invitados", "staging_invitados", cols, [])
+
+        cedula = _CEDULA_SQL.format(col=cols['cedula'])
+        conflicto = _conflicto_sql("invitados", COLUMNAS_ACTUALIZABLES[Invitado], self.modo)
+        with self._etapa("merge_invitados"):
+            validas, creados, actualizados = self.db.execute(text(f"""
+                WITH limpias AS (
+                    SELECT DISTINCT ON (cedula) cedula, nombre, campana_area, eps, sede
+                    FROM (
+                        SELECT fila,
+                               {cedula} AS cedula,
+                               coalesce(btrim({cols['nombre']}), '') AS nombre,
+                               {_TEXTO_SQL.format(col=cols['campana_area'])} AS campana_area,
+                               {_TEXTO_SQL.format(col=cols['eps'])} AS eps,
+                               {_TEXTO_SQL.format(col=cols['sede'])} AS sede
+                        FROM staging_invitados
+                    ) s
+                    WHERE {_VALIDA_SQL.format(col='cedula')} AND nombre <> ''
+                    ORDER BY cedula, fila
+                ),
+                insertados AS (
+                    INSERT INTO {self._destino("invitados")} AS invitados
+                        (evento_id, nombre, cedula, campana_area, eps, sede, estado_asistencia)
+                    SELECT :evento_id, nombre, cedula, campana_area, eps, sede, false FROM limpias
+                    {conflicto}
+                    RETURNING id, (xmax = 0) AS creado
+                ),
+                cambios AS (
+                    INSERT INTO {tabla_pendientes(self.db)} (evento_id, entidad, entidad_id, operacion)
+                    SELECT :evento_id, 'invitado', id, 'upsert' FROM insertados
+                )
+                SELECT (SELECT count(*) FROM limpias),
+                       count(*) FILTER (WHERE creado),
+                       count(*) FILTER (WHERE NOT creado)
+                FROM insertados
+            """), {"evento_id": self.evento_id}).one()
+
+        # Igual que en Excel: los existentes no cuentan como saltados
+        self.invitados_saltados += total - validas
+        self.invitados_creados += creados
+        if self.modo == 'actualizar':
+            self.invitados_actualizados += actualizados
+            self.invitados_sin_cambios += validas - creados - actualizados
+        logger.info(f"COPY invitados: {total} filas, {invalidas} con cédula inválida, {creados} creados")
+
+    def _copiar_acompanantes(self, ruta: str) -> None:
+        with self._etapa("copia_acompanantes"):
+            cols = self._cargar_staging(ruta, "staging_acompanantes")
+            total, invalidas = self._contar_staging("staging_acompanantes", cols['cedula'])
+
+        cedula = _CEDULA_SQL.format(col=cols['cedula'])
+        cedula_principal = _CEDULA_SQL.format(col=cols['cedula_invitado_principal'])
+        with self._etapa("rechazos_acompanantes"):
+            posteriores = [(
+                "NOT EXISTS (SELECT 1 FROM invitados i WHERE i.evento_id = :evento_id AND i.cedula = r.cedula_principal)",
+                "No existe el invitado principal"
+            )]
+            if self.modo != 'actualizar':
+                posteriores.append((
+                    "EXISTS (SELECT 1 FROM acompanantes a WHERE a.evento_id = :evento_id AND a.cedula = r.cedula)",
+                    "El acompañante ya existe"
+                ))
+            self._reportar_rechazos("Acompanantes", "staging_acompanantes", cols, posteriores, cedula_principal)
+
+        conflicto = _conflicto_sql("acompanantes", COLUMNAS_ACTUALIZABLES[Acompanante], self.modo)
+        with self._etapa("merge_acompanantes"):
+            enlazadas, creados, actualizados = self.db.execute(text(f"""
+                WITH limpias AS (
+                    SELECT DISTINCT ON (cedula) cedula, nombre, edad, parentesco, eps, cedula_principal
+                    FROM (
+                        SELECT fila,
+                               {cedula} AS cedula,
+                               coalesce(btrim({cols['nombre']}), '') AS nombre,
+                               {_EDAD_SQL.format(col=cols['edad'])} AS edad,
+                               {_TEXTO_SQL.format(col=cols['parentesco'])} AS parentesco,
+                               {_TEXTO_SQL.format(col=cols['eps_acompanante'])} AS eps,
+                               {cedula_principal} AS cedula_principal
+                        FROM staging_acompanantes
+                    ) s
+                    WHERE {_VALIDA_SQL.format(col='cedula')} AND nombre <> ''
+                      AND cedula_principal <> '' AND lower(cedula_principal) <> 'nan'
+                    ORDER BY cedula, fila
+                ),
+                enlazadas AS (
+                    SELECT i.id AS invitado_id, l.*
+                    FROM limpias l
+                    JOIN invitados i ON i.evento_id = :evento_id AND i.cedula = l.cedula_principal
+                ),
+                insertados AS (
+                    INSERT INTO {self._destino("acompanantes")} AS acompanantes
+                        (evento_id, invitado_id, nombre, cedula, edad, parentesco, eps, estado_asistencia)
+                    SELECT :evento_id, invitado_id, nombre, cedula, edad, parentesco, eps, false FROM enlazadas
+                    {conflicto}
+                    RETURNING id, (xmax = 0) AS creado
+                ),
+                cambios AS (
+                    INSERT INTO {tabla_pendientes(self.db)} (evento_id, entidad, entidad_id, operacion)
+                    SELECT :evento_id, 'acompanante', id, 'upsert' FROM insertados
+                )
+                SELECT (SELECT count(*) FROM enlazadas),
+                       count(*) FILTER (WHERE creado),
+                       count(*) FILTER (WHERE NOT creado)
+                FROM insertados
+            """), {"evento_id": self.evento_id}).one()
+
+        self.acompanantes_creados += creados
+        if self.modo == 'actualizar':
+            # Inválidos, repetidos o sin invitado principal
+            self.acompanantes_saltados += total - enlazadas
+            self.acompanantes_actualizados += actualizados
+            self.acompanantes_sin_cambios += enlazadas - creados - actualizados
+        else:
+            # Además, los ya existentes
+            self.acompanantes_saltados += total - creados
+        logger.info(f"COPY acompañantes: {total} filas, {invalidas} con cédula inválida, {creados} creados")
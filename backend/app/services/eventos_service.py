@@ -0,0 +1,173 @@
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.engine import Connection
+from ..models import Acompanante, AsistenciaLog, CambioSync, Evento, Invitado
+
+logger = logging.getLogger(__name__)
+
+# Tablas particionadas por lista de evento_id, en orden de creación: las
+# particiones de acompanantes referencian a las de invitados y se separan primero
+TABLAS = ("invitados", "acompanantes")
+
+
+def nombre_particion(tabla: str, evento_id: int) -> str:
+    return f"{tabla}_evento_{evento_id}"
+
+
+def esta_particionada(conn: Connection) -> bool:
+    """invitados ya pasó por la migración de eventos (solo PostgreSQL)"""
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('invitados'))"
+    )).scalar())
+
+
+def crear_particiones(conn: Connection, evento_id: int) -> None:
+    """
+    Crear las particiones de un evento. Se crean como tablas sueltas y se
+    adjuntan: ATTACH bloquea la tabla padre menos que PARTITION OF, así el
+    evento en curso sigue atendiendo. Los índices y la clave foránea de la
+    tabla padre se crean en la partición al adjuntarla.
+    """
+    for tabla in TABLAS:
+        nombre = nombre_particion(tabla, evento_id)
+        conn.execute(text(f"CREATE TABLE {nombre} (LIKE {tabla} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        conn.execute(text(f"ALTER TABLE {tabla} ATTACH PARTITION {nombre} FOR VALUES IN ({evento_id})"))
+    logger.info(f"Particiones del evento {evento_id} creadas")
+
+
+def _filas_estimadas(conn: Connection) -> Dict[int, Dict[str, int]]:
+    """
+    {evento_id: {tabla: filas}} por evento. En PostgreSQL se leen las filas
+    estimadas de cada partición (pg_class) en lugar de recorrer los eventos
+    pasados; en SQLite se cuentan.
+    """
+    filas: Dict[int, Dict[str, int]] = {}
+    if esta_particionada(conn):
+        particiones = conn.execute(text("""
+            SELECT p.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname IN ('invitados', 'acompanantes')
+        """)).all()
+        for tabla, limites, estimadas in particiones:
+            # FOR VALUES IN (N)
+            evento_id = int(limites[limites.index("(") + 1:limites.index(")")])
+            filas.setdefault(evento_id, {})[tabla] = max(estimadas, 0)
+        return filas
+    for modelo in (Invitado, Acompanante):
+        for evento_id, total in conn.execute(
+            select(modelo.evento_id, func.count()).group_by(modelo.evento_id)
+        ):
+            filas.setdefault(evento_id, {})[modelo.__tablename__] = total
+    return filas
+
+
+def listar_eventos(conn: Connection) -> List[Dict]:
+    """Eventos con sus invitados y acompañantes (estimados en PostgreSQL)"""
+    filas = _filas_estimadas(conn)
+    eventos = conn.execute(select(Evento).order_by(Evento.id)).all()
+    return [
+        {
+            "id": evento.id,
+            "nombre": evento.nombre,
+            "fecha": evento.fecha,
+            "activo": evento.activo,
+            "archivado": evento.archivado,
+            "created_at": evento.created_at,
+            "invitados": filas.get(evento.id, {}).get("invitados", 0),
+            "acompanantes": filas.get(evento.id, {}).get("acompanantes", 0),
+        }
+        for evento in eventos
+    ]
+
+
+def _evento(conn: Connection, evento_id: int):
+    evento = conn.execute(select(Evento).where(Evento.id == evento_id)).first()
+    if evento is None:
+        raise LookupError(f"El evento {evento_id} no existe")
+    return evento
+
+
+def evento_activo(conn: Connection) -> Optional[int]:
+    """Id del evento activo, o None si no hay ninguno"""
+    return conn.execute(select(Evento.id).where(Evento.activo)).scalar()
+
+
+def activar_evento(conn: Connection, evento_id: int) -> None:
+    """Marcar el evento como activo (el que usan las rutas por defecto); a lo sumo hay uno"""
+    if _evento(conn, evento_id).archivado:
+        raise ValueError(f"El evento {evento_id} está archivado")
+    conn.execute(update(Evento).where(Evento.activo, Evento.id != evento_id).values(activo=False))
+    conn.execute(update(Evento).where(Evento.id == evento_id).values(activo=True))
+
+
+def crear_evento(conn: Connection, nombre: str, fecha: Optional[date] = None, activar: bool = False) -> int:
+    """Crear un evento con sus particiones; retorna su id"""
+    evento_id = conn.execute(insert(Evento).values(nombre=nombre, fecha=fecha).returning(Evento.id)).scalar()
+    if esta_particionada(conn):
+        crear_particiones(conn, evento_id)
+    if activar:
+        activar_evento(conn, evento_id)
+    logger.info(f"Evento {evento_id} ({nombre}) creado")
+    return evento_id
+
+
+def _separar_particiones(conn: Connection, evento_id: int, archivar: bool) -> None:
+    """
+    DETACH de las particiones del evento y DROP si no se archivan. Separar o
+    borrar una partición libera sus filas de inmediato, sin DELETE fila por
+    fila ni VACUUM. Archivadas quedan como tablas sueltas (invitados_evento_N,
+    acompanantes_evento_N) que se pueden consultar o volver a adjuntar.
+    """
+    for tabla in reversed(TABLAS):
+        nombre = nombre_particion(tabla, evento_id)
+        if not conn.execute(text("SELECT to_regclass(:nombre) IS NOT NULL"), {"nombre": nombre}).scalar():
+            continue
+        conn.execute(text(f"ALTER TABLE {tabla} DETACH PARTITION {nombre}"))
+        if not archivar:
+            conn.execute(text(f"DROP TABLE {nombre}"))
+            continue
+        # Separada, su clave foránea apunta a toda la tabla invitados e
+        # impediría separar después la partición de invitados
+        claves = conn.execute(text("""
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = to_regclass(:nombre) AND contype = 'f' AND confrelid = to_regclass('invitados')
+        """), {"nombre": nombre}).scalars().all()
+        for clave in claves:
+            conn.execute(text(f'ALTER TABLE {nombre} DROP CONSTRAINT "{clave}"'))
+
+
+def eliminar_evento(conn: Connection, evento_id: int, archivar: bool = False) -> None:
+    """
+    Eliminar un evento pasado. Con archivar=True sus particiones se separan
+    y se conservan junto con su log de asistencia; sin archivar se borran
+    el evento y todas sus filas. Sin particiones (SQLite) se borra con DELETE
+    y no se puede archivar.
+    """
+    evento = _evento(conn, evento_id)
+    if evento.activo:
+        raise ValueError("No se puede eliminar el evento activo: active otro antes")
+    particionada = esta_particionada(conn)
+    if archivar and not particionada:
+        raise ValueError("Archivar un evento requiere PostgreSQL con las tablas particionadas por evento")
+
+    if particionada:
+        _separar_particiones(conn, evento_id, archivar)
+    else:
+        conn.execute(delete(Acompanante).where(Acompanante.evento_id == evento_id))
+        conn.execute(delete(Invitado).where(Invitado.evento_id == evento_id))
+
+    # Los clientes de /changes del evento ya no tienen qué sincronizar
+    conn.execute(delete(CambioSync).where(CambioSync.evento_id == evento_id))
+    if archivar:
+        conn.execute(update(Evento).where(Evento.id == evento_id).values(archivado=True))
+        logger.info(f"Evento {evento_id} archivado")
+        return
+    conn.execute(delete(AsistenciaLog).where(AsistenciaLog.evento_id == evento_id))
+    conn.execute(delete(Evento).where(Evento.id == evento_id))
+    logger.info(f"Evento {evento_id} eliminado")
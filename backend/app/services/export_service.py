@@ -0,0 +1,136 @@
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+from openpyxl import Workbook
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import Invitado, Acompanante, AsistenciaLog
+
+# Columnas de cada hoja del Excel; son las de la plantilla de importación más el estado
+COLUMNAS_EXPORTE_INVITADOS = [
+    'cedula', 'nombre', 'campana_area', 'eps', 'sede', 'estado_asistencia', 'primera_llegada'
+]
+COLUMNAS_EXPORTE_ACOMPANANTES = [
+    'cedula', 'nombre', 'edad', 'parentesco', 'eps_acompanante', 'cedula_invitado_principal',
+    'estado_asistencia', 'primera_llegada'
+]
+# El CSV es una sola tabla: una fila por persona
+COLUMNAS_EXPORTE_CSV = [
+    'tipo', 'cedula', 'nombre', 'campana_area', 'eps', 'sede', 'edad', 'parentesco',
+    'cedula_invitado_principal', 'estado_asistencia', 'primera_llegada'
+]
+# Caracteres acumulados antes de entregar una parte del CSV
+TAMANO_PARTE_CSV = 64 * 1024
+
+
+def _primera_llegada(persona_id, tipo: str):
+    """Primer registro en asistencias_log de la persona (usa el índice (tipo, persona_id))"""
+    return select(func.min(AsistenciaLog.timestamp)).where(
+        AsistenciaLog.persona_id == persona_id,
+        AsistenciaLog.tipo == tipo
+    ).scalar_subquery()
+
+
+class ExportService:
+    """
+    Exporte de invitados y acompañantes con su estado y hora de llegada.
+
+    Las filas se leen por lotes con paginación por id (keyset), así la memoria
+    depende del tamaño del lote y no del número de personas. Solo se exporta
+    el evento indicado.
+    """
+
+    def __init__(self, db: Session, evento_id: int, tamano_lote: Optional[int] = None):
+        self.db = db
+        self.evento_id = evento_id
+        self.tamano_lote = tamano_lote or settings.export_tamano_lote
+        self.zona_horaria = timezone(timedelta(hours=settings.export_utc_offset_horas))
+
+    def filas_invitados(self) -> Iterator[list]:
+        """Filas con las columnas de COLUMNAS_EXPORTE_INVITADOS"""
+        consulta = select(
+            Invitado.id, Invitado.cedula, Invitado.nombre, Invitado.campana_area, Invitado.eps,
+            Invitado.sede, Invitado.estado_asistencia,
+            _primera_llegada(Invitado.id, "principal").label("primera_llegada")
+        ).where(Invitado.evento_id == self.evento_id)
+        for lote in self._por_lotes(consulta, Invitado.id):
+            for fila in lote:
+                yield [*fila[1:-1], self._hora_local(fila.primera_llegada)]
+
+    def filas_acompanantes(self) -> Iterator[list]:
+        """Filas con las columnas de COLUMNAS_EXPORTE_ACOMPANANTES"""
+        consulta = select(
+            Acompanante.id, Acompanante.cedula, Acompanante.nombre, Acompanante.edad,
+            Acompanante.parentesco, Acompanante.eps, Invitado.cedula.label("cedula_invitado_principal"),
+            Acompanante.estado_asistencia,
+            _primera_llegada(Acompanante.id, "acompanante").label("primera_llegada")
+        ).join(Acompanante.invitado).where(Acompanante.evento_id == self.evento_id)
+        for lote in self._por_lotes(consulta, Acompanante.id):
+            for fila in lote:
+                yield [*fila[1:-1], self._hora_local(fila.primera_llegada)]
+
+    def escribir_excel(self, ruta: str) -> None:
+        """
+        Escribir el libro con openpyxl en modo write-only: las filas van a
+        disco a medida que se agregan en lugar de quedar en memoria.
+        """
+        workbook = Workbook(write_only=True)
+        hojas = [
+            ("Invitados", COLUMNAS_EXPORTE_INVITADOS, self.filas_invitados()),
+            ("Acompanantes", COLUMNAS_EXPORTE_ACOMPANANTES, self.filas_acompanantes()),
+        ]
+        for nombre, columnas, filas in hojas:
+            hoja = workbook.create_sheet(nombre)
+            hoja.append(columnas)
+            for fila in filas:
+                hoja.append(fila)
+        workbook.save(ruta)
+
+    def csv_por_partes(self) -> Iterator[str]:
+        """Texto CSV por lotes, listo para una StreamingResponse"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM para que Excel reconozca el UTF-8 (tildes y eñes)
+        buffer.write('\ufeff')
+        writer.writerow(COLUMNAS_EXPORTE_CSV)
+
+        for cedula, nombre, campana_area, eps, sede, estado, llegada in self.filas_invitados():
+            writer.writerow(['principal', cedula, nombre, campana_area, eps, sede, None, None, None, estado, llegada])
+            if buffer.tell() >= TAMANO_PARTE_CSV:
+                yield self._vaciar(buffer)
+
+        for cedula, nombre, edad, parentesco, eps, principal, estado, llegada in self.filas_acompanantes():
+            writer.writerow(['acompanante', cedula, nombre, None, eps, None, edad, parentesco, principal, estado, llegada])
+            if buffer.tell() >= TAMANO_PARTE_CSV:
+                yield self._vaciar(buffer)
+
+        yield self._vaciar(buffer)
+
+    @staticmethod
+    def _vaciar(buffer: io.StringIO) -> str:
+        contenido = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return contenido
+
+    def _por_lotes(self, consulta, columna_id) -> Iterator[List]:
+        ultimo_id = 0
+        while True:
+            lote = self.db.execute(
+                consulta.where(columna_id > ultimo_id).order_by(columna_id).limit(self.tamano_lote)
+            ).all()
+            if not lote:
+                return
+            yield lote
+            ultimo_id = lote[-1].id
+
+    def _hora_local(self, momento: Optional[datetime]) -> Optional[datetime]:
+        """Excel no admite zona horaria: se exporta la hora local del evento sin tzinfo"""
+        if momento is None:
+            return None
+        if momento.tzinfo is None:
+            # SQLite guarda CURRENT_TIMESTAMP en UTC sin zona
+            momento = momento.replace(tzinfo=timezone.utc)
+        return momento.astimezone(self.zona_horaria).replace(tzinfo=None)
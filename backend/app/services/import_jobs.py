@@ -0,0 +1,163 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from ..config import settings
+from ..database import SessionLocal, engine_escritura
+from ..utils.excel import LectorExcel
+from .import_service import ImportService, validar_libro
+
+logger = logging.getLogger(__name__)
+
+# Trabajos terminados que se conservan para consultar su estado
+MAX_TRABAJOS_TERMINADOS = 50
+
+_executor = ThreadPoolExecutor(max_workers=settings.import_max_trabajos, thread_name_prefix="importacion")
+_trabajos: Dict[str, dict] = {}
+# Filas rechazadas por trabajo, fuera del estado para no copiarlas en cada consulta
+_rechazos: Dict[str, List[dict]] = {}
+_lock = threading.Lock()
+
+
+def _ahora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def obtener_trabajo(job_id: str) -> Optional[dict]:
+    """Copia del estado actual de un trabajo"""
+    with _lock:
+        trabajo = _trabajos.get(job_id)
+        return dict(trabajo) if trabajo else None
+
+
+def obtener_rechazos(job_id: str) -> Optional[List[dict]]:
+    """Filas rechazadas de un trabajo (None si el trabajo no existe)"""
+    with _lock:
+        if job_id not in _trabajos:
+            return None
+        return list(_rechazos.get(job_id, []))
+
+
+def _actualizar(job_id: str, **cambios) -> None:
+    with _lock:
+        _trabajos[job_id].update(cambios, actualizado=_ahora())
+
+
+def _sumar(job_id: str, **incrementos) -> None:
+    with _lock:
+        trabajo = _trabajos[job_id]
+        for campo, valor in incrementos.items():
+            trabajo[campo] += valor
+        trabajo["actualizado"] = _ahora()
+
+
+def _depurar_terminados() -> None:
+    terminados = sorted(
+        (t for t in _trabajos.values() if t["estado"] in ("completado", "error")),
+        key=lambda t: t["actualizado"]
+    )
+    for trabajo in terminados[:-MAX_TRABAJOS_TERMINADOS]:
+        del _trabajos[trabajo["job_id"]]
+        _rechazos.pop(trabajo["job_id"], None)
+
+
+def crear_trabajo(ruta: str, archivo: str, evento_id: int, modo: str = 'insertar') -> dict:
+    """
+    Registrar un trabajo de importación sobre un archivo ya guardado en disco
+    y encolarlo. El archivo se elimina cuando el trabajo termina.
+    """
+    job_id = uuid.uuid4().hex
+    with _lock:
+        _depurar_terminados()
+        _trabajos[job_id] = {
+            "job_id": job_id,
+            "archivo": archivo,
+            "evento_id": evento_id,
+            "modo": modo,
+            "estado": "pendiente",
+            "total_filas": None,
+            "filas_procesadas": 0,
+            "filas_saltadas": 0,
+            "filas_fallidas": 0,
+            "total_rechazos": 0,
+            "partes_confirmadas": 0,
+            "invitados_creados": 0,
+            "invitados_actualizados": 0,
+            "acompanantes_creados": 0,
+            "acompanantes_actualizados": 0,
+            "errores": [],
+            "creado": _ahora(),
+            "actualizado": _ahora(),
+        }
+    _executor.submit(_ejecutar, job_id, ruta, evento_id, modo)
+    return obtener_trabajo(job_id)
+
+
+def _ejecutar(job_id: str, ruta: str, evento_id: int, modo: str) -> None:
+    """Procesar el archivo por partes, confirmando cada parte por separado"""
+    db = SessionLocal(bind=engine_escritura)
+    try:
+        streaming = os.path.getsize(ruta) >= settings.import_streaming_umbral_mb * 1024 * 1024
+        with LectorExcel(ruta, streaming=streaming) as excel_file:
+            acompanantes_sheet = validar_libro(excel_file)
+            hojas = ['Invitados'] + ([acompanantes_sheet] if acompanantes_sheet else [])
+
+            totales = [excel_file.total_filas(hoja) for hoja in hojas]
+            _actualizar(
+                job_id,
+                estado="procesando",
+                total_filas=sum(totales) if None not in totales else None
+            )
+
+            service = ImportService(db, evento_id, modo=modo)
+            with _lock:
+                _rechazos[job_id] = service.rechazos
+            for hoja in hojas:
+                importar = service.importar_invitados if hoja == 'Invitados' else service.importar_acompanantes
+                for parte in excel_file.leer_por_partes(hoja, settings.import_tamano_parte):
+                    _procesar_parte(job_id, db, service, importar, hoja, parte)
+
+        _actualizar(job_id, estado="completado", tiempos_ms=service.resumen()["tiempos_ms"])
+        logger.info(f"Trabajo de importación {job_id} completado: {obtener_trabajo(job_id)}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error en trabajo de importación {job_id}: {str(e)}")
+        _actualizar(job_id, estado="error", error=str(e))
+    finally:
+        db.close()
+        os.remove(ruta)
+
+
+def _procesar_parte(job_id: str, db, service: ImportService, importar, hoja: str, parte) -> None:
+    """Importar y confirmar una parte; si falla, se revierte solo esa parte"""
+    punto = service.punto_de_control()
+    antes, rechazos_antes = punto["contadores"], punto["rechazos"]
+    try:
+        importar(parte)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        service.restaurar(punto)
+        logger.error(f"Parte de '{hoja}' revertida en trabajo {job_id}: {str(e)}")
+        with _lock:
+            _trabajos[job_id]["errores"].append(f"{hoja}: {len(parte)} filas revertidas ({str(e)[:200]})")
+        _sumar(job_id, filas_procesadas=len(parte), filas_fallidas=len(parte))
+        return
+
+    despues = service.contadores()
+    saltadas = (despues["invitados_saltados"] - antes["invitados_saltados"]) + \
+        (despues["acompanantes_saltados"] - antes["acompanantes_saltados"])
+    _sumar(
+        job_id,
+        filas_procesadas=len(parte),
+        filas_saltadas=saltadas,
+        total_rechazos=len(service.rechazos) - rechazos_antes,
+        partes_confirmadas=1,
+        **{
+            campo: despues[campo] - antes[campo]
+            for campo in ("invitados_creados", "invitados_actualizados", "acompanantes_creados", "acompanantes_actualizados")
+        }
+    )
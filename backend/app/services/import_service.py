@@ -0,0 +1,457 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from ..models import Invitado, Acompanante
+from .sync_service import registrar_cambios
+
+logger = logging.getLogger(__name__)
+
+# Filas por INSERT multi-fila y valores por consulta IN
+TAMANO_LOTE = 1000
+
+
+# Longitud máxima de la columna cedula
+MAX_LARGO_CEDULA = 20
+
+# Columnas del reporte de filas rechazadas
+COLUMNAS_RECHAZOS = ['hoja', 'fila', 'cedula', 'nombre', 'motivo']
+# Filas rechazadas incluidas en la respuesta; el reporte completo se descarga en CSV
+MAX_RECHAZOS_RESPUESTA = 1000
+
+# Listas del resultado de una importación simulada
+CATEGORIAS_DIFF = [
+    'invitados_nuevos', 'invitados_existentes',
+    'acompanantes_nuevos', 'acompanantes_existentes', 'acompanantes_huerfanos',
+]
+
+
+def _limpiar_cedulas(serie: pd.Series) -> pd.Series:
+    """Normalizar una columna de cédulas leída de Excel; las inválidas quedan en NA"""
+    # Quitar .0 si Excel la guardó como número decimal
+    cedulas = serie.astype('string').str.strip().str.replace(r'\.0$', '', regex=True)
+    return cedulas.mask((cedulas == '') | (cedulas.str.lower() == 'nan'))
+
+
+def _textos_opcionales(serie: pd.Series) -> pd.Series:
+    """Columna de texto opcional como objetos de Python (None en lugar de NaN)"""
+    return _a_objetos(serie.astype('string'))
+
+
+def _enteros_opcionales(serie: pd.Series) -> pd.Series:
+    """Columna numérica truncada a entero; los valores no numéricos quedan en None"""
+    numeros = pd.to_numeric(serie, errors='coerce')
+    return _a_objetos(np.trunc(numeros).astype('Int64'))
+
+
+def _a_objetos(serie: pd.Series) -> pd.Series:
+    return serie.astype(object).where(serie.notna(), None)
+
+
+def _marcar(motivos: pd.Series, condicion: pd.Series, motivo: str) -> pd.Series:
+    """Asignar el motivo a las filas que cumplen la condición y aún no tienen uno"""
+    condicion = condicion.fillna(False).astype(bool)
+    return motivos.mask(motivos.isna() & condicion, motivo)
+
+
+def _sin_motivo(index: pd.Index) -> pd.Series:
+    return pd.Series(None, index=index, dtype=object)
+
+
+def limpiar_invitados(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Limpiar en bloque las filas de la hoja 'Invitados'.
+    Retorna el frame tipado (listo para insertar) y el motivo de rechazo de
+    cada fila, o None si la fila es válida.
+    """
+    cedulas = _limpiar_cedulas(df['cedula'])
+    nombres = df['nombre'].astype('string').str.strip()
+    limpio = pd.DataFrame({
+        "nombre": _a_objetos(nombres),
+        "cedula": _a_objetos(cedulas),
+        "campana_area": _textos_opcionales(df['campana_area']),
+        "eps": _textos_opcionales(df['eps']),
+        "sede": _textos_opcionales(df['sede']),
+    }, index=df.index)
+
+    motivos = _sin_motivo(df.index)
+    motivos = _marcar(motivos, cedulas.isna(), "Cédula inválida")
+    motivos = _marcar(motivos, cedulas.str.len() > MAX_LARGO_CEDULA, f"Cédula de más de {MAX_LARGO_CEDULA} caracteres")
+    motivos = _marcar(motivos, nombres.isna() | (nombres == ''), "Nombre vacío")
+    return limpio, motivos
+
+
+def limpiar_acompanantes(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """Igual que limpiar_invitados, para las filas de la hoja 'Acompanantes'"""
+    cedulas = _limpiar_cedulas(df['cedula'])
+    cedulas_principales = _limpiar_cedulas(df['cedula_invitado_principal'])
+    nombres = df['nombre'].astype('string').str.strip()
+    limpio = pd.DataFrame({
+        "nombre": _a_objetos(nombres),
+        "cedula": _a_objetos(cedulas),
+        "edad": _enteros_opcionales(df['edad']),
+        "parentesco": _textos_opcionales(df['parentesco']),
+        "eps": _textos_opcionales(df['eps_acompanante']),
+        "cedula_invitado_principal": _a_objetos(cedulas_principales),
+    }, index=df.index)
+
+    motivos = _sin_motivo(df.index)
+    motivos = _marcar(motivos, cedulas.isna(), "Cédula inválida")
+    motivos = _marcar(motivos, cedulas.str.len() > MAX_LARGO_CEDULA, f"Cédula de más de {MAX_LARGO_CEDULA} caracteres")
+    motivos = _marcar(motivos, cedulas_principales.isna(), "Cédula de invitado principal inválida")
+    motivos = _marcar(motivos, nombres.isna() | (nombres == ''), "Nombre vacío")
+    return limpio, motivos
+
+
+# Columnas requeridas por hoja
+COLUMNAS_INVITADOS = ['cedula', 'nombre', 'campana_area', 'eps', 'sede']
+COLUMNAS_ACOMPANANTES = ['cedula', 'nombre', 'edad', 'parentesco', 'eps_acompanante', 'cedula_invitado_principal']
+NOMBRES_HOJA_ACOMPANANTES = ['acompanantes', 'acompañantes', 'acompanante', 'acompañante']
+
+# 'insertar' solo crea cédulas nuevas; 'actualizar' además aplica los cambios a las existentes
+MODOS = ('insertar', 'actualizar')
+
+# Columnas que compara y sobrescribe el modo 'actualizar' (nunca estado_asistencia)
+COLUMNAS_ACTUALIZABLES = {
+    Invitado: ['nombre', 'campana_area', 'eps', 'sede'],
+    Acompanante: ['nombre', 'edad', 'parentesco', 'eps', 'invitado_id'],
+}
+
+
+def validar_libro(excel_file) -> Optional[str]:
+    """
+    Verificar hojas y columnas del libro antes de escribir nada.
+    Retorna el nombre de la hoja de acompañantes (o None si no existe).
+    Lanza ValueError con un mensaje para el usuario si el formato no es válido.
+    """
+    if 'Invitados' not in excel_file.sheet_names:
+        raise ValueError("El archivo Excel debe contener una hoja llamada 'Invitados'")
+
+    columnas_invitados = excel_file.columnas('Invitados')
+    missing_cols = [col for col in COLUMNAS_INVITADOS if col not in columnas_invitados]
+    if missing_cols:
+        raise ValueError(f"Faltan columnas en la hoja 'Invitados': {missing_cols}")
+
+    # Buscar hoja de acompañantes (aceptar variaciones comunes)
+    acompanantes_sheet = None
+    for sheet in excel_file.sheet_names:
+        if sheet.lower().strip() in NOMBRES_HOJA_ACOMPANANTES:
+            acompanantes_sheet = sheet
+            break
+
+    if acompanantes_sheet:
+        columnas_acompanantes = excel_file.columnas(acompanantes_sheet)
+        logger.info(f"Columnas encontradas en '{acompanantes_sheet}': {columnas_acompanantes}")
+        missing_cols = [col for col in COLUMNAS_ACOMPANANTES if col not in columnas_acompanantes]
+        if missing_cols:
+            logger.warning(f"Columnas faltantes en 'Acompanantes': {missing_cols}")
+            raise ValueError(
+                f"Faltan columnas en la hoja 'Acompanantes': {missing_cols}. Columnas disponibles: {columnas_acompanantes}"
+            )
+
+    return acompanantes_sheet
+
+
+def _lotes(items: List, tamano: int = TAMANO_LOTE) -> Iterable[List]:
+    for inicio in range(0, len(items), tamano):
+        yield items[inicio:inicio + tamano]
+
+
+class ImportService:
+    """
+    Motor de importación masiva.
+    Consulta en bloque las cédulas existentes, deduplica en memoria e inserta
+    con INSERT multi-fila, en lugar de hacer consultas fila por fila.
+    Puede alimentarse con varios DataFrames (por ejemplo, por partes).
+
+    Todo se hace dentro de un evento: las cédulas existentes se buscan solo en
+    él y las filas nuevas se crean en él (en PostgreSQL, en su partición).
+
+    En modo 'actualizar' las filas existentes se comparan en memoria con las
+    actuales y solo las que cambiaron se envían en lotes de
+    INSERT ... ON CONFLICT (evento_id, cedula) DO UPDATE ... WHERE.
+
+    Con simular=True se hacen las mismas consultas por cédula pero no se
+    escribe nada: los contadores indican lo que pasaría y `diff` lista las
+    filas nuevas, las existentes y los acompañantes huérfanos.
+    """
+
+    def __init__(self, db: Session, evento_id: int, modo: str = 'insertar', simular: bool = False):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de importación inválido: {modo}")
+        self.db = db
+        self.evento_id = evento_id
+        self.modo = modo
+        self.simular = simular
+        self.invitados_creados = 0
+        self.invitados_actualizados = 0
+        self.invitados_sin_cambios = 0
+        self.invitados_saltados = 0
+        self.acompanantes_creados = 0
+        self.acompanantes_actualizados = 0
+        self.acompanantes_sin_cambios = 0
+        self.acompanantes_saltados = 0
+        self.tiempos: Dict[str, float] = {}
+        # Cédulas ya procesadas en esta importación (duplicados dentro del archivo)
+        self._cedulas_invitados: Set[str] = set()
+        self._cedulas_acompanantes: Set[str] = set()
+        # Filas rechazadas con su motivo (ver COLUMNAS_RECHAZOS)
+        self.rechazos: List[dict] = []
+        # Resultado de la simulación; los invitados que se crearían cuentan como principales
+        self.diff: Dict[str, List[dict]] = {categoria: [] for categoria in CATEGORIAS_DIFF}
+        self._invitados_simulados: Set[str] = set()
+
+    @contextmanager
+    def _etapa(self, nombre: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + (time.perf_counter() - inicio)
+
+    def importar_invitados(self, df: pd.DataFrame) -> None:
+        """Importar filas con el formato de la hoja 'Invitados'"""
+        with self._etapa("limpieza_invitados"):
+            limpio, motivos = limpiar_invitados(df)
+            motivos = self._marcar_repetidas(limpio['cedula'], motivos, self._cedulas_invitados)
+            validas = limpio[motivos.isna()]
+            self._cedulas_invitados.update(validas['cedula'])
+            self.invitados_saltados += self._rechazar('Invitados', df, motivos)
+            registros = validas.assign(evento_id=self.evento_id, estado_asistencia=False).to_dict('records')
+
+        columnas = COLUMNAS_ACTUALIZABLES[Invitado] if self.modo == 'actualizar' else []
+        with self._etapa("consulta_invitados"):
+            existentes = self._filas_por_cedula(Invitado, [r["cedula"] for r in registros], columnas)
+
+        nuevos = [r for r in registros if r["cedula"] not in existentes]
+        presentes = [r for r in registros if r["cedula"] in existentes]
+        if self.simular:
+            self._invitados_simulados.update(r["cedula"] for r in nuevos)
+            self._agregar_diff("invitados", nuevos, presentes, existentes, columnas)
+
+        with self._etapa("insercion_invitados"):
+            self._insertar(Invitado, nuevos)
+        self.invitados_creados += len(nuevos)
+
+        if self.modo == 'actualizar':
+            with self._etapa("actualizacion_invitados"):
+                actualizados = self._actualizar(Invitado, self._cambiados(presentes, existentes, columnas), columnas)
+            self.invitados_actualizados += actualizados
+            self.invitados_sin_cambios += len(presentes) - actualizados
+
+    def importar_acompanantes(self, df: pd.DataFrame) -> None:
+        """
+        Importar filas con el formato de la hoja 'Acompanantes'.
+        Los invitados principales deben haberse importado antes.
+        """
+        with self._etapa("limpieza_acompanantes"):
+            limpio, motivos = limpiar_acompanantes(df)
+            motivos = self._marcar_repetidas(limpio['cedula'], motivos, self._cedulas_acompanantes)
+            self._cedulas_acompanantes.update(limpio.loc[motivos.isna(), 'cedula'])
+
+        with self._etapa("consulta_acompanantes"):
+            pendientes = limpio[motivos.isna()]
+            principales = self._ids_por_cedula(
+                Invitado, pendientes['cedula_invitado_principal'].unique().tolist()
+            )
+            if self.simular:
+                # Id provisional: el invitado aún no existe, pero existiría al importar
+                principales.update({cedula: -1 for cedula in self._invitados_simulados})
+            columnas = COLUMNAS_ACTUALIZABLES[Acompanante] if self.modo == 'actualizar' else []
+            existentes = self._filas_por_cedula(Acompanante, pendientes['cedula'].tolist(), columnas)
+
+        with self._etapa("limpieza_acompanantes"):
+            invitado_ids = limpio['cedula_invitado_principal'].map(principales)
+            huerfanos = motivos.isna() & invitado_ids.isna()
+            motivos = _marcar(motivos, huerfanos, "No existe el invitado principal")
+            ya_existe = limpio['cedula'].isin(existentes.keys())
+            if self.modo != 'actualizar':
+                motivos = _marcar(motivos, ya_existe, "El acompañante ya existe")
+            self.acompanantes_saltados += self._rechazar('Acompanantes', df, motivos)
+
+            validas = limpio.assign(
+                evento_id=self.evento_id, invitado_id=_a_objetos(invitado_ids.astype('Int64'))
+            )[motivos.isna()]
+            validas = validas.drop(columns='cedula_invitado_principal')
+            presentes = validas[ya_existe[motivos.isna()]].to_dict('records')
+            nuevos = validas[~ya_existe[motivos.isna()]].assign(estado_asistencia=False).to_dict('records')
+
+        if self.simular:
+            if self.modo != 'actualizar':
+                # En modo 'insertar' los existentes ya quedaron como rechazados
+                presentes_diff = limpio[ya_existe & (motivos == "El acompañante ya existe")]
+                presentes_diff = presentes_diff.drop(columns='cedula_invitado_principal').to_dict('records')
+            else:
+                presentes_diff = presentes
+            self._agregar_diff("acompanantes", nuevos, presentes_diff, existentes, columnas)
+            self.diff["acompanantes_huerfanos"].extend(
+                {"fila": int(fila) + 2, "cedula": cedula, "nombre": nombre, "cedula_invitado_principal": principal}
+                for fila, cedula, nombre, principal in zip(
+                    df.index[huerfanos.to_numpy()], limpio.loc[huerfanos, 'cedula'],
+                    limpio.loc[huerfanos, 'nombre'], limpio.loc[huerfanos, 'cedula_invitado_principal']
+                )
+            )
+
+        with self._etapa("insercion_acompanantes"):
+            self._insertar(Acompanante, nuevos)
+        self.acompanantes_creados += len(nuevos)
+
+        if self.modo == 'actualizar':
+            with self._etapa("actualizacion_acompanantes"):
+                actualizados = self._actualizar(Acompanante, self._cambiados(presentes, existentes, columnas), columnas)
+            self.acompanantes_actualizados += actualizados
+            self.acompanantes_sin_cambios += len(presentes) - actualizados
+
+    def _agregar_diff(self, entidad: str, nuevos: List[dict], presentes: List[dict],
+                      existentes: Dict[str, Row], columnas: List[str]) -> None:
+        """Agregar al diff las filas nuevas y las existentes (con sus cambios en modo 'actualizar')"""
+        self.diff[f"{entidad}_nuevos"].extend(
+            {"cedula": r["cedula"], "nombre": r["nombre"]} for r in nuevos
+        )
+        for registro in presentes:
+            actual = existentes[registro["cedula"]]
+            cambios = {
+                c: {"actual": getattr(actual, c), "nuevo": registro[c]}
+                for c in columnas if registro[c] != getattr(actual, c)
+            }
+            self.diff[f"{entidad}_existentes"].append(
+                {"cedula": registro["cedula"], "nombre": registro["nombre"], "cambios": cambios}
+            )
+
+    @staticmethod
+    def _marcar_repetidas(cedulas: pd.Series, motivos: pd.Series, vistas: Set[str]) -> pd.Series:
+        """Marcar cédulas ya vistas en partes anteriores o repetidas dentro de esta parte"""
+        pendientes = motivos.isna()
+        repetidas = cedulas[pendientes].duplicated().reindex(cedulas.index, fill_value=False)
+        return _marcar(motivos, cedulas.isin(vistas) | repetidas, "Cédula repetida en el archivo")
+
+    def _rechazar(self, hoja: str, df: pd.DataFrame, motivos: pd.Series) -> int:
+        """
+        Agregar al reporte las filas con motivo de rechazo y retornar cuántas son.
+        La fila es la del archivo: el índice parte de 0 y la fila 1 es el encabezado.
+        """
+        rechazadas = motivos.notna()
+        total = int(rechazadas.sum())
+        if total:
+            reporte = pd.DataFrame({
+                "hoja": hoja,
+                "fila": df.index[rechazadas] + 2,
+                "cedula": _a_objetos(df.loc[rechazadas, 'cedula'].astype('string')),
+                "nombre": _a_objetos(df.loc[rechazadas, 'nombre'].astype('string')),
+                "motivo": motivos[rechazadas],
+            })
+            self.rechazos.extend(reporte.to_dict('records'))
+            logger.warning(f"'{hoja}': {total} de {len(df)} filas rechazadas ({motivos[rechazadas].value_counts().to_dict()})")
+        return total
+
+    def contadores(self) -> Dict[str, int]:
+        """Copia de los contadores, para restaurarlos si una parte se revierte"""
+        return {
+            "invitados_creados": self.invitados_creados,
+            "invitados_actualizados": self.invitados_actualizados,
+            "invitados_sin_cambios": self.invitados_sin_cambios,
+            "invitados_saltados": self.invitados_saltados,
+            "acompanantes_creados": self.acompanantes_creados,
+            "acompanantes_actualizados": self.acompanantes_actualizados,
+            "acompanantes_sin_cambios": self.acompanantes_sin_cambios,
+            "acompanantes_saltados": self.acompanantes_saltados,
+        }
+
+    def restaurar_contadores(self, contadores: Dict[str, int], rechazos: Optional[int] = None) -> None:
+        """Restaurar los contadores y, si se indica, descartar los rechazos posteriores"""
+        for nombre, valor in contadores.items():
+            setattr(self, nombre, valor)
+        if rechazos is not None:
+            del self.rechazos[rechazos:]
+
+    def punto_de_control(self) -> dict:
+        """
+        Estado que modifica la importación de una parte: contadores, rechazos y
+        cédulas ya vistas. Si la parte se revierte, restaurar() lo deja como
+        estaba; si no, las partes siguientes rechazarían como repetidas cédulas
+        que nunca se guardaron.
+        """
+        return {
+            "contadores": self.contadores(),
+            "rechazos": len(self.rechazos),
+            "cedulas_invitados": set(self._cedulas_invitados),
+            "cedulas_acompanantes": set(self._cedulas_acompanantes),
+        }
+
+    def restaurar(self, punto: dict) -> None:
+        """Volver al estado de punto_de_control()"""
+        self.restaurar_contadores(punto["contadores"], punto["rechazos"])
+        self._cedulas_invitados = punto["cedulas_invitados"]
+        self._cedulas_acompanantes = punto["cedulas_acompanantes"]
+
+    def resumen(self) -> dict:
+        """Contadores, tiempos por etapa y las primeras filas rechazadas"""
+        return {
+            "modo": self.modo,
+            **self.contadores(),
+            "tiempos_ms": {etapa: round(segundos * 1000, 1) for etapa, segundos in self.tiempos.items()},
+            "total_rechazos": len(self.rechazos),
+            "rechazos": self.rechazos[:MAX_RECHAZOS_RESPUESTA],
+        }
+
+    def _filas_por_cedula(self, modelo, cedulas: List[str], columnas: List[str] = ()) -> Dict[str, Row]:
+        """Obtener {cedula: fila} de las cédulas que ya existen en el evento, en consultas por lotes"""
+        encontrados: Dict[str, Row] = {}
+        seleccion = [modelo.cedula, modelo.id] + [getattr(modelo, c) for c in columnas if c != 'id']
+        for lote in _lotes(cedulas):
+            filas = self.db.execute(
+                select(*seleccion).where(modelo.evento_id == self.evento_id, modelo.cedula.in_(lote))
+            )
+            encontrados.update({fila.cedula: fila for fila in filas})
+        return encontrados
+
+    def _ids_por_cedula(self, modelo, cedulas: List[str]) -> Dict[str, int]:
+        """Obtener {cedula: id} de las cédulas que ya existen"""
+        return {cedula: fila.id for cedula, fila in self._filas_por_cedula(modelo, cedulas).items()}
+
+    @staticmethod
+    def _cambiados(registros: List[dict], existentes: Dict[str, Row], columnas: List[str]) -> List[dict]:
+        """Registros cuyo valor difiere del actual en alguna columna actualizable"""
+        return [
+            r for r in registros
+            if any(r[c] != getattr(existentes[r["cedula"]], c) for c in columnas)
+        ]
+
+    def _actualizar(self, modelo, registros: List[dict], columnas: List[str]) -> int:
+        """
+        Upsert por lotes de las filas cambiadas. El WHERE evita reescribir
+        filas que otro proceso ya dejó iguales. Retorna las filas actualizadas.
+        """
+        if not registros or self.simular:
+            return len(registros)
+        tabla = modelo.__table__
+        insert_dialecto = sqlite.insert if self.db.get_bind().dialect.name == "sqlite" else postgresql.insert
+        ids: List[int] = []
+        for lote in _lotes(registros):
+            stmt = insert_dialecto(tabla)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[tabla.c.evento_id, tabla.c.cedula],
+                set_={**{c: stmt.excluded[c] for c in columnas}, "updated_at": func.now()},
+                where=or_(*(tabla.c[c].is_distinct_from(stmt.excluded[c]) for c in columnas)),
+            ).returning(tabla.c.id)
+            ids.extend(self.db.execute(stmt, lote).scalars().all())
+        registrar_cambios(self.db, modelo, ids, self.evento_id)
+        return len(ids)
+
+    def _insertar(self, modelo, registros: List[dict]) -> List[int]:
+        """INSERT multi-fila por lotes; registra los ids creados para /changes"""
+        ids: List[int] = []
+        if self.simular:
+            return ids
+        tabla = modelo.__table__
+        for lote in _lotes(registros):
+            resultado = self.db.execute(insert(tabla).returning(tabla.c.id), lote)
+            ids.extend(resultado.scalars().all())
+        registrar_cambios(self.db, modelo, ids, self.evento_id)
+        return ids
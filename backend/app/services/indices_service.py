@@ -0,0 +1,342 @@
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.engine import Connection
+from ..models import Invitado, Acompanante
+from .asistencia_service import _BUSCAR_INVITADO, _BUSCAR_INVITADO_DE_ACOMPANANTE, _INVITADOS_PENDIENTES
+from .eventos_service import evento_activo
+
+logger = logging.getLogger(__name__)
+
+# Sentencias de las rutas frecuentes con valores de ejemplo: su plan (EXPLAIN
+# sin ANALYZE) muestra qué tablas recorren completas y con qué filtro. El
+# evento de ejemplo es el activo.
+CONSULTAS_FRECUENTES = {
+    "busqueda_invitado": (_BUSCAR_INVITADO, {"cedula": "0", "patron": "%maria%"}),
+    "busqueda_acompanante": (_BUSCAR_INVITADO_DE_ACOMPANANTE, {"cedula": "0", "patron": "%maria%"}),
+    "acompanantes_del_invitado": (
+        select(Acompanante).where(
+            Acompanante.evento_id == bindparam("evento_id"), Acompanante.invitado_id == bindparam("invitado_id")
+        ),
+        {"invitado_id": 1}
+    ),
+    "invitados_pendientes": (_INVITADOS_PENDIENTES, {}),
+    "reporte_por_sede": (
+        select(Invitado.id).where(Invitado.evento_id == bindparam("evento_id"), Invitado.sede == bindparam("sede")),
+        {"sede": "Sede Principal"}
+    ),
+}
+
+_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+_ESTADISTICAS_INDICES = text("""
+    SELECT
+        COALESCE(tabla_padre.relname, s.relname) AS tabla,
+        COALESCE(padre.relname, s.indexrelname) AS indice,
+        s.idx_scan,
+        pg_relation_size(s.indexrelid) AS bytes,
+        i.indisunique,
+        i.indisprimary,
+        am.amname AS metodo,
+        i.indexprs IS NOT NULL AS con_expresiones,
+        pg_get_expr(i.indpred, i.indrelid) AS predicado,
+        i.indclass::text AS clases,
+        ARRAY(
+            SELECT a.attname FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, orden)
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+            ORDER BY k.orden
+        ) AS columnas,
+        pg_get_indexdef(COALESCE(padre.oid, s.indexrelid)) AS definicion
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    JOIN pg_class c ON c.oid = s.indexrelid
+    JOIN pg_am am ON am.oid = c.relam
+    LEFT JOIN pg_inherits h ON h.inhrelid = s.indexrelid
+    LEFT JOIN pg_class padre ON padre.oid = h.inhparent
+    LEFT JOIN pg_index ip ON ip.indexrelid = padre.oid
+    LEFT JOIN pg_class tabla_padre ON tabla_padre.oid = ip.indrelid
+""")
+
+_CLAVES_FORANEAS = text("""
+    SELECT c.conrelid::regclass::text AS tabla, c.conname,
+           ARRAY(
+               SELECT a.attname FROM unnest(c.conkey) WITH ORDINALITY AS k(attnum, orden)
+               JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+               ORDER BY k.orden
+           ) AS columnas
+    FROM pg_constraint c
+    WHERE c.contype = 'f' AND c.conparentid = 0 AND c.conrelid IN (SELECT relid FROM pg_stat_user_tables)
+""")
+
+# Las particiones se suman en su tabla particionada, como los índices
+_ESTADISTICAS_TABLAS = text("""
+    SELECT COALESCE(padre.relname, s.relname) AS tabla,
+           sum(s.seq_scan)::bigint, sum(s.seq_tup_read)::bigint,
+           sum(COALESCE(s.idx_scan, 0))::bigint, sum(s.n_live_tup)::bigint
+    FROM pg_stat_user_tables s
+    LEFT JOIN pg_inherits h ON h.inhrelid = s.relid
+    LEFT JOIN pg_class padre ON padre.oid = h.inhparent
+    WHERE s.relid NOT IN (SELECT partrelid FROM pg_partitioned_table)
+    GROUP BY 1
+""")
+
+_PARTICIONES = text("""
+    SELECT c.relname, padre.relname
+    FROM pg_inherits h
+    JOIN pg_class c ON c.oid = h.inhrelid
+    JOIN pg_class padre ON padre.oid = h.inhparent
+    WHERE c.relkind = 'r'
+""")
+
+# Columnas de la clave de partición de cada tabla particionada
+_CLAVES_PARTICION = text("""
+    SELECT c.relname, a.attname
+    FROM pg_partitioned_table p
+    JOIN pg_class c ON c.oid = p.partrelid
+    JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = ANY(p.partattrs::int2[])
+""")
+
+
+def estadisticas_indices(conn: Connection) -> List[Dict]:
+    """
+    Uso y tamaño de cada índice según pg_stat_user_indexes. Los índices de
+    las particiones se suman en el índice de la tabla particionada.
+    """
+    agrupados: Dict[Tuple[str, str], Dict] = {}
+    for fila in conn.execute(_ESTADISTICAS_INDICES).mappings():
+        clave = (fila["tabla"], fila["indice"])
+        if clave in agrupados:
+            agrupados[clave]["lecturas"] += fila["idx_scan"]
+            agrupados[clave]["bytes"] += fila["bytes"]
+            continue
+        agrupados[clave] = {
+            "tabla": fila["tabla"],
+            "indice": fila["indice"],
+            "lecturas": fila["idx_scan"],
+            "bytes": fila["bytes"],
+            "unico": fila["indisunique"],
+            "primario": fila["indisprimary"],
+            "metodo": fila["metodo"],
+            "columnas": list(fila["columnas"]) if not fila["con_expresiones"] else [],
+            "predicado": fila["predicado"],
+            "clases": fila["clases"],
+            "definicion": fila["definicion"],
+        }
+    return sorted(agrupados.values(), key=lambda i: (i["tabla"], i["indice"]))
+
+
+def indices_sin_uso(indices: List[Dict], max_lecturas: int = 0) -> List[Dict]:
+    """
+    Índices leídos `max_lecturas` veces o menos desde el último reinicio de
+    estadísticas. Los únicos y las claves primarias no se proponen: sostienen
+    una restricción aunque nadie los lea.
+    """
+    sin_uso = [
+        {**_resumen(i), "motivo": f"{i['lecturas']} lecturas"}
+        for i in indices
+        if i["lecturas"] <= max_lecturas and not i["unico"] and not i["primario"]
+    ]
+    return sorted(sin_uso, key=lambda i: -i["bytes"])
+
+
+def indices_duplicados(indices: List[Dict]) -> List[Dict]:
+    """
+    Índices cubiertos por otro de la misma tabla: mismas columnas, método,
+    clases de operador y predicado; o, en b-tree, columnas que son prefijo de
+    otro índice (un índice no único no aporta nada que no dé el más largo).
+    """
+    por_tabla = defaultdict(list)
+    for indice in indices:
+        if indice["columnas"]:
+            por_tabla[indice["tabla"]].append(indice)
+
+    duplicados = []
+    for candidatos in por_tabla.values():
+        for indice in candidatos:
+            for otro in candidatos:
+                if otro is indice or (otro["metodo"], otro["predicado"]) != (indice["metodo"], indice["predicado"]):
+                    continue
+                if otro["columnas"] == indice["columnas"] and otro["clases"] == indice["clases"]:
+                    # De dos iguales sobra el que no sostiene una restricción
+                    # (o, entre equivalentes, el de nombre mayor)
+                    if (indice["primario"], indice["unico"], otro["indice"]) < (otro["primario"], otro["unico"], indice["indice"]):
+                        duplicados.append({**_resumen(indice), "cubierto_por": otro["indice"], "motivo": "mismas columnas"})
+                        break
+                elif (
+                    indice["metodo"] == "btree" and not indice["unico"]
+                    and len(otro["columnas"]) > len(indice["columnas"])
+                    and otro["columnas"][:len(indice["columnas"])] == indice["columnas"]
+                ):
+                    duplicados.append({**_resumen(indice), "cubierto_por": otro["indice"], "motivo": "prefijo de otro índice"})
+                    break
+    return duplicados
+
+
+def planes_consultas_frecuentes(conn: Connection) -> Dict[str, str]:
+    """EXPLAIN de CONSULTAS_FRECUENTES con sus valores de ejemplo, en el evento activo"""
+    planes = {}
+    evento_id = evento_activo(conn) or 0
+    for nombre, (sentencia, valores) in CONSULTAS_FRECUENTES.items():
+        compilada = sentencia.compile(dialect=conn.dialect)
+        try:
+            with conn.begin_nested():
+                filas = conn.exec_driver_sql(
+                    "EXPLAIN " + str(compilada), compilada.construct_params({"evento_id": evento_id, **valores})
+                ).all()
+        except Exception as e:
+            logger.warning(f"No se pudo obtener el plan de {nombre}: {e}")
+            continue
+        planes[nombre] = "\n".join(fila[0] for fila in filas)
+    return planes
+
+
+def _recorridos_completos(plan: str, particiones: Dict[str, str]) -> List[Tuple[str, str]]:
+    """
+    (tabla, filtro) de cada Seq Scan con filtro de un plan de EXPLAIN en
+    texto. Un recorrido de una partición se atribuye a su tabla particionada.
+    """
+    recorridos, tabla = [], None
+    for linea in plan.splitlines():
+        match = _SEQ_SCAN.search(linea)
+        if match:
+            tabla = particiones.get(match.group(1), match.group(1))
+        elif "->" in linea:
+            tabla = None
+        elif tabla and linea.strip().startswith("Filter:"):
+            recorridos.append((tabla, linea.strip()[len("Filter:"):].strip()))
+            tabla = None
+    return recorridos
+
+
+def _columnas_tabla(conn: Connection, tabla: str) -> List[str]:
+    return conn.execute(text(
+        "SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(:tabla) AND attnum > 0 AND NOT attisdropped"
+    ), {"tabla": tabla}).scalars().all()
+
+
+def _tiene_indice(
+    indices: List[Dict], tabla: str, columna: str, trigramas: bool, claves_particion: Iterable[str] = ()
+) -> bool:
+    """
+    Hay un índice que empieza por la columna (de trigramas si el filtro es
+    LIKE). En una partición la clave de partición es constante, así que un
+    índice que empieza por ella cuenta desde la columna siguiente.
+    """
+    return any(
+        i["tabla"] == tabla and [c for c in i["columnas"] if c == columna or c not in claves_particion][:1] == [columna]
+        and (not trigramas or "gin_trgm_ops" in i["definicion"])
+        for i in indices
+    )
+
+
+def indices_faltantes(
+    conn: Connection, indices: List[Dict], planes: Dict[str, str], min_filas: int = 1000
+) -> List[Dict]:
+    """
+    Índices que faltan según:
+    - las claves foráneas sin un índice que empiece por sus columnas (cada
+      JOIN y cada borrado en cascada recorre la tabla);
+    - los planes de las consultas reales, donde una tabla de al menos
+      `min_filas` filas se recorre completa con un filtro. Para LIKE/ILIKE
+      con comodín inicial solo sirve un índice de trigramas (pg_trgm);
+    - las tablas con más lecturas secuenciales que por índice.
+    """
+    faltantes = []
+    claves_particion = defaultdict(set)
+    for tabla, columna in conn.execute(_CLAVES_PARTICION).all():
+        claves_particion[tabla].add(columna)
+    for tabla, restriccion, columnas in conn.execute(_CLAVES_FORANEAS).all():
+        # Cada partición tiene un solo valor de la clave de partición (evento_id):
+        # basta un índice por las demás columnas
+        columnas = [c for c in columnas if c not in claves_particion[tabla]] or list(columnas)
+        if not any(i["tabla"] == tabla and i["columnas"][:len(columnas)] == columnas for i in indices):
+            faltantes.append({
+                "tabla": tabla,
+                "columnas": columnas,
+                "origen": f"clave foránea {restriccion}",
+                "sugerencia": f"CREATE INDEX ON {tabla} ({', '.join(columnas)})",
+            })
+
+    filas_por_tabla = {}
+    lecturas_secuenciales = []
+    for tabla, seq_scan, seq_tup_read, idx_scan, filas in conn.execute(_ESTADISTICAS_TABLAS).all():
+        filas_por_tabla[tabla] = filas
+        if filas >= min_filas and seq_scan > idx_scan:
+            lecturas_secuenciales.append({
+                "tabla": tabla,
+                "columnas": [],
+                "origen": (
+                    f"{seq_scan} lecturas secuenciales contra {idx_scan} por índice, "
+                    f"{seq_tup_read // max(seq_scan, 1)} filas en promedio"
+                ),
+                "sugerencia": "Revisar los planes de las consultas sobre esta tabla",
+            })
+
+    particiones = dict(conn.execute(_PARTICIONES).all())
+    sugeridas = set()
+    for nombre, plan in planes.items():
+        for tabla, filtro in _recorridos_completos(plan, particiones):
+            if filas_por_tabla.get(tabla, 0) < min_filas:
+                continue
+            for columna in _columnas_tabla(conn, tabla):
+                if columna in claves_particion[tabla]:
+                    continue
+                patron = re.search(rf"\b{columna}\b\)?(?:::[\w ]+?)?\)?\s*(=|<>|<=|>=|<|>|~~\*|~~|IN|IS)", filtro)
+                if not patron:
+                    continue
+                trigramas = patron.group(1).startswith("~~")
+                if (tabla, columna) in sugeridas or _tiene_indice(
+                    indices, tabla, columna, trigramas, claves_particion[tabla]
+                ):
+                    continue
+                sugeridas.add((tabla, columna))
+                faltantes.append({
+                    "tabla": tabla,
+                    "columnas": [columna],
+                    "origen": f"plan de {nombre}: Seq Scan con Filter {filtro}",
+                    "sugerencia": (
+                        f"CREATE INDEX ON {tabla} USING gin ({columna} gin_trgm_ops)  -- requiere pg_trgm"
+                        if trigramas else f"CREATE INDEX ON {tabla} ({columna})"
+                    ),
+                })
+    return faltantes + lecturas_secuenciales
+
+
+def _resumen(indice: Dict) -> Dict:
+    return {k: indice[k] for k in ("tabla", "indice", "lecturas", "bytes", "definicion")}
+
+
+def analizar_indices(
+    conn: Connection, planes: Optional[Dict[str, str]] = None, max_lecturas: int = 0, min_filas: int = 1000
+) -> Dict:
+    """
+    Reporte de índices sin uso, duplicados y faltantes (solo PostgreSQL).
+    `planes` suma a los planes de las rutas frecuentes otros ya capturados,
+    p. ej. los de las consultas lentas.
+    """
+    if conn.dialect.name != "postgresql":
+        raise ValueError("El asesor de índices requiere PostgreSQL (usa pg_stat_user_indexes)")
+    indices = estadisticas_indices(conn)
+    todos_los_planes = {**planes_consultas_frecuentes(conn), **(planes or {})}
+    desde = conn.execute(text(
+        "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+    )).scalar()
+    return {
+        "estadisticas_desde": desde.isoformat() if desde else None,
+        "indices": len(indices),
+        "bytes_indices": sum(i["bytes"] for i in indices),
+        "sin_uso": indices_sin_uso(indices, max_lecturas),
+        "duplicados": indices_duplicados(indices),
+        "faltantes": indices_faltantes(conn, indices, todos_los_planes, min_filas),
+        "planes": todos_los_planes,
+    }
+
+
+def planes_consultas_lentas(registros: Iterable[Dict]) -> Dict[str, str]:
+    """Planes capturados por el log de consultas lentas, por id de registro"""
+    return {
+        f"consulta lenta #{r['id']} ({r['ruta']})": r["plan"]
+        for r in registros if r.get("plan_estado") == "capturado" and r.get("plan")
+    }
@@ -0,0 +1,134 @@
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import delete, text
+from sqlalchemy.engine import Connection
+from ..models import AsistenciaLog
+
+logger = logging.getLogger(__name__)
+
+# Particiones mensuales de asistencias_log: asistencias_log_AAAA_MM
+TABLA = "asistencias_log"
+PARTICION_DEFAULT = "asistencias_log_default"
+_PATRON_PARTICION = re.compile(r"^asistencias_log_(\d{4})_(\d{2})$")
+
+
+def _mes_actual() -> date:
+    hoy = datetime.now(timezone.utc).date()
+    return date(hoy.year, hoy.month, 1)
+
+
+def _sumar_meses(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes: date) -> str:
+    return f"{TABLA}_{mes:%Y_%m}"
+
+
+def esta_particionada(conn: Connection) -> bool:
+    """La tabla existe y ya pasó por la migración de particiones (solo PostgreSQL)"""
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:tabla))"
+    ), {"tabla": TABLA}).scalar())
+
+
+def listar_particiones(conn: Connection) -> List[Dict]:
+    """Particiones de asistencias_log con sus límites y filas estimadas"""
+    particiones = conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:tabla)
+        ORDER BY c.relname
+    """), {"tabla": TABLA}).all()
+    return [
+        {"nombre": nombre, "limites": limites, "filas_estimadas": max(filas, 0)}
+        for nombre, limites, filas in particiones
+    ]
+
+
+def crear_particion(conn: Connection, mes: date) -> bool:
+    """
+    Crear la partición de un mes si no existe. Se crea como tabla suelta y se
+    adjunta: así las filas de ese mes que hayan caído en la partición default
+    se mueven primero, y ATTACH bloquea la tabla padre menos que PARTITION OF.
+    """
+    nombre = nombre_particion(mes)
+    if conn.execute(text("SELECT to_regclass(:nombre) IS NOT NULL"), {"nombre": nombre}).scalar():
+        return False
+    desde = f"{mes:%Y-%m-%d} 00:00:00+00"
+    hasta = f"{_sumar_meses(mes, 1):%Y-%m-%d} 00:00:00+00"
+    conn.execute(text(f"CREATE TABLE {nombre} (LIKE {TABLA} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    movidas = conn.execute(text(f"""
+        WITH movidas AS (
+            DELETE FROM {PARTICION_DEFAULT}
+            WHERE "timestamp" >= CAST(:desde AS timestamptz) AND "timestamp" < CAST(:hasta AS timestamptz)
+            RETURNING *
+        )
+        INSERT INTO {nombre} SELECT * FROM movidas
+    """), {"desde": desde, "hasta": hasta}).rowcount
+    conn.execute(text(f"ALTER TABLE {TABLA} ATTACH PARTITION {nombre} FOR VALUES FROM ('{desde}') TO ('{hasta}')"))
+    logger.info(f"Partición {nombre} creada ({movidas} filas movidas desde {PARTICION_DEFAULT})")
+    return True
+
+
+def asegurar_particiones(conn: Connection, meses_adelante: int) -> List[str]:
+    """Crear las particiones del mes actual y de los próximos `meses_adelante` meses"""
+    if not esta_particionada(conn):
+        return []
+    mes = _mes_actual()
+    creadas = []
+    for i in range(meses_adelante + 1):
+        if crear_particion(conn, _sumar_meses(mes, i)):
+            creadas.append(nombre_particion(_sumar_meses(mes, i)))
+    return creadas
+
+
+def eliminar_particiones_anteriores(conn: Connection, meses_retencion: int, simular: bool = False) -> List[str]:
+    """
+    Retención: borrar las particiones mensuales que terminan antes del inicio
+    de los últimos `meses_retencion` meses (contando el actual). DETACH + DROP
+    libera el espacio de inmediato, sin el DELETE fila por fila ni el VACUUM.
+    Sin particiones (SQLite) se borra por rango de timestamp.
+    """
+    if meses_retencion < 1:
+        raise ValueError("La retención debe ser de al menos un mes")
+    corte = _sumar_meses(_mes_actual(), -(meses_retencion - 1))
+    if not esta_particionada(conn):
+        if simular:
+            return []
+        borradas = conn.execute(
+            delete(AsistenciaLog).where(AsistenciaLog.timestamp < datetime(corte.year, corte.month, 1, tzinfo=timezone.utc))
+        ).rowcount
+        logger.info(f"Retención de {TABLA}: {borradas} filas anteriores a {corte} eliminadas")
+        return []
+
+    eliminadas = []
+    for particion in listar_particiones(conn):
+        match = _PATRON_PARTICION.match(particion["nombre"])
+        if not match or date(int(match.group(1)), int(match.group(2)), 1) >= corte:
+            continue
+        eliminadas.append(particion["nombre"])
+        if not simular:
+            conn.execute(text(f"ALTER TABLE {TABLA} DETACH PARTITION {particion['nombre']}"))
+            conn.execute(text(f"DROP TABLE {particion['nombre']}"))
+            logger.info(f"Partición {particion['nombre']} eliminada por retención")
+    return eliminadas
+
+
+def preparar_particiones(engine, meses_adelante: int) -> Optional[List[str]]:
+    """
+    Al iniciar el backend: asegurar las particiones de los próximos meses para
+    que las confirmaciones no caigan en la partición default. Un error (base
+    sin migrar, otro proceso creándolas a la vez) no impide arrancar.
+    """
+    try:
+        with engine.begin() as conn:
+            return asegurar_particiones(conn, meses_adelante)
+    except Exception as e:
+        logger.warning(f"No se pudieron preparar las particiones de {TABLA}: {e}")
+        return None
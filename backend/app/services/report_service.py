@@ -0,0 +1,253 @@
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import groupby
+from typing import List, Optional, Tuple
+from openpyxl import Workbook
+from sqlalchemy import case, func, select
+from ..config import settings
+from ..database import engine, SessionLocal
+from ..models import Invitado, Acompanante
+
+logger = logging.getLogger(__name__)
+
+# Nombre de la partición de invitados sin sede o sin campaña
+SIN_SEDE = "Sin sede"
+SIN_CAMPANA = "Sin campaña"
+# Archivo de los invitados sin sede: sin el prefijo "sede_" de las sedes reales,
+# así no choca con una sede que se llame "Sin sede"
+ARCHIVO_SIN_SEDE = "sin_sede.xlsx"
+
+COLUMNAS_RESUMEN = [
+    'sede', 'campana_area', 'invitados', 'invitados_confirmados', 'porcentaje_asistencia',
+    'acompanantes', 'acompanantes_confirmados', 'personas', 'personas_confirmadas'
+]
+COLUMNAS_NO_ASISTIERON = ['cedula', 'nombre', 'eps', 'acompanantes']
+
+# Límite de Excel para nombres de hoja y caracteres que no admite
+MAX_LARGO_HOJA = 31
+_CARACTERES_INVALIDOS_HOJA = re.compile(r'[\[\]:*?/\\]')
+
+
+def _nombre_hoja(nombre: str, usados: set) -> str:
+    base = _CARACTERES_INVALIDOS_HOJA.sub(' ', nombre).strip()[:MAX_LARGO_HOJA] or SIN_CAMPANA
+    candidato, n = base, 2
+    while candidato.lower() in usados:
+        sufijo = f" ({n})"
+        candidato = base[:MAX_LARGO_HOJA - len(sufijo)] + sufijo
+        n += 1
+    usados.add(candidato.lower())
+    return candidato
+
+
+def _nombre_archivo(sede: Optional[str], usados: set) -> str:
+    """
+    Nombre único del Excel de una sede dentro del .zip. Sedes distintas pueden
+    dar el mismo nombre ("Sede Norte" y "Sede/Norte"); se comparan sin
+    mayúsculas porque Windows y macOS no distinguen al descomprimir.
+    """
+    if sede is None:
+        base = ARCHIVO_SIN_SEDE[:-len(".xlsx")]
+    else:
+        base = "sede_" + (re.sub(r'[^\w-]+', '_', sede).strip('_') or "sin_nombre")
+    candidato, n = base, 2
+    while candidato.lower() in usados:
+        candidato = f"{base}_{n}"
+        n += 1
+    usados.add(candidato.lower())
+    return candidato + ".xlsx"
+
+
+def _porcentaje(parte: int, total: int) -> float:
+    return round(100 * parte / total, 1) if total else 0.0
+
+
+def _inicializar_proceso() -> None:
+    """
+    Cada proceso abre sus propias conexiones: las heredadas del padre no se
+    pueden compartir entre procesos (close=False para no cerrarlas en el padre).
+    """
+    engine.dispose(close=False)
+
+
+# Pool compartido por todas las solicitudes del reporte: limita los procesos
+# del servidor aunque lleguen varias a la vez (las sedes esperan en la cola)
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _pool_compartido() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.reporte_max_procesos or os.cpu_count() or 1, initializer=_inicializar_proceso
+            )
+        return _pool
+
+
+def _descartar_pool(pool: ProcessPoolExecutor) -> None:
+    """Un pool roto (un proceso murió) no acepta más tareas: se crea otro en la próxima solicitud"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def cerrar_pool() -> None:
+    """Terminar los procesos del pool compartido (al apagar la aplicación)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def _generar_sede(evento_id: int, sede: Optional[str], directorio: str, archivo: str) -> Tuple[str, List[list]]:
+    """
+    Generar el libro de una sede: una hoja 'Resumen' con la asistencia por
+    campaña y una hoja por campaña con los invitados que no asistieron.
+    Se ejecuta en un proceso del pool; retorna el archivo y las filas de resumen.
+    """
+    nombre_sede = sede or SIN_SEDE
+    acompanantes = func.count(Acompanante.id)
+    acompanantes_confirmados = func.coalesce(func.sum(case((Acompanante.estado_asistencia, 1), else_=0)), 0)
+    consulta = (
+        select(
+            Invitado.cedula, Invitado.nombre, Invitado.campana_area, Invitado.eps,
+            Invitado.estado_asistencia, acompanantes, acompanantes_confirmados
+        )
+        .outerjoin(Invitado.acompanantes)
+        .where(
+            Invitado.evento_id == evento_id,
+            Invitado.sede == sede if sede is not None else Invitado.sede.is_(None)
+        )
+        # En PostgreSQL la clave primaria es (id, evento_id)
+        .group_by(Invitado.id, Invitado.evento_id)
+        .order_by(Invitado.campana_area, Invitado.nombre)
+    )
+    with SessionLocal() as db:
+        filas = db.execute(consulta).all()
+
+    resumen: List[list] = []
+    workbook = Workbook(write_only=True)
+    hoja_resumen = workbook.create_sheet("Resumen")
+    hoja_resumen.append(COLUMNAS_RESUMEN)
+    usados = {"resumen"}
+    for campana, grupo in groupby(filas, key=lambda f: f.campana_area):
+        grupo = list(grupo)
+        invitados = len(grupo)
+        confirmados = sum(1 for f in grupo if f.estado_asistencia)
+        total_acompanantes = sum(f[5] for f in grupo)
+        total_acompanantes_confirmados = sum(f[6] for f in grupo)
+        fila_resumen = [
+            nombre_sede, campana or SIN_CAMPANA, invitados, confirmados, _porcentaje(confirmados, invitados),
+            total_acompanantes, total_acompanantes_confirmados,
+            invitados + total_acompanantes, confirmados + total_acompanantes_confirmados
+        ]
+        resumen.append(fila_resumen)
+        hoja_resumen.append(fila_resumen)
+
+        hoja = workbook.create_sheet(_nombre_hoja(campana or SIN_CAMPANA, usados))
+        hoja.append(COLUMNAS_NO_ASISTIERON)
+        for f in grupo:
+            if not f.estado_asistencia:
+                hoja.append([f.cedula, f.nombre, f.eps, f[5]])
+
+    workbook.save(os.path.join(directorio, archivo))
+    return archivo, resumen
+
+
+class ReportService:
+    """
+    Reporte posterior al evento: un Excel por sede dentro de un .zip, más un
+    resumen general con la asistencia por sede y campaña.
+
+    Cada sede es una partición independiente (consulta filtrada por el índice
+    de sede) que se genera en un proceso distinto del pool. Solo se leen los
+    invitados del evento indicado. Sin `procesos` se usa el pool compartido
+    del servidor; con `procesos` (scripts) se crea uno propio de ese tamaño.
+    """
+
+    def __init__(self, evento_id: int, procesos: Optional[int] = None):
+        self.evento_id = evento_id
+        self.pool_propio = procesos is not None
+        self.procesos = procesos or settings.reporte_max_procesos or os.cpu_count() or 1
+
+    def sedes(self) -> List[Optional[str]]:
+        with SessionLocal() as db:
+            sedes = db.execute(select(Invitado.sede).where(Invitado.evento_id == self.evento_id).distinct()).scalars()
+            # Los invitados sin sede van al final en cualquier motor
+            return sorted(sedes, key=lambda sede: (sede is None, sede or ""))
+
+    def generar_zip(self, ruta_zip: str) -> int:
+        """Escribir el reporte en ruta_zip; retorna el número de sedes"""
+        sedes = self.sedes()
+        directorio = tempfile.mkdtemp(prefix="reporte_")
+        try:
+            resultados = self._generar_particiones(sedes, directorio)
+
+            self._escribir_resumen(
+                os.path.join(directorio, "resumen_general.xlsx"), [filas for _, filas in resultados]
+            )
+
+            with zipfile.ZipFile(ruta_zip, "w", compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+                archivo_zip.write(os.path.join(directorio, "resumen_general.xlsx"), "resumen_general.xlsx")
+                for archivo, _ in resultados:
+                    archivo_zip.write(os.path.join(directorio, archivo), archivo)
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        logger.info(f"Reporte por sedes generado: {len(sedes)} sedes con {self.procesos} procesos")
+        return len(sedes)
+
+    def _generar_particiones(self, sedes: List[Optional[str]], directorio: str) -> List[Tuple[str, List[list]]]:
+        usados: set = set()
+        archivos = [_nombre_archivo(sede, usados) for sede in sedes]
+        argumentos = ([self.evento_id] * len(sedes), sedes, [directorio] * len(sedes), archivos)
+        if self.procesos == 1 or len(sedes) <= 1:
+            return list(map(_generar_sede, *argumentos))
+        if self.pool_propio:
+            with ProcessPoolExecutor(
+                max_workers=min(self.procesos, len(sedes)), initializer=_inicializar_proceso
+            ) as pool:
+                # map conserva el orden de las sedes
+                return list(pool.map(_generar_sede, *argumentos))
+        pool = _pool_compartido()
+        try:
+            return list(pool.map(_generar_sede, *argumentos))
+        except BrokenProcessPool:
+            _descartar_pool(pool)
+            raise
+
+    @staticmethod
+    def _escribir_resumen(ruta: str, resumenes: List[List[list]]) -> None:
+        workbook = Workbook(write_only=True)
+        hoja = workbook.create_sheet("Resumen")
+        hoja.append(COLUMNAS_RESUMEN)
+        for filas in resumenes:
+            for fila in filas:
+                hoja.append(fila)
+
+        # Totales por sede; se agrupa por libro para no mezclar los invitados
+        # sin sede con una sede que se llame igual
+        hoja_sedes = workbook.create_sheet("Por sede")
+        hoja_sedes.append([c for c in COLUMNAS_RESUMEN if c != 'campana_area'])
+        for filas in resumenes:
+            if not filas:
+                continue
+            sede = filas[0][0]
+            invitados = sum(f[2] for f in filas)
+            confirmados = sum(f[3] for f in filas)
+            hoja_sedes.append([
+                sede, invitados, confirmados, _porcentaje(confirmados, invitados),
+                *(sum(f[i] for f in filas) for i in range(5, 9))
+            ])
+        workbook.save(ruta)
@@ -0,0 +1,207 @@
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import column, event, func, insert, literal, select, table, text
+from sqlalchemy.orm import Session
+from ..models import Invitado, Acompanante, CambioSync
+from ..schemas import CambiosResponse, CambiosEliminados
+
+# Entidades sincronizables y el nombre con el que se registran en cambios_sync
+ENTIDADES = {
+    Invitado: "invitado",
+    Acompanante: "acompanante",
+}
+
+# El id de cambios_sync es el cursor de /changes (y la versión de los ETag):
+# un cliente que leyó hasta el id N no vuelve a pedir ids menores, así que
+# los ids deben hacerse visibles en orden. Con un SERIAL común no es así: dos
+# kioscos pueden tomar los ids 10 y 11 y confirmar primero el 11.
+# En PostgreSQL cada transacción guarda sus cambios al confirmar, después del
+# último flush, bajo un lock transaccional que se libera tras el COMMIT: la
+# siguiente recibe ids mayores y se hace visible después. El lock se toma
+# cuando ya no quedan UPDATE ni DELETE por hacer, así que no forma ciclos con
+# los locks de fila y solo se retiene durante el INSERT y el COMMIT.
+# En SQLite las escrituras ya están serializadas y se insertan de inmediato.
+_CLAVE_ORDEN_CAMBIOS = 2026
+_FILAS_PENDIENTES = "cambios_sync_filas"
+_TABLA_PENDIENTES = "cambios_sync_tabla"
+TABLA_PENDIENTES = "cambios_pendientes"
+
+
+def _ordenar_al_confirmar(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _encolar(db: Session, filas: List[dict]) -> None:
+    if not filas:
+        return
+    if _ordenar_al_confirmar(db):
+        db.info.setdefault(_FILAS_PENDIENTES, []).extend(filas)
+    else:
+        db.connection().execute(insert(CambioSync.__table__), filas)
+
+
+def tabla_pendientes(db: Session) -> str:
+    """
+    Tabla temporal (solo PostgreSQL) donde las escrituras masivas dejan sus
+    cambios con INSERT ... SELECT; pasan a cambios_sync al confirmar, en el
+    orden en que se agregaron. Retorna su nombre.
+    """
+    if not db.info.get(_TABLA_PENDIENTES):
+        db.connection().execute(text(f"""
+            CREATE TEMP TABLE {TABLA_PENDIENTES} (
+                orden bigserial, evento_id integer, entidad varchar(20), entidad_id integer, operacion varchar(10)
+            ) ON COMMIT DROP
+        """))
+        db.info[_TABLA_PENDIENTES] = True
+    return TABLA_PENDIENTES
+
+
+@event.listens_for(Session, "before_commit")
+def _guardar_cambios_pendientes(session: Session) -> None:
+    """Insertar en cambios_sync los cambios de la transacción, en orden de confirmación"""
+    # commit() hace su último flush después de este evento; se adelanta para
+    # que after_flush encole lo que quede por enviar
+    session.flush()
+    filas = session.info.pop(_FILAS_PENDIENTES, None)
+    tabla = session.info.pop(_TABLA_PENDIENTES, None)
+    if not filas and not tabla:
+        return
+    conn = session.connection()
+    conn.execute(select(func.pg_advisory_xact_lock(_CLAVE_ORDEN_CAMBIOS)))
+    if filas:
+        conn.execute(insert(CambioSync.__table__), filas)
+    if tabla:
+        conn.execute(text(f"""
+            INSERT INTO cambios_sync (evento_id, entidad, entidad_id, operacion)
+            SELECT evento_id, entidad, entidad_id, operacion FROM {TABLA_PENDIENTES} ORDER BY orden
+        """))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _descartar_cambios_pendientes(session: Session, transaction) -> None:
+    """Los cambios de una transacción revertida no se registran"""
+    if transaction.parent is None:
+        session.info.pop(_FILAS_PENDIENTES, None)
+        session.info.pop(_TABLA_PENDIENTES, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_cambios_orm(session: Session, flush_context) -> None:
+    """
+    Registra las filas insertadas, modificadas o eliminadas a través del
+    ORM. En after_flush las colecciones new/dirty/deleted aún reflejan el
+    estado previo al flush y los objetos nuevos ya tienen id.
+    """
+    filas = []
+    for obj in session.new:
+        entidad = ENTIDADES.get(type(obj))
+        if entidad:
+            filas.append({"evento_id": obj.evento_id, "entidad": entidad, "entidad_id": obj.id, "operacion": "upsert"})
+
+    for obj in session.dirty:
+        entidad = ENTIDADES.get(type(obj))
+        if entidad and session.is_modified(obj, include_collections=False):
+            filas.append({"evento_id": obj.evento_id, "entidad": entidad, "entidad_id": obj.id, "operacion": "upsert"})
+
+    for obj in session.deleted:
+        entidad = ENTIDADES.get(type(obj))
+        if entidad:
+            filas.append({"evento_id": obj.evento_id, "entidad": entidad, "entidad_id": obj.id, "operacion": "delete"})
+
+    _encolar(session, filas)
+
+
+def registrar_cambios(db: Session, modelo, ids: Iterable[int], evento_id: int, operacion: str = "upsert") -> None:
+    """
+    Registra cambios hechos por rutas que no pasan por el flush del ORM
+    (inserciones masivas, SQL directo).
+    """
+    entidad = ENTIDADES[modelo]
+    _encolar(db, [
+        {"evento_id": evento_id, "entidad": entidad, "entidad_id": id_, "operacion": operacion} for id_ in ids
+    ])
+
+
+def registrar_eliminacion_masiva(db: Session, modelo, evento_id: int) -> None:
+    """
+    Crea tombstones para todas las filas del evento en la tabla del modelo.
+    Debe llamarse antes de un DELETE masivo, en la misma transacción.
+    """
+    entidad = ENTIDADES[modelo]
+    destino = CambioSync.__table__
+    if _ordenar_al_confirmar(db):
+        destino = table(
+            tabla_pendientes(db), column("evento_id"), column("entidad"), column("entidad_id"), column("operacion")
+        )
+    db.execute(
+        insert(destino).from_select(
+            ["evento_id", "entidad", "entidad_id", "operacion"],
+            select(literal(evento_id), literal(entidad), modelo.id, literal("delete"))
+            .where(modelo.evento_id == evento_id)
+            .order_by(modelo.id)
+        )
+    )
+
+
+class SyncService:
+    def __init__(self, db: Session, evento_id: int):
+        self.db = db
+        self.evento_id = evento_id
+
+    def obtener_cambios(self, since: int, limite: int) -> CambiosResponse:
+        """
+        Obtiene los cambios del evento posteriores al cursor `since`.
+        Varias operaciones sobre la misma fila se consolidan en la última.
+        Los ids se hacen visibles en orden, así que un id no aparece después
+        de que un cliente avanzó su cursor más allá de él.
+        """
+        registros = self.db.execute(
+            select(CambioSync.id, CambioSync.entidad, CambioSync.entidad_id, CambioSync.operacion)
+            .where(CambioSync.evento_id == self.evento_id, CambioSync.id > since)
+            .order_by(CambioSync.id)
+            .limit(limite + 1)
+        ).all()
+
+        hay_mas = len(registros) > limite
+        registros = registros[:limite]
+        cursor = registros[-1].id if registros else since
+
+        # Consolidar: la última operación de cada fila es la que cuenta
+        ultimas: Dict[Tuple[str, int], str] = {}
+        for registro in registros:
+            ultimas[(registro.entidad, registro.entidad_id)] = registro.operacion
+
+        invitados = self._filas_actuales(Invitado, ultimas)
+        acompanantes = self._filas_actuales(Acompanante, ultimas)
+
+        # Una fila marcada como upsert que ya no existe fue eliminada después
+        eliminados = CambiosEliminados(
+            invitados=self._eliminados("invitado", ultimas, {i.id for i in invitados}),
+            acompanantes=self._eliminados("acompanante", ultimas, {a.id for a in acompanantes}),
+        )
+
+        return CambiosResponse(
+            cursor=cursor,
+            hay_mas=hay_mas,
+            invitados=invitados,
+            acompanantes=acompanantes,
+            eliminados=eliminados,
+        )
+
+    def _filas_actuales(self, modelo, ultimas: Dict[Tuple[str, int], str]) -> List:
+        entidad = ENTIDADES[modelo]
+        ids = [id_ for (ent, id_), op in ultimas.items() if ent == entidad and op == "upsert"]
+        if not ids:
+            return []
+        return (
+            self.db.query(modelo)
+            .filter(modelo.evento_id == self.evento_id, modelo.id.in_(ids))
+            .order_by(modelo.id)
+            .all()
+        )
+
+    @staticmethod
+    def _eliminados(entidad: str, ultimas: Dict[Tuple[str, int], str], existentes: set) -> List[int]:
+        return sorted(
+            id_ for (ent, id_), op in ultimas.items()
+            if ent == entidad and (op == "delete" or id_ not in existentes)
+        )
@@ -1,10 +1,22 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 import bcrypt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..database import get_async_db
 from ..models import Usuario
-from ..schemas.auth import TokenData
+from ..schemas.auth import TokenData, User
+from .hashing import ejecutar_hash
+
+logger = logging.getLogger(__name__)
 
 # Configuración JWT
 SECRET_KEY = "your-secret-key-change-this-in-production-make-it-very-long-and-random"
@@ -29,7 +41,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         # Verificar con bcrypt directamente
         return bcrypt.checkpw(plain_password_bytes, hashed_password_bytes)
     except Exception as e:
-        print(f"Error verifying password: {e}")
+        logger.warning(f"Error verificando contraseña: {e}")
         return False
 
 
@@ -42,27 +54,62 @@ def get_password_hash(password: str) -> str:
         else:
             password_bytes = password
         
-        # Generar salt y hash
-        salt = bcrypt.gensalt(rounds=12)
+        # Generar salt y hash con el costo configurado
+        salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
         hashed = bcrypt.hashpw(password_bytes, salt)
         
         # Retornar como string
         return hashed.decode('utf-8')
     except Exception as e:
-        print(f"Error hashing password: {e}")
+        logger.exception(f"Error hasheando contraseña: {e}")
         raise
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[Usuario]:
-    """Autenticar usuario"""
-    user = db.query(Usuario).filter(Usuario.username == username).first()
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password en el pool de hashing, para usar desde rutas async"""
+    return await ejecutar_hash(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash en el pool de hashing, para usar desde rutas async"""
+    return await ejecutar_hash(get_password_hash, password)
+
+
+def get_hash_rounds(hashed_password: str) -> Optional[int]:
+    """Costo de un hash bcrypt ($2b$<costo>$...); None si no tiene ese formato"""
+    partes = hashed_password.split('$')
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[Usuario]:
+    """
+    Autenticar usuario; bcrypt corre fuera del event loop.
+    Si el hash guardado tiene un costo distinto de settings.bcrypt_rounds,
+    se vuelve a hashear con la contraseña recién verificada.
+    """
+    user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
+    if get_hash_rounds(user.hashed_password) != settings.bcrypt_rounds:
+        await _rehash_password(db, user, password)
     return user
 
 
+async def _rehash_password(db: AsyncSession, user: Usuario, password: str) -> None:
+    """Actualizar el hash al costo configurado; si falla, el login sigue siendo válido"""
+    try:
+        user.hashed_password = await get_password_hash_async(password)
+        await db.commit()
+        logger.info(f"Hash de '{user.username}' actualizado a costo {settings.bcrypt_rounds}")
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"No se pudo actualizar el hash de '{user.username}': {e}")
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crear token JWT"""
     to_encode = data.copy()
@@ -76,6 +123,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def decode_token(token: str) -> Optional[dict]:
+    """Decodificar y validar el token JWT (firma y expiración); None si no es válido"""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
 def verify_token(token: str) -> Optional[TokenData]:
     """Verificar token JWT"""
     try:
@@ -89,6 +144,104 @@ def verify_token(token: str) -> Optional[TokenData]:
         return None
 
 
-def get_user_by_username(db: Session, username: str) -> Optional[Usuario]:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[Usuario]:
     """Obtener usuario por username"""
-    return db.query(Usuario).filter(Usuario.username == username).first()
+    resultado = await db.execute(select(Usuario).where(Usuario.username == username).limit(1))
+    return resultado.scalars().first()
+
+
+class _CachePrincipales:
+    """
+    Caché en memoria de token -> (claims, usuario), acotada en tamaño (LRU) y
+    con vencimiento en la expiración del token. Es por proceso: cada worker
+    de uvicorn tiene la suya y las invalidaciones son locales.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, Tuple[float, dict, User]]" = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, token: str) -> Optional[User]:
+        with self._lock:
+            entrada = self._entradas.get(token)
+            if entrada is None or entrada[0] <= time.monotonic():
+                self._entradas.pop(token, None)
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(token)
+            self.aciertos += 1
+            return entrada[2]
+
+    def guardar(self, token: str, claims: dict, usuario: User) -> None:
+        # exp es un timestamp UTC; se traduce al reloj monotónico
+        vigencia = claims.get("exp", time.time()) - time.time()
+        vigencia = min(vigencia, settings.auth_cache_ttl_max_segundos)
+        if vigencia <= 0:
+            return
+        with self._lock:
+            self._entradas[token] = (time.monotonic() + vigencia, claims, usuario)
+            self._entradas.move_to_end(token)
+            while len(self._entradas) > settings.auth_cache_max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar_usuario(self, usuario_id: int) -> None:
+        with self._lock:
+            for token in [t for t, (_, _, u) in self._entradas.items() if u.id == usuario_id]:
+                del self._entradas[token]
+
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": settings.auth_cache_max_entradas,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+            }
+
+
+security = HTTPBearer()
+_cache_principales = _CachePrincipales()
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Dependencia de autenticación. Con el token en caché no hace consultas:
+    la sesión de get_async_db no abre conexión hasta la primera consulta.
+    """
+    token = credentials.credentials
+    usuario = _cache_principales.obtener(token)
+    if usuario is not None:
+        return usuario
+
+    claims = decode_token(token)
+    if claims is None or claims.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user = await get_user_by_username(db, claims["sub"])
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario no encontrado"
+        )
+
+    usuario = User.model_validate(user)
+    _cache_principales.guardar(token, claims, usuario)
+    return usuario
+
+
+def invalidar_usuario(usuario_id: int) -> None:
+    """Descartar de la caché los tokens del usuario (al actualizarlo o eliminarlo)"""
+    _cache_principales.invalidar_usuario(usuario_id)
+
+
+def estadisticas_cache_principales() -> Dict:
+    return _cache_principales.estadisticas()
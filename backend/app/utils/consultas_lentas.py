@@ -0,0 +1,182 @@
+import itertools
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Deque, Dict, Optional
+from sqlalchemy.engine import Engine
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Límites para no guardar sentencias ni listas de parámetros enormes
+MAX_LARGO_SENTENCIA = 4000
+MAX_PARAMETROS_DESCRITOS = 20
+# Tiempo máximo de un EXPLAIN ANALYZE en PostgreSQL
+TIMEOUT_EXPLAIN_MS = 30000
+
+# Un solo hilo captura los planes: si está ocupado, el siguiente se omite
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+_lock = threading.Lock()
+_registros: Deque[dict] = deque(maxlen=settings.consultas_lentas_max_registros)
+_ids = itertools.count(1)
+_ultimo_explain: Dict[str, float] = {}
+_explain_en_curso = False
+_total = 0
+
+
+def _forma(valor) -> str:
+    if valor is None:
+        return "None"
+    if isinstance(valor, (str, bytes)):
+        return f"{type(valor).__name__}({len(valor)})"
+    if isinstance(valor, (list, tuple)):
+        return f"{type(valor).__name__}[{len(valor)}]"
+    return type(valor).__name__
+
+
+def forma_parametros(parametros, executemany: bool = False):
+    """
+    Tipos y largos de los parámetros, sin sus valores: en el log no quedan
+    cédulas ni nombres, pero se ve si una búsqueda llegó con un patrón largo
+    o un IN con cientos de ids.
+    """
+    if executemany:
+        return {"filas": len(parametros), "primera": forma_parametros(parametros[0]) if parametros else None}
+    if isinstance(parametros, dict):
+        formas = {clave: _forma(valor) for clave, valor in itertools.islice(parametros.items(), MAX_PARAMETROS_DESCRITOS)}
+        if len(parametros) > MAX_PARAMETROS_DESCRITOS:
+            formas["..."] = f"+{len(parametros) - MAX_PARAMETROS_DESCRITOS}"
+        return formas
+    if isinstance(parametros, (list, tuple)):
+        formas = [_forma(valor) for valor in parametros[:MAX_PARAMETROS_DESCRITOS]]
+        if len(parametros) > MAX_PARAMETROS_DESCRITOS:
+            formas.append(f"... (+{len(parametros) - MAX_PARAMETROS_DESCRITOS})")
+        return formas
+    return _forma(parametros)
+
+
+def _a_formato_psycopg(sentencia: str, parametros) -> tuple:
+    """Sentencia de asyncpg ($1, $2) con placeholders de psycopg2 (%s) y sus valores en orden"""
+    valores = []
+
+    def reemplazar(match):
+        valores.append(parametros[int(match.group(1)) - 1])
+        return "%s"
+
+    return re.sub(r"\$(\d+)", reemplazar, sentencia.replace("%", "%%")), tuple(valores)
+
+
+def _capturar_plan(motor: Engine, registro: dict, sentencia: str, parametros, paramstyle: str) -> None:
+    """
+    Ejecutar el EXPLAIN en una conexión aparte de `motor`, la misma base donde
+    corrió la consulta (la réplica para las lecturas de la réplica), fuera de
+    la petición. En PostgreSQL es EXPLAIN (ANALYZE, BUFFERS): si el plan
+    ejecuta rápido y la consulta original tardó, el tiempo se fue esperando
+    bloqueos.
+    """
+    global _explain_en_curso
+    try:
+        postgres = motor.dialect.name == "postgresql"
+        if paramstyle == "numeric_dollar":
+            sentencia, parametros = _a_formato_psycopg(sentencia, parametros)
+        conexion = motor.raw_connection()
+        try:
+            cursor = conexion.cursor()
+            if postgres:
+                cursor.execute(f"SET LOCAL statement_timeout = {TIMEOUT_EXPLAIN_MS}")
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sentencia, parametros)
+                plan = "\n".join(fila[0] for fila in cursor.fetchall())
+            else:
+                cursor.execute("EXPLAIN QUERY PLAN " + sentencia, parametros)
+                plan = "\n".join(str(fila[-1]) for fila in cursor.fetchall())
+            cursor.close()
+            # El ANALYZE ejecutó la consulta: no dejar nada de esa transacción
+            conexion.rollback()
+        finally:
+            conexion.close()
+        with _lock:
+            registro.update(plan=plan, plan_estado="capturado")
+        logger.info(f"Plan de la consulta lenta #{registro['id']}:\n{plan}")
+    except Exception as e:
+        with _lock:
+            registro.update(plan_estado="error", plan=str(e))
+        logger.warning(f"No se pudo capturar el plan de la consulta lenta #{registro['id']}: {e}")
+    finally:
+        with _lock:
+            _explain_en_curso = False
+
+
+def _decidir_explain(sentencia: str, executemany: bool, opciones: dict) -> str:
+    """
+    Estado inicial del plan. Solo se explican SELECT (ANALYZE ejecuta la
+    sentencia), una fracción de las lentas, cada sentencia a lo sumo una vez
+    por intervalo y una a la vez.
+    """
+    global _explain_en_curso
+    if executemany or opciones.get("stream_results") or not sentencia.lstrip().upper().startswith("SELECT"):
+        return "no_aplica"
+    if random.random() >= settings.consultas_lentas_muestreo_explain:
+        return "no_muestreado"
+    ahora = time.monotonic()
+    with _lock:
+        if ahora - _ultimo_explain.get(sentencia, -float("inf")) < settings.consultas_lentas_explain_intervalo_s:
+            return "reciente"
+        if _explain_en_curso:
+            return "ocupado"
+        _explain_en_curso = True
+        _ultimo_explain[sentencia] = ahora
+        if len(_ultimo_explain) > settings.consultas_lentas_max_registros:
+            _ultimo_explain.pop(next(iter(_ultimo_explain)))
+    return "pendiente"
+
+
+def registrar_consulta_lenta(
+    engine: str, paramstyle: str, sentencia: str, parametros, executemany: bool,
+    opciones: dict, segundos: float, ruta: str
+) -> None:
+    """Registrar una sentencia que superó el umbral y, si toca, capturar su plan"""
+    global _total
+    plan_estado = _decidir_explain(sentencia, executemany, opciones)
+    registro = {
+        "id": next(_ids),
+        "fecha": datetime.now(timezone.utc).isoformat(),
+        "duracion_ms": round(segundos * 1000, 1),
+        "engine": engine,
+        "ruta": ruta,
+        "sentencia": sentencia[:MAX_LARGO_SENTENCIA],
+        "parametros": forma_parametros(parametros, executemany),
+        "plan_estado": plan_estado,
+        "plan": None,
+    }
+    with _lock:
+        _registros.append(registro)
+        _total += 1
+    logger.warning(
+        f"Consulta lenta #{registro['id']} ({registro['duracion_ms']} ms) en {ruta}: "
+        f"{' '.join(sentencia.split())[:500]} parámetros={registro['parametros']}"
+    )
+    if plan_estado == "pendiente":
+        from .. import database
+        _executor.submit(_capturar_plan, database.engines_explain[engine], registro, sentencia, parametros, paramstyle)
+
+
+def consultas_lentas(limite: int = 50, ruta: Optional[str] = None, solo_con_plan: bool = False) -> Dict:
+    """Consultas lentas más recientes primero, con su plan si se capturó"""
+    with _lock:
+        registros = [dict(r) for r in reversed(_registros)]
+        total = _total
+    if ruta:
+        registros = [r for r in registros if r["ruta"] == ruta]
+    if solo_con_plan:
+        registros = [r for r in registros if r["plan_estado"] == "capturado"]
+    return {
+        "umbral_ms": settings.consultas_lentas_umbral_ms,
+        "muestreo_explain": settings.consultas_lentas_muestreo_explain,
+        "total_registradas": total,
+        "consultas": registros[:limite],
+    }
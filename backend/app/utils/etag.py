@@ -0,0 +1,58 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models import CambioSync
+
+# Se consulta en cada lectura con ETag: se construye una sola vez
+_VERSION_DATOS = select(func.max(CambioSync.id))
+
+
+def get_data_version(db: Session) -> int:
+    """
+    Versión de los datos de invitados/acompañantes.
+    Toda ruta de escritura registra en cambios_sync, así que el último id del
+    feed cambia con cada escritura. Los ids se asignan en orden de confirmación
+    (ver sync_service), por lo que una escritura que confirma después de otra
+    siempre sube la versión. Es una lectura del índice de la PK.
+    """
+    return db.execute(_VERSION_DATOS).scalar() or 0
+
+
+async def get_data_version_async(db: AsyncSession) -> int:
+    """get_data_version con una sesión async"""
+    return (await db.execute(_VERSION_DATOS)).scalar() or 0
+
+
+def make_etag(version: int, *partes: str) -> str:
+    """Construir un ETag fuerte a partir de la versión y los parámetros de la respuesta"""
+    if not partes:
+        return f'"v{version}"'
+    digest = hashlib.sha1("\x1f".join(partes).encode("utf-8")).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Verificar si el ETag coincide con alguno de los enviados en If-None-Match"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: un proxy que comprime puede devolver W/"..."
+    candidatos = [valor.strip() for valor in if_none_match.split(",")]
+    return any(c == etag or c == f"W/{etag}" for c in candidatos)
+
+
+def check_not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Retorna una respuesta 304 si el cliente ya tiene la versión actual.
+    En caso contrario agrega el ETag a la respuesta y retorna None.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from fastapi import Header, HTTPException, Query
+from sqlalchemy import select
+from .. import database
+from ..config import settings
+from ..models import Evento
+
+# Evento de la petición; sin él (ni el parámetro evento_id) se usa el activo
+HEADER_EVENTO = "X-Evento-Id"
+
+# Se consulta a lo sumo cada evento_cache_ttl_s segundos: se construye una sola vez
+_EVENTOS = select(Evento.id, Evento.activo, Evento.archivado)
+
+
+class _CacheEventos:
+    """
+    Eventos conocidos (id -> archivado) y el activo, en memoria.
+    Cambian pocas veces al año y se necesitan en cada petición: se recargan
+    al vencer el TTL o al pedir un evento que no está en la caché. Las rutas
+    de eventos la invalidan en el proceso que atiende el cambio; los demás
+    workers lo ven al vencer el TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._eventos: Dict[int, bool] = {}
+        self._activo: Optional[int] = None
+        self._vence = 0.0
+
+    def necesita_recarga(self, solicitado: Optional[int]) -> bool:
+        with self._lock:
+            return time.monotonic() >= self._vence or (solicitado is not None and solicitado not in self._eventos)
+
+    def actualizar(self, filas: Iterable) -> None:
+        eventos = {}
+        activo = None
+        for id_, es_activo, archivado in filas:
+            eventos[id_] = archivado
+            if es_activo:
+                activo = id_
+        with self._lock:
+            self._eventos = eventos
+            self._activo = activo
+            self._vence = time.monotonic() + settings.evento_cache_ttl_s
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._vence = 0.0
+
+    def resolver(self, solicitado: Optional[int]) -> int:
+        """Evento de la petición; lanza 404/409 si no existe, está archivado o no hay uno activo"""
+        with self._lock:
+            if solicitado is None:
+                if self._activo is None:
+                    raise HTTPException(
+                        status_code=409,
+                        detail=f"No hay un evento activo: active uno o indique {HEADER_EVENTO}"
+                    )
+                return self._activo
+            if solicitado not in self._eventos:
+                raise HTTPException(status_code=404, detail=f"El evento {solicitado} no existe")
+            if self._eventos[solicitado]:
+                raise HTTPException(status_code=404, detail=f"El evento {solicitado} está archivado")
+            return solicitado
+
+
+_cache = _CacheEventos()
+
+
+async def evento_actual(
+    evento_id: Optional[int] = Query(None, ge=1, description="Evento a consultar (por defecto, el activo)"),
+    x_evento_id: Optional[int] = Header(None, alias=HEADER_EVENTO, ge=1),
+) -> int:
+    """
+    Dependency: id del evento de la petición (parámetro evento_id, header
+    X-Evento-Id o el activo). Sirve también a las rutas síncronas: solo toca
+    la base al recargar la caché.
+    """
+    solicitado = evento_id if evento_id is not None else x_evento_id
+    if _cache.necesita_recarga(solicitado):
+        async with database.AsyncSessionLocal() as db:
+            _cache.actualizar((await db.execute(_EVENTOS)).all())
+    return _cache.resolver(solicitado)
+
+
+def invalidar_eventos() -> None:
+    """Descartar la caché después de crear, activar o eliminar un evento"""
+    _cache.invalidar()
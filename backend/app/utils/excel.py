@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+import pandas as pd
+from fastapi import UploadFile
+from openpyxl import load_workbook
+
+# Tamaño de bloque al copiar el upload a disco
+TAMANO_BLOQUE_COPIA = 1024 * 1024
+
+
+def guardar_temporal(upload: UploadFile) -> str:
+    """
+    Copia el upload a un archivo temporal por bloques y retorna su ruta.
+    Quien llama es responsable de eliminar el archivo.
+    """
+    sufijo = os.path.splitext(upload.filename or "")[1]
+    with tempfile.NamedTemporaryFile(suffix=sufijo, delete=False) as destino:
+        upload.file.seek(0)
+        shutil.copyfileobj(upload.file, destino, TAMANO_BLOQUE_COPIA)
+        return destino.name
+
+
+@contextmanager
+def archivo_temporal(upload: UploadFile) -> Iterator[str]:
+    """Igual que guardar_temporal, pero elimina el archivo al salir del contexto"""
+    ruta = guardar_temporal(upload)
+    try:
+        yield ruta
+    finally:
+        os.remove(ruta)
+
+
+def leer_y_eliminar(ruta: str) -> Iterator[bytes]:
+    """Entregar un archivo temporal por bloques y eliminarlo al terminar"""
+    try:
+        with open(ruta, "rb") as origen:
+            while True:
+                bloque = origen.read(TAMANO_BLOQUE_COPIA)
+                if not bloque:
+                    break
+                yield bloque
+    finally:
+        os.remove(ruta)
+
+
+class LectorExcel:
+    """
+    Lector de libros Excel que abre el archivo una sola vez.
+
+    En modo normal cada hoja se parsea una vez con el mismo pd.ExcelFile.
+    En modo streaming (solo .xlsx) las filas se leen con openpyxl read-only
+    y se entregan en DataFrames de tamaño fijo, así la memoria no depende
+    del número de filas.
+    """
+
+    def __init__(self, ruta: str, streaming: bool = False):
+        self.streaming = streaming and ruta.lower().endswith(".xlsx")
+        self._hojas: Dict[str, pd.DataFrame] = {}
+        if self.streaming:
+            self._workbook = load_workbook(ruta, read_only=True, data_only=True)
+            self.sheet_names: List[str] = self._workbook.sheetnames
+        else:
+            self._excel_file = pd.ExcelFile(ruta)
+            self.sheet_names = self._excel_file.sheet_names
+
+    def __enter__(self) -> "LectorExcel":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._hojas.clear()
+        if self.streaming:
+            self._workbook.close()
+        else:
+            self._excel_file.close()
+
+    def columnas(self, hoja: str) -> List[str]:
+        """Nombres de columna de la hoja (fila de encabezado)"""
+        if self.streaming:
+            encabezado = next(self._workbook[hoja].iter_rows(max_row=1, values_only=True), ())
+            return self._nombres_columna(encabezado)
+        return list(self._parsear(hoja).columns)
+
+    def total_filas(self, hoja: str) -> Optional[int]:
+        """Filas de datos de la hoja; en streaming es la dimensión declarada y puede no existir"""
+        if self.streaming:
+            max_row = self._workbook[hoja].max_row
+            return max_row - 1 if max_row else None
+        return len(self._parsear(hoja))
+
+    def leer_por_partes(self, hoja: str, tamano: int) -> Iterator[pd.DataFrame]:
+        """Entregar la hoja en DataFrames de a lo sumo `tamano` filas"""
+        if not self.streaming:
+            df = self._parsear(hoja)
+            # La hoja ya no se necesita en caché una vez entregada
+            self._hojas.pop(hoja, None)
+            for inicio in range(0, len(df), tamano):
+                yield df.iloc[inicio:inicio + tamano]
+            return
+
+        filas = self._workbook[hoja].iter_rows(values_only=True)
+        columnas = self._nombres_columna(next(filas, ()))
+        # El índice es la posición de la fila de datos en la hoja, como en modo normal,
+        # para que los reportes de errores apunten a la fila correcta
+        parte, posiciones = [], []
+        for posicion, fila in enumerate(filas):
+            if all(valor is None for valor in fila):
+                continue
+            parte.append(fila[:len(columnas)])
+            posiciones.append(posicion)
+            if len(parte) >= tamano:
+                yield pd.DataFrame(parte, columns=columnas, index=posiciones)
+                parte, posiciones = [], []
+        if parte:
+            yield pd.DataFrame(parte, columns=columnas, index=posiciones)
+
+    def _parsear(self, hoja: str) -> pd.DataFrame:
+        if hoja not in self._hojas:
+            self._hojas[hoja] = self._excel_file.parse(hoja)
+        return self._hojas[hoja]
+
+    @staticmethod
+    def _nombres_columna(encabezado) -> List[Optional[str]]:
+        return [str(valor) if valor is not None else None for valor in encabezado]
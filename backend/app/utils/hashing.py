@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, TypeVar
+from ..config import settings
+from .metricas import percentiles
+
+T = TypeVar("T")
+
+# Operaciones recientes usadas para los percentiles de las métricas
+MUESTRAS_METRICAS = 1000
+
+
+class HashingSaturado(Exception):
+    """La cola de hashing está llena; el cliente debe reintentar más tarde"""
+
+
+class _MetricasHashing:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.en_cola = 0
+        self.en_ejecucion = 0
+        self.completadas = 0
+        self.rechazadas = 0
+        self.espera_max_ms = 0.0
+        self._esperas: Deque[float] = deque(maxlen=MUESTRAS_METRICAS)
+        self._duraciones: Deque[float] = deque(maxlen=MUESTRAS_METRICAS)
+
+    def encolar(self, max_en_cola: int) -> None:
+        with self._lock:
+            if self.en_cola + self.en_ejecucion >= max_en_cola:
+                self.rechazadas += 1
+                raise HashingSaturado("Demasiadas operaciones de contraseña en curso")
+            self.en_cola += 1
+
+    def iniciar(self, espera_ms: float) -> None:
+        with self._lock:
+            self.en_cola -= 1
+            self.en_ejecucion += 1
+            self._esperas.append(espera_ms)
+            self.espera_max_ms = max(self.espera_max_ms, espera_ms)
+
+    def terminar(self, duracion_ms: float) -> None:
+        with self._lock:
+            self.en_ejecucion -= 1
+            self.completadas += 1
+            self._duraciones.append(duracion_ms)
+
+    def descartar(self) -> None:
+        """La operación se canceló antes de empezar"""
+        with self._lock:
+            self.en_cola -= 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "hilos": settings.hash_max_hilos,
+                "max_en_cola": settings.hash_max_en_cola,
+                "en_cola": self.en_cola,
+                "en_ejecucion": self.en_ejecucion,
+                "completadas": self.completadas,
+                "rechazadas": self.rechazadas,
+                "espera_ms": percentiles(self._esperas, self.espera_max_ms),
+                "duracion_ms": percentiles(self._duraciones),
+            }
+
+
+# bcrypt libera el GIL mientras calcula, así que un pool de hilos basta para
+# sacarlo del event loop; el tamaño del pool limita los núcleos que consume
+_executor = ThreadPoolExecutor(max_workers=settings.hash_max_hilos, thread_name_prefix="bcrypt")
+_metricas = _MetricasHashing()
+
+
+async def ejecutar_hash(funcion: Callable[..., T], *args) -> T:
+    """
+    Ejecutar una operación de bcrypt en el pool dedicado sin bloquear el event loop.
+    Lanza HashingSaturado si ya hay hash_max_en_cola operaciones en curso.
+    """
+    _metricas.encolar(settings.hash_max_en_cola)
+    encolado = time.perf_counter()
+    iniciada = False
+
+    def tarea():
+        nonlocal iniciada
+        inicio = time.perf_counter()
+        iniciada = True
+        _metricas.iniciar((inicio - encolado) * 1000)
+        try:
+            return funcion(*args)
+        finally:
+            _metricas.terminar((time.perf_counter() - inicio) * 1000)
+
+    futuro = _executor.submit(tarea)
+    try:
+        return await asyncio.wrap_future(futuro)
+    except asyncio.CancelledError:
+        # El cliente se desconectó: si aún no empezó, no gastar CPU en ella
+        if futuro.cancel() and not iniciada:
+            _metricas.descartar()
+        raise
+
+
+def estadisticas_hashing() -> Dict:
+    """Estado del pool de hashing: cola, rechazos y tiempos de espera/ejecución"""
+    return _metricas.snapshot()
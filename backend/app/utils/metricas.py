@@ -0,0 +1,203 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..config import settings
+from .consultas_lentas import registrar_consulta_lenta
+
+# Formato de texto de Prometheus (exposition format 0.0.4)
+CONTENT_TYPE_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SENTENCIAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+def percentiles(valores: Iterable[float], maximo: Optional[float] = None) -> Dict[str, float]:
+    """p50, p95 y máximo de una muestra de tiempos en ms (el máximo puede venir de afuera de la muestra)"""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return {"p50": 0.0, "p95": 0.0, "max": round(maximo or 0.0, 1)}
+    return {
+        "p50": round(ordenados[len(ordenados) // 2], 1),
+        "p95": round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))], 1),
+        "max": round(maximo if maximo is not None else ordenados[-1], 1),
+    }
+
+
+class Histograma:
+    """
+    Histograma de Prometheus por combinación de etiquetas. Observar cuesta una
+    búsqueda binaria y dos sumas: los buckets acumulados se arman al exponer.
+    """
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # valores de etiquetas -> [conteo por bucket (+Inf al final), suma]
+        self._series: Dict[tuple, list] = {}
+
+    def observar(self, valores: tuple, valor: float) -> None:
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def exponer(self) -> List[str]:
+        with self._lock:
+            series = [(valores, list(conteos), suma) for valores, (conteos, suma) in self._series.items()]
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for valores, conteos, suma in sorted(series):
+            etiquetas = ",".join(f'{k}="{_escapar(v)}"' for k, v in zip(self.etiquetas, valores))
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = "+Inf" if limite == float("inf") else repr(float(limite))
+                lineas.append(f'{self.nombre}_bucket{{{etiquetas},le="{le}"}} {acumulado}')
+            lineas.append(f"{self.nombre}_sum{{{etiquetas}}} {suma}")
+            lineas.append(f"{self.nombre}_count{{{etiquetas}}} {acumulado}")
+        return lineas
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+PETICIONES = Histograma(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta",
+    ("method", "route", "status"), BUCKETS_SEGUNDOS,
+)
+SENTENCIAS_POR_PETICION = Histograma(
+    "http_request_db_statements", "Sentencias SQL ejecutadas por petición",
+    ("method", "route"), BUCKETS_SENTENCIAS,
+)
+TIEMPO_DB_POR_PETICION = Histograma(
+    "http_request_db_duration_seconds", "Tiempo en la base de datos por petición",
+    ("method", "route"), BUCKETS_SEGUNDOS,
+)
+SENTENCIAS = Histograma(
+    "db_statement_duration_seconds", "Duración de cada sentencia SQL por engine",
+    ("engine",), BUCKETS_SEGUNDOS,
+)
+
+
+class _ConsultasPeticion:
+    __slots__ = ("scope", "sentencias", "segundos")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.sentencias = 0
+        self.segundos = 0.0
+
+
+# Acumulador de la petición en curso. El threadpool de las rutas sync y los
+# greenlets de las sesiones async heredan el contexto, así que las sentencias
+# se suman a la petición que las originó; fuera de una petición es None.
+_peticion_actual: ContextVar[Optional[_ConsultasPeticion]] = ContextVar("metricas_peticion", default=None)
+
+
+def instrumentar_sql(engine: Engine, nombre: str = "principal") -> None:
+    """
+    Medir cada sentencia del engine (o del sync_engine de uno async) y
+    registrar las que superan el umbral de consultas lentas.
+    """
+    umbral = settings.consultas_lentas_umbral_ms / 1000 if settings.consultas_lentas_umbral_ms > 0 else None
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metricas_inicio = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_metricas_inicio", None)
+        if inicio is None:
+            return
+        segundos = time.perf_counter() - inicio
+        SENTENCIAS.observar((nombre,), segundos)
+        consultas = _peticion_actual.get()
+        if consultas is not None:
+            consultas.sentencias += 1
+            consultas.segundos += segundos
+        if umbral is not None and segundos >= umbral:
+            if consultas is not None:
+                ruta = f"{consultas.scope['method']} {_plantilla_ruta(consultas.scope)}"
+            else:
+                ruta = "sin_peticion"
+            registrar_consulta_lenta(
+                nombre, conn.dialect.paramstyle, statement, parameters, executemany,
+                context.execution_options, segundos, ruta,
+            )
+
+
+def _plantilla_ruta(scope) -> str:
+    """
+    Plantilla de la ruta que atendió la petición. Según la versión de FastAPI,
+    la ruta de un router incluido con prefijo (/import, /api/v1) trae o no el
+    prefijo: si no calza con la URL completa, se antepone la parte que sobra.
+    """
+    ruta = scope.get("route")
+    plantilla = getattr(ruta, "path", None)
+    if plantilla is None:
+        return "sin_ruta"
+    path = scope["path"]
+    regex = getattr(ruta, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        for i in range(1, len(path)):
+            if path[i] == "/" and regex.match(path[i:]):
+                return path[:i] + plantilla
+    return plantilla
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que registra por ruta la latencia, las sentencias SQL y el
+    tiempo en la base de datos. La ruta es la plantilla (/api/v1/usuarios/{user_id})
+    para no crear una serie por cada id; las URLs sin ruta se agrupan.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        consultas = _ConsultasPeticion(scope)
+        token = _peticion_actual.set(consultas)
+        estado = 500
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _peticion_actual.reset(token)
+            ruta = _plantilla_ruta(scope)
+            metodo = scope["method"]
+            PETICIONES.observar((metodo, ruta, str(estado)), duracion)
+            SENTENCIAS_POR_PETICION.observar((metodo, ruta), consultas.sentencias)
+            TIEMPO_DB_POR_PETICION.observar((metodo, ruta), consultas.segundos)
+
+
+def exponer_metricas() -> str:
+    """Todas las métricas en formato de texto de Prometheus"""
+    lineas = []
+    for histograma in (PETICIONES, SENTENCIAS_POR_PETICION, TIEMPO_DB_POR_PETICION, SENTENCIAS):
+        lineas.extend(histograma.exponer())
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from .metricas import percentiles
+
+# Checkouts recientes usados para los percentiles de espera
+MUESTRAS_METRICAS = 1000
+
+
+class MetricasPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.en_uso_max = 0
+        self.checkouts_en_overflow = 0
+        self.conexiones_abiertas = 0
+        self.overflow_max = 0
+        self.invalidadas = 0
+        self.timeouts = 0
+        self.espera_max_ms = 0.0
+        self._esperas: Deque[float] = deque(maxlen=MUESTRAS_METRICAS)
+
+    def espera(self, espera_ms: float) -> None:
+        with self._lock:
+            self._esperas.append(espera_ms)
+            self.espera_max_ms = max(self.espera_max_ms, espera_ms)
+
+    def agotado(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def checkout(self, en_uso: int, overflow: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.en_uso_max = max(self.en_uso_max, en_uso)
+            if overflow > 0:
+                # Se entregó una conexión por encima de pool_size
+                self.checkouts_en_overflow += 1
+                self.overflow_max = max(self.overflow_max, overflow)
+
+    def conexion(self) -> None:
+        with self._lock:
+            self.conexiones_abiertas += 1
+
+    def invalidada(self) -> None:
+        with self._lock:
+            self.invalidadas += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "en_uso_max": self.en_uso_max,
+                "checkouts_en_overflow": self.checkouts_en_overflow,
+                "overflow_max": self.overflow_max,
+                "conexiones_abiertas": self.conexiones_abiertas,
+                "invalidadas": self.invalidadas,
+                "timeouts": self.timeouts,
+                "espera_ms": percentiles(self._esperas, self.espera_max_ms),
+            }
+
+
+class PoolInstrumentado(QueuePool):
+    """
+    QueuePool que mide cuánto espera cada checkout por una conexión: incluye
+    la cola cuando el pool está agotado y la apertura de conexiones nuevas.
+    """
+
+    metricas: Optional[MetricasPool] = None
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metricas:
+                self.metricas.agotado()
+            raise
+        finally:
+            if self.metricas:
+                self.metricas.espera((time.perf_counter() - inicio) * 1000)
+
+    def recreate(self) -> "PoolInstrumentado":
+        # engine.dispose() reemplaza el pool; las métricas siguen acumulando
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+
+class PoolAsyncInstrumentado(PoolInstrumentado, AsyncAdaptedQueuePool):
+    """PoolInstrumentado para engines async (asyncpg, aiosqlite)"""
+
+
+_metricas: Dict[str, MetricasPool] = {}
+_engines: Dict[str, Engine] = {}
+
+
+def instrumentar_engine(engine: Engine, nombre: str = "principal") -> None:
+    """
+    Registrar los eventos del pool del engine para exponer sus métricas.
+    Para un AsyncEngine se instrumenta su sync_engine.
+    """
+    metricas = MetricasPool()
+    _metricas[nombre] = metricas
+    _engines[nombre] = engine
+    if isinstance(engine.pool, PoolInstrumentado):
+        engine.pool.metricas = metricas
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            metricas.checkout(pool.checkedout(), pool.overflow())
+        else:
+            metricas.checkout(0, 0)
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        # Incluye las reaperturas por pool_recycle y tras invalidar una conexión
+        metricas.conexion()
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        # Conexiones caídas detectadas por pre-ping o por un error de desconexión
+        metricas.invalidada()
+
+
+def estadisticas_pool() -> Dict:
+    """Estado actual y métricas acumuladas de cada pool instrumentado"""
+    resultado = {}
+    for nombre, engine in _engines.items():
+        pool = engine.pool
+        estado = {"clase": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            estado.update(
+                tamano=pool.size(),
+                timeout_s=pool.timeout(),
+                en_uso=pool.checkedout(),
+                disponibles=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        estado.update(_metricas[nombre].snapshot())
+        resultado[nombre] = estado
+    return resultado
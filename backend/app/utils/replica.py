@@ -0,0 +1,102 @@
+import logging
+import re
+import threading
+from typing import AsyncIterator, Dict, Optional
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import database
+
+logger = logging.getLogger(__name__)
+
+# Posición del WAL (LSN, p. ej. "0/16B3748") que incluye la última escritura del
+# cliente: se responde en cada escritura y el cliente la reenvía al leer. Solo
+# una posición del WAL prueba que la réplica ya aplicó la escritura; la réplica
+# debe ser física (streaming), que comparte el WAL del primario.
+HEADER_ULTIMA_ESCRITURA = "X-Ultima-Escritura"
+_FORMATO_LSN = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+
+_LSN_ACTUAL = text("SELECT pg_current_wal_lsn()::text")
+# Una "réplica" que no está en recuperación (p. ej. apunta al primario) está al día.
+# El LSN viaja como texto: asyncpg codifica los parámetros pg_lsn como enteros
+_REPLICA_AL_DIA = text("""
+    SELECT CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() ELSE pg_current_wal_lsn() END
+           >= CAST(CAST(:lsn AS text) AS pg_lsn)
+""")
+
+
+class _MetricasReplica:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {"replica": 0, "primario_por_retraso": 0, "primario_por_error": 0}
+
+    def sumar(self, destino: str) -> None:
+        with self._lock:
+            self._contadores[destino] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"configurada": database.replica_async_engine is not None, **self._contadores}
+
+
+_metricas = _MetricasReplica()
+
+
+def _lsn_minimo(request: Request) -> Optional[str]:
+    lsn = request.headers.get(HEADER_ULTIMA_ESCRITURA, "").strip()
+    return lsn if _FORMATO_LSN.match(lsn) else None
+
+
+def _es_postgresql(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def get_lectura_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Dependency para las rutas de solo lectura: usa la réplica si está configurada.
+    Si el cliente envía X-Ultima-Escritura y la réplica aún no aplicó el WAL
+    hasta esa posición, la lectura va al primario para que vea su propia
+    escritura.
+    """
+    if database.replica_async_engine is None:
+        async with database.AsyncSessionLocal() as db:
+            yield db
+        return
+
+    minimo = _lsn_minimo(request)
+    destino = "replica"
+    async with database.AsyncSessionLectura() as replica:
+        try:
+            # Tomar la conexión aquí (con pre-ping) para caer al primario si la réplica no responde
+            await replica.connection()
+            if minimo and _es_postgresql(replica):
+                al_dia = (await replica.execute(_REPLICA_AL_DIA, {"lsn": minimo})).scalar()
+                if not al_dia:
+                    destino = "primario_por_retraso"
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning(f"Réplica no disponible, se lee del primario: {e}")
+            destino = "primario_por_error"
+        if destino == "replica":
+            _metricas.sumar(destino)
+            yield replica
+            return
+
+    _metricas.sumar(destino)
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+
+async def registrar_escritura(response: Response, db: AsyncSession) -> None:
+    """
+    Agregar a la respuesta de una escritura ya confirmada la posición del WAL
+    que la incluye. Sin réplica no hace falta y se omite la consulta.
+    """
+    if database.replica_async_engine is None or not _es_postgresql(db):
+        return
+    response.headers[HEADER_ULTIMA_ESCRITURA] = (await db.execute(_LSN_ACTUAL)).scalar()
+
+
+def estadisticas_replica() -> Dict:
+    """Lecturas servidas por la réplica y por el primario (y por qué)"""
+    return _metricas.snapshot()
@@ -0,0 +1,44 @@
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..config import settings
+
+# Opción de ejecución con el modo del BEGIN de cada transacción en SQLite
+OPCION_BEGIN = "sqlite_begin"
+
+
+def configurar_sqlite(engine: Engine, journal_mode: Optional[str] = None) -> None:
+    """
+    Preparar un engine SQLite (o el sync_engine de uno async) para lectores
+    concurrentes y un solo escritor:
+
+    - WAL: los lectores no bloquean al escritor ni el escritor a los lectores.
+    - busy_timeout: un segundo escritor espera el bloqueo en lugar de fallar.
+    - BEGIN explícito: las sesiones de escritura usan BEGIN IMMEDIATE y toman
+      el bloqueo al empezar. Con BEGIN DEFERRED, una transacción que lee y
+      luego escribe falla sin esperar si otro escritor confirmó en medio.
+    """
+    modo = journal_mode or settings.sqlite_journal_mode
+    pragmas = [
+        f"journal_mode={modo}",
+        f"synchronous={settings.sqlite_synchronous}",
+        f"busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"cache_size={-settings.sqlite_cache_mb * 1024}",
+        f"mmap_size={settings.sqlite_mmap_mb * 1024 * 1024}",
+        "temp_store=MEMORY",
+        # Igual que en PostgreSQL: no se permiten acompañantes sin invitado
+        "foreign_keys=ON",
+    ]
+
+    @event.listens_for(engine, "connect")
+    def _configurar_conexion(dbapi_connection, connection_record):
+        # El driver no abre transacciones por su cuenta; el BEGIN lo emite el evento "begin"
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN " + conn.get_execution_options().get(OPCION_BEGIN, "DEFERRED"))
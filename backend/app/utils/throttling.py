@@ -0,0 +1,127 @@
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Union
+from fastapi import Request
+from ..config import settings
+
+
+class TokenBucket:
+    """
+    Limitador token bucket por clave, en memoria.
+    Cada clave acumula `tasa` fichas por segundo hasta `capacidad` y cada
+    intento consume una. Las claves menos usadas se descartan al superar
+    `max_claves`, así un ataque con muchos usernames no agota la memoria.
+    """
+
+    def __init__(self, tasa: float, capacidad: int, max_claves: int):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.max_claves = max_claves
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.permitidos = 0
+        self.rechazados = 0
+
+    def consumir(self, clave: str) -> float:
+        """Consumir una ficha; retorna 0 si se permite o los segundos a esperar si no"""
+        ahora = time.monotonic()
+        with self._lock:
+            fichas, ultimo = self._buckets.get(clave, (float(self.capacidad), ahora))
+            fichas = min(self.capacidad, fichas + (ahora - ultimo) * self.tasa)
+            if fichas >= 1:
+                fichas -= 1
+                espera = 0.0
+                self.permitidos += 1
+            else:
+                espera = (1 - fichas) / self.tasa
+                self.rechazados += 1
+            self._buckets[clave] = (fichas, ahora)
+            self._buckets.move_to_end(clave)
+            while len(self._buckets) > self.max_claves:
+                self._buckets.popitem(last=False)
+            return espera
+
+    def estadisticas(self, top: int = 10) -> Dict:
+        """Contadores y las claves con menos fichas (las más cerca de ser limitadas)"""
+        ahora = time.monotonic()
+        with self._lock:
+            fichas = {
+                clave: min(self.capacidad, f + (ahora - ultimo) * self.tasa)
+                for clave, (f, ultimo) in self._buckets.items()
+            }
+            permitidos, rechazados = self.permitidos, self.rechazados
+        limitadas = sorted((f, clave) for clave, f in fichas.items() if f < self.capacidad)[:top]
+        return {
+            "tasa_por_minuto": round(self.tasa * 60, 2),
+            "capacidad": self.capacidad,
+            "claves": len(fichas),
+            "permitidos": permitidos,
+            "rechazados": rechazados,
+            "mas_limitadas": [{"clave": clave, "fichas": round(f, 2)} for f, clave in limitadas],
+        }
+
+
+limitador_login_usuario = TokenBucket(
+    settings.login_tasa_usuario_por_minuto / 60, settings.login_rafaga_usuario, settings.login_max_claves
+)
+limitador_login_ip = TokenBucket(
+    settings.login_tasa_ip_por_minuto / 60, settings.login_rafaga_ip, settings.login_max_claves
+)
+
+
+def _redes(valor: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    return [ipaddress.ip_network(parte.strip(), strict=False) for parte in valor.split(",") if parte.strip()]
+
+
+_PROXIES_CONFIABLES = _redes(settings.proxies_confiables)
+
+
+def _es_proxy(ip: str) -> bool:
+    try:
+        direccion = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(direccion in red for red in _PROXIES_CONFIABLES)
+
+
+def ip_cliente(request: Request) -> str:
+    """
+    IP del cliente para el límite por IP. X-Forwarded-For solo se acepta si la
+    conexión viene de un proxy confiable (PROXIES_CONFIABLES); se recorre de
+    derecha a izquierda, porque cada proxy agrega al final la IP que lo
+    contactó, y la primera dirección que no es un proxy es la del cliente.
+    Lo que el cliente haya puesto a la izquierda no se usa.
+    """
+    ip = request.client.host if request.client else "desconocida"
+    if not _es_proxy(ip):
+        return ip
+    for reenviada in reversed(request.headers.get("x-forwarded-for", "").split(",")):
+        reenviada = reenviada.strip()
+        if not reenviada:
+            continue
+        ip = reenviada
+        if not _es_proxy(ip):
+            break
+    return ip
+
+
+def verificar_limite_login(username: str, ip: str) -> int:
+    """
+    Consumir una ficha del bucket de la IP y del username.
+    Retorna 0 si el intento puede seguir, o los segundos para Retry-After.
+    El límite por IP solo distingue clientes si `ip` viene de ip_cliente con
+    PROXIES_CONFIABLES configurado; detrás de un proxy no listado todos los
+    intentos llegan con la IP del proxy.
+    """
+    espera = max(limitador_login_ip.consumir(ip), limitador_login_usuario.consumir(username.strip().lower()))
+    return math.ceil(espera)
+
+
+def estadisticas_login() -> Dict:
+    return {
+        "por_usuario": limitador_login_usuario.estadisticas(),
+        "por_ip": limitador_login_ip.estadisticas(),
+    }
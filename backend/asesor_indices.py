@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Asesor de índices (PostgreSQL).
+
+Lee pg_stat_user_indexes y los planes de las consultas de las rutas
+frecuentes (búsqueda, acompañantes, pendientes, reporte por sede) y reporta
+los índices sin uso, los duplicados y los que faltan. Las lecturas cuentan
+desde el último reinicio de estadísticas: correrlo después de un evento o de
+una prueba de carga, no sobre una base recién creada.
+
+Los planes de las consultas lentas del backend en ejecución se ven en
+GET /api/v1/diagnostico/indices, que los suma al análisis.
+
+Uso:
+    python asesor_indices.py [--max-lecturas 0] [--min-filas 1000] [--planes]
+"""
+import argparse
+import sys
+from app.database import engine
+from app.services.indices_service import analizar_indices
+
+
+def _tamano(bytes_: int) -> str:
+    return f"{bytes_ / 1024 / 1024:.1f} MB" if bytes_ >= 1024 * 1024 else f"{bytes_ // 1024} kB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportar índices sin uso, duplicados y faltantes")
+    parser.add_argument("--max-lecturas", type=int, default=0,
+                        help="Lecturas hasta las que un índice se considera sin uso")
+    parser.add_argument("--min-filas", type=int, default=1000,
+                        help="Filas mínimas de una tabla para sugerir índices")
+    parser.add_argument("--planes", action="store_true", help="Mostrar los planes analizados")
+    args = parser.parse_args()
+
+    print("🔍 ASESOR DE ÍNDICES")
+    print("=" * 50)
+    try:
+        with engine.connect() as conn:
+            reporte = analizar_indices(conn, max_lecturas=args.max_lecturas, min_filas=args.min_filas)
+    except Exception as e:
+        print(f"❌ Error analizando los índices: {e}")
+        sys.exit(1)
+
+    print(f"📊 {reporte['indices']} índices, {_tamano(reporte['bytes_indices'])} en total "
+          f"(estadísticas desde {reporte['estadisticas_desde'] or 'la creación del servidor'})")
+
+    print(f"\n💤 Sin uso ({len(reporte['sin_uso'])}):")
+    for indice in reporte["sin_uso"]:
+        print(f"   {indice['tabla'] + '.' + indice['indice']:<50} {_tamano(indice['bytes']):>9}  {indice['motivo']}")
+
+    print(f"\n👯 Duplicados ({len(reporte['duplicados'])}):")
+    for indice in reporte["duplicados"]:
+        print(f"   {indice['tabla'] + '.' + indice['indice']:<50} {_tamano(indice['bytes']):>9}  "
+              f"{indice['motivo']}: {indice['cubierto_por']}")
+
+    print(f"\n➕ Faltantes ({len(reporte['faltantes'])}):")
+    for faltante in reporte["faltantes"]:
+        print(f"   {faltante['tabla']}: {faltante['sugerencia']}")
+        print(f"      ↳ {faltante['origen']}")
+
+    if args.planes:
+        for nombre, plan in reporte["planes"].items():
+            print(f"\n📋 {nombre}:\n{plan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark de importación con el juego de índices anterior y el actual.
+
+Importa los mismos invitados y acompañantes sintéticos con ImportService
+(el motor de POST /import/excel) sobre tablas recién creadas, una vez con los
+índices del esquema inicial (nombre, campaña, EPS, parentesco e id repetido)
+y otra con los de la migración de índices de las rutas frecuentes. Cada
+índice de más es un árbol que cada INSERT debe actualizar.
+
+En PostgreSQL las tablas se crean en un esquema aparte (benchmark_indices)
+de la base configurada y se borran al terminar; en SQLite, en un archivo temporal.
+
+Uso:
+    python benchmark_importacion.py [--invitados 50000] [--acompanantes-por-invitado 1]
+                                    [--precargados 0] [--repeticiones 3]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Optional
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, engine as engine_configurado
+from app.services.eventos_service import crear_evento
+from app.services.import_service import ImportService
+
+ESQUEMA = "benchmark_indices"
+
+# Índices que la migración retiró y los que agregó
+INDICES_ANTERIORES = [
+    ("invitados", "ix_invitados_id", ["id"]),
+    ("invitados", "ix_invitados_nombre", ["nombre"]),
+    ("invitados", "ix_invitados_campana_area", ["campana_area"]),
+    ("invitados", "ix_invitados_eps", ["eps"]),
+    ("acompanantes", "ix_acompanantes_id", ["id"]),
+    ("acompanantes", "ix_acompanantes_nombre", ["nombre"]),
+    ("acompanantes", "ix_acompanantes_parentesco", ["parentesco"]),
+    ("acompanantes", "ix_acompanantes_eps", ["eps"]),
+    ("usuarios", "ix_usuarios_id", ["id"]),
+]
+INDICES_NUEVOS = ["ix_acompanantes_invitado_id", "ix_invitados_pendientes"]
+INDICES_TRIGRAMAS = [("ix_invitados_nombre_trgm", "invitados"), ("ix_acompanantes_nombre_trgm", "acompanantes")]
+
+NOMBRES = ["María", "José", "Luis", "Ana", "Carlos", "Diana", "Jorge", "Paula", "Andrés", "Laura"]
+APELLIDOS = ["García", "Rodríguez", "Martínez", "López", "Gómez", "Pérez", "Díaz", "Torres", "Ramírez", "Vargas"]
+CAMPANAS = [f"Campaña {i}" for i in range(1, 41)]
+EPS = ["Sura", "Sanitas", "Nueva EPS", "Compensar", "Famisanar", "Salud Total"]
+SEDES = ["Sede Principal", "Sede Norte", "Sede Sur", "Sede Centro"]
+PARENTESCOS = ["Hijo(a)", "Cónyuge", "Padre", "Madre", "Hermano(a)"]
+
+
+def generar_datos(invitados: int, por_invitado: int, desde: int) -> tuple:
+    """Hojas 'Invitados' y 'Acompanantes' con cédulas a partir de `desde`"""
+    rng = random.Random(desde)
+    df_invitados = pd.DataFrame({
+        "cedula": [str(10000000 + desde + i) for i in range(invitados)],
+        "nombre": [f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}" for _ in range(invitados)],
+        "campana_area": [rng.choice(CAMPANAS) for _ in range(invitados)],
+        "eps": [rng.choice(EPS) for _ in range(invitados)],
+        "sede": [rng.choice(SEDES) for _ in range(invitados)],
+    })
+    total = invitados * por_invitado
+    df_acompanantes = pd.DataFrame({
+        "cedula": [str(60000000 + desde * por_invitado + i) for i in range(total)],
+        "nombre": [f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}" for _ in range(total)],
+        "edad": [rng.randint(1, 80) for _ in range(total)],
+        "parentesco": [rng.choice(PARENTESCOS) for _ in range(total)],
+        "eps_acompanante": [rng.choice(EPS) for _ in range(total)],
+        "cedula_invitado_principal": [str(10000000 + desde + i // por_invitado) for i in range(total)],
+    })
+    return df_invitados, df_acompanantes
+
+
+def _esquema_trigramas() -> Optional[str]:
+    """Esquema donde está instalado pg_trgm, o None si no está"""
+    if engine_configurado.dialect.name != "postgresql":
+        return None
+    with engine_configurado.connect() as conn:
+        return conn.execute(text(
+            "SELECT extnamespace::regnamespace::text FROM pg_extension WHERE extname = 'pg_trgm'"
+        )).scalar()
+
+
+def crear_tablas(engine, variante: str, trigramas: Optional[str]) -> int:
+    """Crea las tablas con el juego de índices de la variante; retorna el id del evento"""
+    if engine.dialect.name == "postgresql":
+        with engine_configurado.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {ESQUEMA}"))
+    else:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        evento_id = crear_evento(conn, "Benchmark", activar=True)
+        if variante == "anterior":
+            for nombre in INDICES_NUEVOS:
+                conn.execute(text(f"DROP INDEX {nombre}"))
+            for tabla, nombre, columnas in INDICES_ANTERIORES:
+                conn.execute(text(f"CREATE INDEX {nombre} ON {tabla} ({', '.join(columnas)})"))
+        elif trigramas:
+            for nombre, tabla in INDICES_TRIGRAMAS:
+                conn.execute(text(f"CREATE INDEX {nombre} ON {tabla} USING gin (nombre {trigramas}.gin_trgm_ops)"))
+    return evento_id
+
+
+def importar(Sesion, evento_id: int, df_invitados, df_acompanantes) -> ImportService:
+    with Sesion() as db:
+        service = ImportService(db, evento_id)
+        service.importar_invitados(df_invitados)
+        service.importar_acompanantes(df_acompanantes)
+        db.commit()
+    return service
+
+
+def ejecutar(engine, args, variante: str, trigramas: Optional[str]) -> dict:
+    evento_id = crear_tablas(engine, variante, trigramas)
+    Sesion = sessionmaker(bind=engine)
+    if args.precargados:
+        importar(Sesion, evento_id, *generar_datos(args.precargados, args.acompanantes_por_invitado, 0))
+    df_invitados, df_acompanantes = generar_datos(args.invitados, args.acompanantes_por_invitado, args.precargados)
+
+    inicio = time.perf_counter()
+    service = importar(Sesion, evento_id, df_invitados, df_acompanantes)
+    segundos = time.perf_counter() - inicio
+    return {
+        "segundos": segundos,
+        "insercion": service.tiempos.get("insercion_invitados", 0.0) + service.tiempos.get("insercion_acompanantes", 0.0),
+        "filas": service.invitados_creados + service.acompanantes_creados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de importación con el juego de índices anterior y el actual")
+    parser.add_argument("--invitados", type=int, default=50000, help="Invitados a importar")
+    parser.add_argument("--acompanantes-por-invitado", type=int, default=1)
+    parser.add_argument("--precargados", type=int, default=0,
+                        help="Invitados ya cargados antes de la importación medida")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    archivo = None
+    if engine_configurado.dialect.name == "postgresql":
+        engine = create_engine(engine_configurado.url, connect_args={"options": f"-c search_path={ESQUEMA}"})
+    else:
+        descriptor, archivo = tempfile.mkstemp(suffix=".db")
+        os.close(descriptor)
+        engine = create_engine(f"sqlite:///{archivo}")
+    trigramas = _esquema_trigramas()
+
+    print("📦 BENCHMARK DE IMPORTACIÓN POR JUEGO DE ÍNDICES")
+    print("=" * 50)
+    print(f"{engine.dialect.name}: {args.invitados} invitados, {args.invitados * args.acompanantes_por_invitado} "
+          f"acompañantes, {args.precargados} invitados precargados")
+    if engine.dialect.name == "postgresql":
+        print(f"Índices de trigramas en el juego actual: {'sí' if trigramas else 'no (pg_trgm no instalado)'}")
+
+    resultados = {"anterior": [], "actual": []}
+    try:
+        for repeticion in range(args.repeticiones):
+            # Alternar el orden para no favorecer siempre a la misma variante
+            variantes = ["anterior", "actual"] if repeticion % 2 == 0 else ["actual", "anterior"]
+            for variante in variantes:
+                resultado = ejecutar(engine, args, variante, trigramas)
+                resultados[variante].append(resultado)
+                print(f"   {repeticion + 1}. {variante:<9} {resultado['segundos']:7.2f} s "
+                      f"(inserción {resultado['insercion']:.2f} s, {resultado['filas'] / resultado['segundos']:,.0f} filas/s)")
+    finally:
+        if engine.dialect.name == "postgresql":
+            with engine_configurado.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE"))
+        engine.dispose()
+        if archivo:
+            os.remove(archivo)
+
+    mejor = {variante: min(r["segundos"] for r in filas) for variante, filas in resultados.items()}
+    insercion = {variante: min(r["insercion"] for r in filas) for variante, filas in resultados.items()}
+    print(f"\n{'Índices':<10} {'Total (s)':>10} {'Inserción (s)':>14}")
+    for variante in ("anterior", "actual"):
+        print(f"{variante:<10} {mejor[variante]:>10.2f} {insercion[variante]:>14.2f}")
+    print(f"\n🚀 Importación {mejor['anterior'] / mejor['actual']:.2f}x más rápida "
+          f"(inserción {insercion['anterior'] / insercion['actual']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark de check-in sostenido sobre SQLite local (despliegue sin red).
+
+Crea una base SQLite temporal con invitados y lanza kioscos concurrentes
+que buscan por cédula y confirman asistencia con AsistenciaServiceAsync,
+más lectores que consultan las estadísticas como el tablero. Reporta las
+confirmaciones por segundo, la latencia y los errores por bloqueo para
+cada combinación de modo de journal y tipo de BEGIN de las escrituras.
+
+Con WAL e IMMEDIATE (la configuración del backend) los lectores no frenan
+a los kioscos y ninguna confirmación falla por "database is locked".
+
+Uso:
+    python benchmark_sqlite.py [--invitados 20000] [--kioscos 8] [--lectores 2]
+                               [--duracion 10] [--modos WAL,DELETE] [--begin IMMEDIATE,DEFERRED]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.database import Base
+from app.models import Invitado
+from app.schemas import ConfirmarAsistenciaRequest
+from app.services.asistencia_service import AsistenciaServiceAsync
+from app.services.eventos_service import crear_evento
+from app.utils.metricas import percentiles
+from app.utils.sqlite import OPCION_BEGIN, configurar_sqlite
+
+
+def crear_base(ruta: str, invitados: int, journal_mode: str) -> int:
+    """Crea la base con un evento activo y sus invitados; retorna el id del evento"""
+    engine = create_engine(f"sqlite:///{ruta}")
+    configurar_sqlite(engine, journal_mode)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        evento_id = crear_evento(conn, "Benchmark", activar=True)
+        conn.execute(insert(Invitado), [
+            {"evento_id": evento_id, "nombre": f"Invitado {i}", "cedula": f"{10000000 + i}", "estado_asistencia": False}
+            for i in range(invitados)
+        ])
+    engine.dispose()
+    return evento_id
+
+
+async def ejecutar(ruta: str, evento_id: int, args, journal_mode: str, begin: str) -> dict:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}", pool_size=args.kioscos + args.lectores)
+    configurar_sqlite(engine.sync_engine, journal_mode)
+    Lectura = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    Escritura = async_sessionmaker(
+        engine.execution_options(**{OPCION_BEGIN: begin}), autoflush=False, expire_on_commit=False
+    )
+
+    # Cada kiosco atiende su propia fila de invitados, como en la entrada del evento
+    pendientes = list(range(args.invitados))
+    random.shuffle(pendientes)
+    fin = time.perf_counter() + args.duracion
+    latencias = []
+    lecturas = 0
+    errores = {"bloqueo": 0, "otros": 0}
+
+    async def kiosco():
+        while time.perf_counter() < fin and pendientes:
+            cedula = f"{10000000 + pendientes.pop()}"
+            inicio = time.perf_counter()
+            try:
+                async with Lectura() as db:
+                    encontrado = await AsistenciaServiceAsync(db, evento_id).search_invitado(cedula)
+                async with Escritura() as db:
+                    respuesta = await AsistenciaServiceAsync(db, evento_id).confirmar_asistencia(
+                        ConfirmarAsistenciaRequest(invitado_id=encontrado.invitado.id)
+                    )
+                mensaje = "" if respuesta.success else respuesta.message
+            except Exception as e:
+                mensaje = str(e)
+            if not mensaje:
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            elif "locked" in mensaje:
+                errores["bloqueo"] += 1
+            else:
+                errores["otros"] += 1
+
+    async def tablero():
+        nonlocal lecturas
+        while time.perf_counter() < fin:
+            async with Lectura() as db:
+                await AsistenciaServiceAsync(db, evento_id).get_asistencias_stats()
+            lecturas += 1
+            await asyncio.sleep(0)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[kiosco() for _ in range(args.kioscos)], *[tablero() for _ in range(args.lectores)])
+    transcurrido = time.perf_counter() - inicio
+    await engine.dispose()
+
+    return {
+        "confirmaciones_s": round(len(latencias) / transcurrido, 1),
+        "lecturas_s": round(lecturas / transcurrido, 1),
+        "latencia_ms": percentiles(latencias),
+        **errores,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de check-in sobre SQLite local")
+    parser.add_argument("--invitados", type=int, default=20000, help="Invitados en la base de prueba")
+    parser.add_argument("--kioscos", type=int, default=8, help="Kioscos confirmando en paralelo")
+    parser.add_argument("--lectores", type=int, default=2, help="Tableros consultando estadísticas")
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos por configuración")
+    parser.add_argument("--modos", default="WAL,DELETE", help="Modos de journal a comparar")
+    parser.add_argument("--begin", default="IMMEDIATE,DEFERRED", help="BEGIN de las escrituras a comparar")
+    args = parser.parse_args()
+
+    print("🏕️  CHECK-IN SOBRE SQLITE LOCAL")
+    print("=" * 86)
+    print(f"{'journal':<8} {'begin':<10} {'confirm/s':>10} {'lecturas/s':>11} {'p50 (ms)':>9} {'p95 (ms)':>9} {'bloqueos':>9} {'otros':>6}")
+    for journal_mode in args.modos.split(","):
+        for begin in args.begin.split(","):
+            with tempfile.TemporaryDirectory() as directorio:
+                ruta = os.path.join(directorio, "asistencia.db")
+                evento_id = crear_base(ruta, args.invitados, journal_mode)
+                r = asyncio.run(ejecutar(ruta, evento_id, args, journal_mode, begin))
+            print(
+                f"{journal_mode:<8} {begin:<10} {r['confirmaciones_s']:>10} {r['lecturas_s']:>11} "
+                f"{r['latencia_ms']['p50']:>9} {r['latencia_ms']['p95']:>9} {r['bloqueo']:>9} {r['otros']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Script para calibrar el costo de bcrypt en este servidor.
+
+Mide cuánto tarda un hash con cada costo y recomienda el mayor costo cuyo
+tiempo no supere el objetivo. El valor recomendado se configura con la
+variable de entorno BCRYPT_ROUNDS; los usuarios existentes se actualizan
+al nuevo costo la próxima vez que inicien sesión.
+
+Uso:
+    python calibrate_bcrypt.py [--objetivo-ms 250] [--min 10] [--max 14] [--repeticiones 3]
+"""
+import argparse
+import statistics
+import time
+import bcrypt
+from app.config import settings
+
+
+def medir(costo: int, repeticiones: int) -> float:
+    """Mediana en milisegundos de verificar una contraseña con el costo dado"""
+    hashed = bcrypt.hashpw(b"calibracion", bcrypt.gensalt(rounds=costo))
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        bcrypt.checkpw(b"calibracion", hashed)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrar el costo de bcrypt para una latencia objetivo")
+    parser.add_argument("--objetivo-ms", type=float, default=250, help="Tiempo máximo por verificación (ms)")
+    parser.add_argument("--min", type=int, default=10, help="Costo mínimo a medir")
+    parser.add_argument("--max", type=int, default=14, help="Costo máximo a medir")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Mediciones por costo")
+    args = parser.parse_args()
+
+    print("🔐 CALIBRACIÓN DE BCRYPT")
+    print("=" * 50)
+    print(f"Costo configurado actualmente: {settings.bcrypt_rounds}")
+    print(f"Objetivo: {args.objetivo_ms:.0f} ms por verificación\n")
+
+    recomendado = None
+    for costo in range(args.min, args.max + 1):
+        ms = medir(costo, args.repeticiones)
+        dentro = ms <= args.objetivo_ms
+        print(f"  costo {costo:2d}: {ms:8.1f} ms {'✅' if dentro else '❌'}")
+        if dentro:
+            recomendado = costo
+        else:
+            # Cada punto de costo duplica el tiempo: los siguientes tampoco cumplen
+            break
+
+    print()
+    if recomendado is None:
+        print(f"❌ Ningún costo desde {args.min} cumple el objetivo; considera un objetivo mayor")
+        return
+    print(f"✅ Costo recomendado: {recomendado}  (BCRYPT_ROUNDS={recomendado})")
+    if recomendado != settings.bcrypt_rounds:
+        print("ℹ️  Los hashes existentes se actualizarán al nuevo costo en el próximo login de cada usuario")
+
+
+if __name__ == "__main__":
+    main()
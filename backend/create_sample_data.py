@@ -7,6 +7,8 @@ from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from datetime import datetime
 import bcrypt
+from app.config import settings
+from app.services.eventos_service import crear_evento, evento_activo
 
 load_dotenv()
 
@@ -32,7 +34,7 @@ def create_sample_data():
             
             # Hash de la contraseña "admin123"
             password = "admin123"
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=settings.bcrypt_rounds)).decode('utf-8')
             
             conn.execute(text("""
                 INSERT INTO usuarios (username, hashed_password, nombre_completo, created_at, updated_at)
@@ -44,6 +46,10 @@ def create_sample_data():
             
             print("✅ Usuario admin creado (contraseña: admin123)")
             
+            # Los datos de prueba van al evento activo (o a uno nuevo si no hay)
+            evento_id = evento_activo(conn) or crear_evento(conn, "Evento de prueba", activar=True)
+            print(f"🎫 Evento: {evento_id}")
+            
             # Crear invitados de prueba
             print("👥 Creando invitados de prueba...")
             
@@ -85,18 +91,18 @@ def create_sample_data():
                 }
             ]
             
-            for i, invitado in enumerate(invitados_data, 1):
+            # La cédula identifica al invitado dentro del evento
+            for invitado in invitados_data:
                 conn.execute(text("""
-                    INSERT INTO invitados (id, nombre, cedula, campana_area, eps, sede, estado_asistencia, created_at, updated_at)
-                    VALUES (:id, :nombre, :cedula, :campana_area, :eps, :sede, false, NOW(), NOW())
-                    ON CONFLICT (id) DO UPDATE SET 
+                    INSERT INTO invitados (evento_id, nombre, cedula, campana_area, eps, sede, estado_asistencia, created_at, updated_at)
+                    VALUES (:evento_id, :nombre, :cedula, :campana_area, :eps, :sede, false, NOW(), NOW())
+                    ON CONFLICT (evento_id, cedula) DO UPDATE SET 
                         nombre = EXCLUDED.nombre,
-                        cedula = EXCLUDED.cedula,
                         campana_area = EXCLUDED.campana_area,
                         eps = EXCLUDED.eps,
                         sede = EXCLUDED.sede,
                         updated_at = NOW()
-                """), {**invitado, "id": i})
+                """), {**invitado, "evento_id": evento_id})
             
             print(f"✅ {len(invitados_data)} invitados creados")
             
@@ -105,56 +111,55 @@ def create_sample_data():
             
             acompanantes_data = [
                 {
-                    "id": 1,
                     "nombre": "Carmen Pérez de Pérez",
                     "cedula": "87654321",
                     "edad": 45,
                     "parentesco": "Esposa",
                     "eps": "Sanitas",
-                    "invitado_id": 1
+                    "cedula_invitado": "12345678"
                 },
                 {
-                    "id": 2,
                     "nombre": "Sofía Pérez Torres",
                     "cedula": "98765432",
                     "edad": 16,
                     "parentesco": "Hija",
                     "eps": "Sanitas",
-                    "invitado_id": 1
+                    "cedula_invitado": "12345678"
                 },
                 {
-                    "id": 3,
                     "nombre": "Roberto Rodríguez Sánchez",
                     "cedula": "13579246",
                     "edad": 52,
                     "parentesco": "Esposo",
                     "eps": "Nueva EPS",
-                    "invitado_id": 2
+                    "cedula_invitado": "23456789"
                 },
                 {
-                    "id": 4,
                     "nombre": "Isabella Gómez Herrera",
                     "cedula": "24681357",
                     "edad": 28,
                     "parentesco": "Esposa",
                     "eps": "Compensar",
-                    "invitado_id": 3
+                    "cedula_invitado": "34567890"
                 }
             ]
             
             for acompanante in acompanantes_data:
                 conn.execute(text("""
-                    INSERT INTO acompanantes (id, nombre, cedula, edad, parentesco, eps, invitado_id, estado_asistencia, created_at, updated_at)
-                    VALUES (:id, :nombre, :cedula, :edad, :parentesco, :eps, :invitado_id, false, NOW(), NOW())
-                    ON CONFLICT (id) DO UPDATE SET 
+                    INSERT INTO acompanantes (evento_id, nombre, cedula, edad, parentesco, eps, invitado_id, estado_asistencia, created_at, updated_at)
+                    VALUES (
+                        :evento_id, :nombre, :cedula, :edad, :parentesco, :eps,
+                        (SELECT id FROM invitados WHERE evento_id = :evento_id AND cedula = :cedula_invitado),
+                        false, NOW(), NOW()
+                    )
+                    ON CONFLICT (evento_id, cedula) DO UPDATE SET 
                         nombre = EXCLUDED.nombre,
-                        cedula = EXCLUDED.cedula,
                         edad = EXCLUDED.edad,
                         parentesco = EXCLUDED.parentesco,
                         eps = EXCLUDED.eps,
                         invitado_id = EXCLUDED.invitado_id,
                         updated_at = NOW()
-                """), acompanante)
+                """), {**acompanante, "evento_id": evento_id})
             
             print(f"✅ {len(acompanantes_data)} acompañantes creados")
             
@@ -162,20 +167,21 @@ def create_sample_data():
             print("📋 Creando logs de asistencia de prueba...")
             
             logs_data = [
-                {"id": 1, "persona_id": 1, "tipo": "principal"},
-                {"id": 2, "persona_id": 1, "tipo": "acompanante"},
-                {"id": 3, "persona_id": 2, "tipo": "principal"}
+                {"cedula": "12345678", "tipo": "principal", "tabla": "invitados"},
+                {"cedula": "87654321", "tipo": "acompanante", "tabla": "acompanantes"},
+                {"cedula": "23456789", "tipo": "principal", "tabla": "invitados"}
             ]
             
             for log in logs_data:
-                conn.execute(text("""
-                    INSERT INTO asistencias_log (id, persona_id, tipo, timestamp)
-                    VALUES (:id, :persona_id, :tipo, NOW())
-                    ON CONFLICT (id) DO UPDATE SET 
-                        persona_id = EXCLUDED.persona_id,
-                        tipo = EXCLUDED.tipo,
-                        timestamp = NOW()
-                """), log)
+                conn.execute(text(f"""
+                    INSERT INTO asistencias_log (evento_id, persona_id, tipo, timestamp)
+                    SELECT evento_id, id, :tipo, NOW() FROM {log['tabla']} p
+                    WHERE evento_id = :evento_id AND cedula = :cedula
+                      AND NOT EXISTS (
+                          SELECT 1 FROM asistencias_log l
+                          WHERE l.evento_id = p.evento_id AND l.persona_id = p.id AND l.tipo = :tipo
+                      )
+                """), {"cedula": log["cedula"], "tipo": log["tipo"], "evento_id": evento_id})
             
             print(f"✅ {len(logs_data)} logs de asistencia creados")
             
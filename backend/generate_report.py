@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Script para generar el reporte posterior al evento por sede.
+
+Genera un .zip con un Excel por sede (asistencia por campaña y lista de
+invitados que no asistieron) y un resumen general. Las sedes se procesan
+en paralelo.
+
+Uso:
+    python generate_report.py [--salida reporte.zip] [--procesos N] [--evento ID]
+"""
+import argparse
+import sys
+import time
+from app.database import engine
+from app.services.eventos_service import evento_activo
+from app.services.report_service import ReportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar el reporte de asistencia por sede")
+    parser.add_argument("--salida", default="reporte_sedes.zip", help="Ruta del archivo .zip a generar")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, número de CPUs)")
+    parser.add_argument("--evento", type=int, default=None, help="Id del evento (por defecto, el activo)")
+    args = parser.parse_args()
+
+    evento_id = args.evento
+    if evento_id is None:
+        with engine.connect() as conn:
+            evento_id = evento_activo(conn)
+        if evento_id is None:
+            print("❌ No hay un evento activo: indique --evento")
+            sys.exit(1)
+
+    service = ReportService(evento_id, procesos=args.procesos)
+    print("📊 GENERANDO REPORTE POR SEDE")
+    print("=" * 50)
+    print(f"🎫 Evento: {evento_id}")
+    print(f"⚙️  Procesos: {service.procesos}")
+
+    inicio = time.perf_counter()
+    try:
+        sedes = service.generar_zip(args.salida)
+    except Exception as e:
+        print(f"❌ Error generando el reporte: {e}")
+        sys.exit(1)
+
+    print(f"✅ Reporte con {sedes} sedes guardado en {args.salida} ({time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -47,6 +47,12 @@ def init_railway_database():
         
         print("✅ Estructura de base de datos creada")
         
+        # Las rutas trabajan sobre el evento activo: crear uno si no hay
+        from app.services.eventos_service import crear_evento, evento_activo
+        with engine.begin() as conn:
+            evento_id = evento_activo(conn) or crear_evento(conn, "Evento inicial", activar=True)
+        print(f"🎫 Evento activo: {evento_id}")
+        
         # Verificar que las tablas se crearon
         from sqlalchemy import inspect
         inspector = inspect(engine)
@@ -55,7 +61,7 @@ def init_railway_database():
         print(f"📋 Tablas creadas: {tables}")
         
         # Verificar tablas específicas que esperamos
-        expected_tables = ["invitados", "acompanantes", "asistencias_log", "usuarios"]
+        expected_tables = ["eventos", "invitados", "acompanantes", "asistencias_log", "usuarios"]
         for table in expected_tables:
             if table in tables:
                 print(f"   ✅ {table}")
@@ -2,6 +2,7 @@
 """Script para insertar datos de ejemplo en la base de datos"""
 
 from app.database import engine
+from app.services.eventos_service import crear_evento, evento_activo
 from sqlalchemy import text
 import sys
 
@@ -9,29 +10,32 @@ def insert_sample_data():
     """Inserta datos de ejemplo en las tablas"""
     try:
         with engine.connect() as conn:
+            # Los ejemplos van al evento activo (o a uno nuevo si no hay)
+            evento_id = evento_activo(conn) or crear_evento(conn, "Evento de ejemplo", activar=True)
+            
             # Insertar invitados
             print("📝 Insertando invitados de ejemplo...")
             invitados_sql = """
-            INSERT INTO invitados (nombre, cedula) VALUES 
-                ('Juan Pérez', '12345678'),
-                ('María García', '87654321'),
-                ('Carlos López', '11223344'),
-                ('Ana Martínez', '55667788')
-            ON CONFLICT (cedula) DO NOTHING;
+            INSERT INTO invitados (evento_id, nombre, cedula) VALUES 
+                (:evento_id, 'Juan Pérez', '12345678'),
+                (:evento_id, 'María García', '87654321'),
+                (:evento_id, 'Carlos López', '11223344'),
+                (:evento_id, 'Ana Martínez', '55667788')
+            ON CONFLICT (evento_id, cedula) DO NOTHING;
             """
-            conn.execute(text(invitados_sql))
+            conn.execute(text(invitados_sql), {"evento_id": evento_id})
             
             # Insertar acompañantes
             print("● Insertando acompañantes de ejemplo...")
             acompanantes_sql = """
-            INSERT INTO acompanantes (invitado_id, nombre, cedula) VALUES 
-                (1, 'Carmen Pérez', '12345679'),
-                (1, 'Pedro Pérez', '12345680'),
-                (2, 'Luis García', '87654322'),
-                (3, 'Rosa López', '11223345')
-            ON CONFLICT (cedula) DO NOTHING;
+            INSERT INTO acompanantes (evento_id, invitado_id, nombre, cedula) VALUES 
+                (:evento_id, (SELECT id FROM invitados WHERE evento_id = :evento_id AND cedula = '12345678'), 'Carmen Pérez', '12345679'),
+                (:evento_id, (SELECT id FROM invitados WHERE evento_id = :evento_id AND cedula = '12345678'), 'Pedro Pérez', '12345680'),
+                (:evento_id, (SELECT id FROM invitados WHERE evento_id = :evento_id AND cedula = '87654321'), 'Luis García', '87654322'),
+                (:evento_id, (SELECT id FROM invitados WHERE evento_id = :evento_id AND cedula = '11223344'), 'Rosa López', '11223345')
+            ON CONFLICT (evento_id, cedula) DO NOTHING;
             """
-            conn.execute(text(acompanantes_sql))
+            conn.execute(text(acompanantes_sql), {"evento_id": evento_id})
             
             # Confirmar cambios
             conn.commit()
@@ -40,12 +44,12 @@ def insert_sample_data():
             print("\n✅ Verificando datos insertados:")
             
             # Contar invitados
-            result = conn.execute(text("SELECT COUNT(*) FROM invitados"))
+            result = conn.execute(text("SELECT COUNT(*) FROM invitados WHERE evento_id = :evento_id"), {"evento_id": evento_id})
             invitados_count = result.scalar()
             print(f"  📊 Invitados: {invitados_count}")
             
             # Contar acompañantes
-            result = conn.execute(text("SELECT COUNT(*) FROM acompanantes"))
+            result = conn.execute(text("SELECT COUNT(*) FROM acompanantes WHERE evento_id = :evento_id"), {"evento_id": evento_id})
             acompanantes_count = result.scalar()
             print(f"  📊 Acompañantes: {acompanantes_count}")
             
@@ -55,10 +59,11 @@ def insert_sample_data():
                 SELECT i.nombre, i.cedula, 
                        COALESCE(COUNT(a.id), 0) as acompanantes
                 FROM invitados i
-                LEFT JOIN acompanantes a ON i.id = a.invitado_id
-                GROUP BY i.id, i.nombre, i.cedula
+                LEFT JOIN acompanantes a ON i.id = a.invitado_id AND i.evento_id = a.evento_id
+                WHERE i.evento_id = :evento_id
+                GROUP BY i.id, i.evento_id, i.nombre, i.cedula
                 ORDER BY i.nombre
-            """))
+            """), {"evento_id": evento_id})
             
             for row in result:
                 print(f"  👤 {row[0]} (CI: {row[1]}) - {row[2]} acompañante(s)")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de búsqueda y confirmación de asistencia.
+
+Lanza N clientes concurrentes contra un backend en ejecución, cada uno
+alternando búsquedas por cédula y confirmaciones (como los kioscos en la
+entrada del evento), y reporta el throughput y la latencia por nivel de
+concurrencia. Con las rutas async el throughput debe crecer con la
+concurrencia hasta el tamaño del pool de conexiones en lugar de quedarse
+en el de un solo cliente.
+
+Las cédulas e ids se toman de la base de datos configurada (DATABASE_URL).
+Las confirmaciones marcan asistencia real: usar contra una base de pruebas.
+
+Uso:
+    python load_test.py [--url http://localhost:8000] [--concurrencia 1,4,8,16]
+                        [--duracion 10] [--proporcion-confirmar 0.2] [--muestra 2000]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models import Evento, Invitado
+from app.utils.metricas import percentiles
+
+
+def cargar_muestra(tamano: int) -> list:
+    """(id, cedula) de invitados al azar del evento activo, el que usan las rutas sin X-Evento-Id"""
+    with SessionLocal() as db:
+        filas = db.execute(
+            select(Invitado.id, Invitado.cedula)
+            .where(Invitado.evento_id == select(Evento.id).where(Evento.activo).scalar_subquery())
+            .limit(tamano * 5)
+        ).all()
+    return random.sample(filas, min(tamano, len(filas)))
+
+
+def _peticion(url: str, datos: dict = None) -> int:
+    cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else None
+    peticion = urllib.request.Request(url, data=cuerpo, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(peticion, timeout=30) as respuesta:
+            respuesta.read()
+            return respuesta.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def ejecutar_nivel(base: str, muestra: list, concurrencia: int, duracion: float, proporcion_confirmar: float) -> dict:
+    """Correr `concurrencia` clientes durante `duracion` segundos"""
+    fin = time.perf_counter() + duracion
+    lock = threading.Lock()
+    latencias = {"search": [], "confirmar": []}
+    errores = 0
+
+    def cliente():
+        nonlocal errores
+        aleatorio = random.Random()
+        while time.perf_counter() < fin:
+            invitado_id, cedula = aleatorio.choice(muestra)
+            inicio = time.perf_counter()
+            if aleatorio.random() < proporcion_confirmar:
+                tipo = "confirmar"
+                estado = _peticion(f"{base}/api/v1/confirmar_asistencia", {"invitado_id": invitado_id})
+            else:
+                tipo = "search"
+                estado = _peticion(f"{base}/api/v1/search?" + urllib.parse.urlencode({"query": cedula}))
+            ms = (time.perf_counter() - inicio) * 1000
+            with lock:
+                latencias[tipo].append(ms)
+                if estado >= 400:
+                    errores += 1
+
+    hilos = [threading.Thread(target=cliente) for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+
+    total = sum(len(v) for v in latencias.values())
+    return {
+        "concurrencia": concurrencia,
+        "peticiones": total,
+        "por_segundo": round(total / transcurrido, 1),
+        "errores": errores,
+        "search_ms": percentiles(latencias["search"]),
+        "confirmar_ms": percentiles(latencias["confirmar"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de búsqueda y confirmación")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base del backend")
+    parser.add_argument("--concurrencia", default="1,4,8,16", help="Niveles de clientes concurrentes")
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos por nivel")
+    parser.add_argument("--proporcion-confirmar", type=float, default=0.2, help="Fracción de peticiones que confirman")
+    parser.add_argument("--muestra", type=int, default=2000, help="Invitados distintos a consultar")
+    args = parser.parse_args()
+
+    muestra = cargar_muestra(args.muestra)
+    if not muestra:
+        print("❌ No hay invitados en la base de datos; importa datos de prueba primero")
+        return
+
+    print("🚦 PRUEBA DE CARGA: búsqueda y confirmación")
+    print("=" * 78)
+    print(f"{'clientes':>8} {'req/s':>8} {'errores':>8}   {'search p50/p95 (ms)':>20}   {'confirmar p50/p95 (ms)':>22}")
+    base = None
+    for nivel in (int(n) for n in args.concurrencia.split(",")):
+        r = ejecutar_nivel(args.url.rstrip("/"), muestra, nivel, args.duracion, args.proporcion_confirmar)
+        base = base or r["por_segundo"]
+        print(
+            f"{r['concurrencia']:>8} {r['por_segundo']:>8} {r['errores']:>8}   "
+            f"{r['search_ms']['p50']:>9}/{r['search_ms']['p95']:<10}   "
+            f"{r['confirmar_ms']['p50']:>10}/{r['confirmar_ms']['p95']:<11}"
+            f"  x{r['por_segundo'] / base:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -150,16 +150,19 @@ def main():
     
     # Definir tablas y sus columnas para migrar
     tables_to_migrate = [
+        ("eventos", [
+            "id", "nombre", "fecha", "activo", "archivado", "created_at"
+        ]),
         ("invitados", [
-            "id", "nombre", "cedula", "campana_area", "eps", "sede", 
+            "id", "evento_id", "nombre", "cedula", "campana_area", "eps", "sede", 
             "estado_asistencia", "created_at", "updated_at"
         ]),
         ("acompanantes", [
-            "id", "nombre", "cedula", "edad", "parentesco", "eps", 
+            "id", "evento_id", "nombre", "cedula", "edad", "parentesco", "eps", 
             "invitado_id", "estado_asistencia", "created_at", "updated_at"
         ]),
         ("asistencias_log", [
-            "id", "persona_id", "tipo", "timestamp"
+            "id", "evento_id", "persona_id", "tipo", "timestamp"
         ]),
         ("usuarios", [
             "id", "username", "hashed_password", "nombre_completo", 
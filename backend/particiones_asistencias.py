@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Mantenimiento de las particiones mensuales de asistencias_log (PostgreSQL).
+
+Crea las particiones de los próximos meses y aplica la retención borrando
+particiones completas de meses anteriores, en lugar de DELETE fila por
+fila. Pensado para correr desde cron, p. ej. el primer día de cada mes.
+
+Uso:
+    python particiones_asistencias.py [--meses-adelante 2] [--retencion-meses 12] [--simular]
+"""
+import argparse
+import sys
+from app.config import settings
+from app.database import engine
+from app.services.particiones_service import (
+    asegurar_particiones, eliminar_particiones_anteriores, esta_particionada, listar_particiones
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantener las particiones de asistencias_log")
+    parser.add_argument("--meses-adelante", type=int, default=settings.asistencias_log_meses_adelante,
+                        help="Meses futuros que deben tener partición")
+    parser.add_argument("--retencion-meses", type=int, default=settings.asistencias_log_retencion_meses,
+                        help="Meses a conservar, contando el actual (0 = no borrar)")
+    parser.add_argument("--simular", action="store_true", help="Mostrar qué se borraría sin borrar")
+    args = parser.parse_args()
+
+    print("🗂️  PARTICIONES DE asistencias_log")
+    print("=" * 50)
+    try:
+        with engine.begin() as conn:
+            if not esta_particionada(conn):
+                print("ℹ️  La tabla no está particionada (SQLite o migración pendiente)")
+            for nombre in asegurar_particiones(conn, args.meses_adelante):
+                print(f"➕ Creada {nombre}")
+            if args.retencion_meses > 0:
+                for nombre in eliminar_particiones_anteriores(conn, args.retencion_meses, simular=args.simular):
+                    print(f"{'🔎 Se borraría' if args.simular else '🗑️  Borrada'} {nombre}")
+            if esta_particionada(conn):
+                for particion in listar_particiones(conn):
+                    print(f"   {particion['nombre']:<28} {particion['filas_estimadas']:>10} filas  {particion['limites']}")
+    except Exception as e:
+        print(f"❌ Error manteniendo las particiones: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
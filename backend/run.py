@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import uvicorn
+from app.config import settings
 from app.main import app
 
 if __name__ == "__main__":
@@ -8,5 +9,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        # IP real del cliente en logs y request.client detrás del proxy
+        proxy_headers=True,
+        forwarded_allow_ips=settings.proxies_confiables,
         log_level="info"
     )
@@ -0,0 +1,49 @@
+"""
+Rutas de eventos con un token recién emitido: el usuario se resuelve con una
+consulta (no está en la caché de tokens) y la ruta escribe después. En SQLite
+la consulta del usuario no debe tomar el bloqueo de escritura que la ruta
+necesita para el DDL de las particiones.
+"""
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Usuario
+from app.utils.auth import get_password_hash
+
+
+@pytest.fixture
+def cliente():
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def _token_nuevo(cliente) -> dict:
+    """Header de autorización de un usuario nuevo, cuyo token aún no está en caché"""
+    username = f"eventos_{uuid.uuid4().hex[:8]}"
+    with SessionLocal() as db:
+        db.add(Usuario(username=username, hashed_password=get_password_hash("clave"), nombre_completo="Pruebas"))
+        db.commit()
+    respuesta = cliente.post("/api/v1/auth/login", json={"username": username, "password": "clave"})
+    assert respuesta.status_code == 200, respuesta.text
+    return {"Authorization": f"Bearer {respuesta.json()['access_token']}"}
+
+
+def test_crear_activar_y_eliminar_evento_con_token_nuevo(cliente):
+    activo = next(e for e in cliente.get("/api/v1/eventos/", headers=_token_nuevo(cliente)).json() if e["activo"])
+
+    respuesta = cliente.post("/api/v1/eventos/", json={"nombre": "Evento de prueba"}, headers=_token_nuevo(cliente))
+    assert respuesta.status_code == 201, respuesta.text
+    evento_id = respuesta.json()["id"]
+
+    respuesta = cliente.post(f"/api/v1/eventos/{evento_id}/activar", headers=_token_nuevo(cliente))
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["activo"]
+
+    respuesta = cliente.post(f"/api/v1/eventos/{activo['id']}/activar", headers=_token_nuevo(cliente))
+    assert respuesta.status_code == 200, respuesta.text
+
+    respuesta = cliente.delete(f"/api/v1/eventos/{evento_id}", headers=_token_nuevo(cliente))
+    assert respuesta.status_code == 200, respuesta.text
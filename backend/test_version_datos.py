@@ -0,0 +1,59 @@
+"""
+Verifica que la versión de los datos (ETag) y el cursor de /changes avanzan en
+orden de confirmación: dos escrituras que confirman en orden distinto al de
+su flush no deben dejar cambios detrás del cursor de un cliente.
+Requiere PostgreSQL (TEST_DATABASE_URL, ver conftest.py); en SQLite las
+escrituras ya son seriales.
+"""
+import pytest
+from sqlalchemy import select
+
+from app.database import SessionLocal, engine
+from app.models import Evento, Invitado
+from app.services.sync_service import SyncService
+from app.utils.etag import get_data_version
+
+
+@pytest.fixture
+def dos_invitados():
+    """Evento activo con dos invitados nuevos; retorna (evento_id, id_a, id_b)"""
+    with SessionLocal() as db:
+        evento_id = db.execute(select(Evento.id).where(Evento.activo.is_(True))).scalar_one()
+        invitados = [
+            Invitado(evento_id=evento_id, nombre=f"Escritor {letra}", cedula=f"orden-{letra}", estado_asistencia=False)
+            for letra in ("a", "b")
+        ]
+        db.add_all(invitados)
+        db.commit()
+        return evento_id, invitados[0].id, invitados[1].id
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="Requiere PostgreSQL (TEST_DATABASE_URL)")
+def test_escrituras_confirmadas_fuera_de_orden(dos_invitados):
+    """El writer A hace flush antes que B pero confirma después"""
+    evento_id, id_a, id_b = dos_invitados
+    with SessionLocal() as lector, SessionLocal() as escritor_a, SessionLocal() as escritor_b:
+        version_inicial = get_data_version(lector)
+        lector.commit()
+
+        # A escribe primero (flush) pero no confirma todavía
+        escritor_a.get(Invitado, (id_a, evento_id)).nombre = "Escritor a *"
+        escritor_a.flush()
+
+        # B escribe y confirma antes que A
+        escritor_b.get(Invitado, (id_b, evento_id)).nombre = "Escritor b *"
+        escritor_b.commit()
+
+        cambios_b = SyncService(lector, evento_id).obtener_cambios(version_inicial, 1000)
+        version_b = get_data_version(lector)
+        lector.commit()
+        assert id_b in {i.id for i in cambios_b.invitados}
+        assert version_b > version_inicial
+
+        # Al confirmar A, su cambio debe aparecer después del cursor que el cliente ya tiene
+        escritor_a.commit()
+        cambios_a = SyncService(lector, evento_id).obtener_cambios(cambios_b.cursor, 1000)
+        version_a = get_data_version(lector)
+        lector.commit()
+        assert id_a in {i.id for i in cambios_a.invitados}, "El cambio de A quedó detrás del cursor"
+        assert version_a > version_b, "La versión no avanzó con la confirmación de A"
@@ -6,42 +6,79 @@
 
 -- Conectarse a la base de datos y ejecutar los siguientes comandos:
 
--- Tabla de invitados principales
-CREATE TABLE IF NOT EXISTS invitados (
+-- Eventos: cada uno tiene su lista de invitados; las rutas usan el activo
+CREATE TABLE IF NOT EXISTS eventos (
     id SERIAL PRIMARY KEY,
     nombre VARCHAR(255) NOT NULL,
-    cedula VARCHAR(20) UNIQUE NOT NULL,
+    fecha DATE,
+    activo BOOLEAN NOT NULL DEFAULT FALSE,
+    archivado BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+-- A lo sumo un evento activo
+CREATE UNIQUE INDEX IF NOT EXISTS ix_eventos_activo ON eventos(activo) WHERE activo;
+
+-- Tabla de invitados principales, particionada por evento (una partición
+-- por evento: POST /api/v1/eventos crea las siguientes)
+CREATE TABLE IF NOT EXISTS invitados (
+    id SERIAL,
+    evento_id INTEGER NOT NULL REFERENCES eventos(id),
+    nombre VARCHAR(255) NOT NULL,
+    cedula VARCHAR(20) NOT NULL,
     campana_area VARCHAR(255),
     eps VARCHAR(255),
     sede VARCHAR(255),
     estado_asistencia BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, evento_id),
+    UNIQUE (evento_id, cedula)
+) PARTITION BY LIST (evento_id);
 
--- Tabla de acompañantes
+-- Tabla de acompañantes, particionada como invitados
 CREATE TABLE IF NOT EXISTS acompanantes (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
+    evento_id INTEGER NOT NULL REFERENCES eventos(id),
     invitado_id INTEGER NOT NULL,
     nombre VARCHAR(255) NOT NULL,
-    cedula VARCHAR(20) UNIQUE NOT NULL,
+    cedula VARCHAR(20) NOT NULL,
     edad INTEGER,
     parentesco VARCHAR(100),
     eps VARCHAR(255),
     estado_asistencia BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (invitado_id) REFERENCES invitados(id) ON DELETE CASCADE
-);
+    PRIMARY KEY (id, evento_id),
+    UNIQUE (evento_id, cedula),
+    FOREIGN KEY (invitado_id, evento_id) REFERENCES invitados(id, evento_id) ON DELETE CASCADE
+) PARTITION BY LIST (evento_id);
+
+-- Evento inicial y sus particiones
+INSERT INTO eventos (id, nombre, activo) VALUES (1, 'Evento inicial', TRUE) ON CONFLICT (id) DO NOTHING;
+SELECT setval('eventos_id_seq', (SELECT max(id) FROM eventos));
+CREATE TABLE IF NOT EXISTS invitados_evento_1 PARTITION OF invitados FOR VALUES IN (1);
+CREATE TABLE IF NOT EXISTS acompanantes_evento_1 PARTITION OF acompanantes FOR VALUES IN (1);
 
 -- Tabla de log de asistencias
 CREATE TABLE IF NOT EXISTS asistencias_log (
     id SERIAL PRIMARY KEY,
+    evento_id INTEGER NOT NULL,
     persona_id INTEGER NOT NULL,
     tipo VARCHAR(20) NOT NULL CHECK (tipo IN ('principal', 'acompanante')),
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Feed de cambios para sincronización incremental (GET /api/v1/changes)
+-- El id es el cursor monotónico; las eliminaciones quedan como tombstones
+CREATE TABLE IF NOT EXISTS cambios_sync (
+    id SERIAL PRIMARY KEY,
+    evento_id INTEGER NOT NULL,
+    entidad VARCHAR(20) NOT NULL CHECK (entidad IN ('invitado', 'acompanante')),
+    entidad_id INTEGER NOT NULL,
+    operacion VARCHAR(10) NOT NULL CHECK (operacion IN ('upsert', 'delete')),
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Tabla de usuarios para autenticación (sin roles)
 CREATE TABLE IF NOT EXISTS usuarios (
     id SERIAL PRIMARY KEY,
@@ -52,21 +89,20 @@ CREATE TABLE IF NOT EXISTS usuarios (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Índices para mejorar rendimiento de búsquedas
-CREATE INDEX IF NOT EXISTS idx_invitados_cedula ON invitados(cedula);
-CREATE INDEX IF NOT EXISTS idx_invitados_nombre ON invitados(nombre);
-CREATE INDEX IF NOT EXISTS idx_invitados_campana_area ON invitados(campana_area);
-CREATE INDEX IF NOT EXISTS idx_invitados_eps ON invitados(eps);
+-- Índices de las rutas frecuentes ((evento_id, cédula) y username ya tienen el índice de UNIQUE)
 CREATE INDEX IF NOT EXISTS idx_invitados_sede ON invitados(sede);
-CREATE INDEX IF NOT EXISTS idx_acompanantes_cedula ON acompanantes(cedula);
-CREATE INDEX IF NOT EXISTS idx_acompanantes_nombre ON acompanantes(nombre);
+CREATE INDEX IF NOT EXISTS idx_cambios_sync_evento_id_id ON cambios_sync(evento_id, id);
 CREATE INDEX IF NOT EXISTS idx_acompanantes_invitado_id ON acompanantes(invitado_id);
-CREATE INDEX IF NOT EXISTS idx_acompanantes_parentesco ON acompanantes(parentesco);
-CREATE INDEX IF NOT EXISTS idx_acompanantes_eps ON acompanantes(eps);
-CREATE INDEX IF NOT EXISTS idx_asistencias_log_persona_id ON asistencias_log(persona_id);
-CREATE INDEX IF NOT EXISTS idx_asistencias_log_tipo ON asistencias_log(tipo);
-CREATE INDEX IF NOT EXISTS idx_asistencias_log_timestamp ON asistencias_log(timestamp);
-CREATE INDEX IF NOT EXISTS idx_usuarios_username ON usuarios(username);
+CREATE INDEX IF NOT EXISTS idx_asistencias_log_tipo_persona_id ON asistencias_log(tipo, persona_id);
+CREATE INDEX IF NOT EXISTS idx_asistencias_log_timestamp ON asistencias_log USING brin (timestamp);
+
+-- Parcial: solo los invitados que no han llegado (lista de pendientes)
+CREATE INDEX IF NOT EXISTS idx_invitados_pendientes ON invitados(id) WHERE NOT estado_asistencia;
+
+-- Búsqueda por nombre con ILIKE '%texto%' (requiere la extensión pg_trgm)
+-- CREATE EXTENSION IF NOT EXISTS pg_trgm;
+-- CREATE INDEX IF NOT EXISTS idx_invitados_nombre_trgm ON invitados USING gin (nombre gin_trgm_ops);
+-- CREATE INDEX IF NOT EXISTS idx_acompanantes_nombre_trgm ON acompanantes USING gin (nombre gin_trgm_ops);
 
 -- Función para actualizar updated_at automáticamente
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -91,19 +127,19 @@ CREATE TRIGGER update_usuarios_updated_at
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 -- Datos de ejemplo (opcional - remover en producción)
-INSERT INTO invitados (nombre, cedula, campana_area, eps, sede) VALUES 
-    ('Juan Pérez', '12345678', 'Marketing Digital', 'Sanitas', 'Sede Principal'),
-    ('María García', '87654321', 'Recursos Humanos', 'Nueva EPS', 'Sede Norte'),
-    ('Carlos López', '11223344', 'Ventas', 'Compensar', 'Sede Sur'),
-    ('Ana Martínez', '55667788', 'Administración', 'Sura', 'Sede Principal')
-ON CONFLICT (cedula) DO NOTHING;
-
-INSERT INTO acompanantes (invitado_id, nombre, cedula, edad, parentesco, eps) VALUES 
-    (1, 'Carmen Pérez', '12345679', 35, 'Esposa', 'Sanitas'),
-    (1, 'Pedro Pérez', '12345680', 8, 'Hijo', 'Sanitas'),
-    (2, 'Luis García', '87654322', 42, 'Esposo', 'Nueva EPS'),
-    (3, 'Rosa López', '11223345', 28, 'Hermana', 'Compensar')
-ON CONFLICT (cedula) DO NOTHING;
+INSERT INTO invitados (evento_id, nombre, cedula, campana_area, eps, sede) VALUES 
+    (1, 'Juan Pérez', '12345678', 'Marketing Digital', 'Sanitas', 'Sede Principal'),
+    (1, 'María García', '87654321', 'Recursos Humanos', 'Nueva EPS', 'Sede Norte'),
+    (1, 'Carlos López', '11223344', 'Ventas', 'Compensar', 'Sede Sur'),
+    (1, 'Ana Martínez', '55667788', 'Administración', 'Sura', 'Sede Principal')
+ON CONFLICT (evento_id, cedula) DO NOTHING;
+
+INSERT INTO acompanantes (evento_id, invitado_id, nombre, cedula, edad, parentesco, eps) VALUES 
+    (1, 1, 'Carmen Pérez', '12345679', 35, 'Esposa', 'Sanitas'),
+    (1, 1, 'Pedro Pérez', '12345680', 8, 'Hijo', 'Sanitas'),
+    (1, 2, 'Luis García', '87654322', 42, 'Esposo', 'Nueva EPS'),
+    (1, 3, 'Rosa López', '11223345', 28, 'Hermana', 'Compensar')
+ON CONFLICT (evento_id, cedula) DO NOTHING;
 
 -- Usuario administrador por defecto (password: admin123)
 INSERT INTO usuarios (username, hashed_password, nombre_completo) VALUES 
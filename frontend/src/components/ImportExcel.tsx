@@ -1,6 +1,7 @@
 import React, { useState, useRef } from 'react';
 import { AsistenciaService } from '../services/api';
-import { showSuccessAlert, showErrorAlert, showLoadingAlert, closeLoadingAlert } from '../utils/sweetAlert';
+import { showSuccessAlert, showErrorAlert, showLoadingAlert, closeLoadingAlert, updateLoadingAlert } from '../utils/sweetAlert';
+import type { TrabajoImportacion } from '../types';
 import './ImportExcel.css';
 
 interface ImportExcelProps {
@@ -9,10 +10,23 @@ interface ImportExcelProps {
 
 interface ImportResult {
   message: string;
+  job_id: string;
   invitados_creados: number;
   acompanantes_creados: number;
+  total_rechazos: number;
 }
 
+// Intervalo de consulta del progreso de la importación
+const POLL_INTERVAL_MS = 1000;
+
+const esperar = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const describirProgreso = (trabajo: TrabajoImportacion): string => {
+  if (trabajo.estado === 'pendiente') return 'En cola...';
+  const total = trabajo.total_filas ? ` de ${trabajo.total_filas}` : '';
+  return `Procesadas ${trabajo.filas_procesadas}${total} filas (${trabajo.filas_saltadas} saltadas, ${trabajo.filas_fallidas} con error).`;
+};
+
 export const ImportExcel: React.FC<ImportExcelProps> = ({ onImportComplete }) => {
   const [isImporting, setIsImporting] = useState(false);
   const [isDownloading, setIsDownloading] = useState(false);
@@ -39,7 +53,27 @@ export const ImportExcel: React.FC<ImportExcelProps> = ({ onImportComplete }) =>
     showLoadingAlert('Importando archivo...', 'Por favor espera mientras procesamos el archivo Excel.');
 
     try {
-      const result = await AsistenciaService.importExcel(file);
+      // La importación corre en segundo plano; se consulta su progreso hasta que termine
+      let trabajo = await AsistenciaService.crearTrabajoImportacion(file);
+      while (trabajo.estado === 'pendiente' || trabajo.estado === 'procesando') {
+        updateLoadingAlert(describirProgreso(trabajo));
+        await esperar(POLL_INTERVAL_MS);
+        trabajo = await AsistenciaService.getTrabajoImportacion(trabajo.job_id);
+      }
+
+      if (trabajo.estado === 'error') {
+        throw new Error(trabajo.error || 'Error al importar el archivo');
+      }
+
+      const result: ImportResult = {
+        message: trabajo.filas_fallidas > 0
+          ? `Importación completada con ${trabajo.filas_fallidas} filas con error`
+          : 'Importación completada exitosamente',
+        job_id: trabajo.job_id,
+        invitados_creados: trabajo.invitados_creados,
+        acompanantes_creados: trabajo.acompanantes_creados,
+        total_rechazos: trabajo.total_rechazos,
+      };
       setImportResult(result);
       closeLoadingAlert();
       
@@ -86,6 +120,23 @@ export const ImportExcel: React.FC<ImportExcelProps> = ({ onImportComplete }) =>
     }
   };
 
+  const handleDownloadRechazos = async (jobId: string) => {
+    try {
+      const blob = await AsistenciaService.downloadRechazosImportacion(jobId);
+
+      const url = window.URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `rechazos_${jobId}.csv`;
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      window.URL.revokeObjectURL(url);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Error al descargar el reporte de filas rechazadas');
+    }
+  };
+
   const triggerFileSelect = () => {
     fileInputRef.current?.click();
   };
@@ -135,6 +186,18 @@ export const ImportExcel: React.FC<ImportExcelProps> = ({ onImportComplete }) =>
               <span className="stat-item">
                 <strong>{importResult.acompanantes_creados}</strong> acompañantes creados
               </span>
+              {importResult.total_rechazos > 0 && (
+                <span className="stat-item">
+                  <strong>{importResult.total_rechazos}</strong> filas rechazadas{' '}
+                  <button
+                    type="button"
+                    className="download-template-btn"
+                    onClick={() => handleDownloadRechazos(importResult.job_id)}
+                  >
+                    Descargar reporte
+                  </button>
+                </span>
+              )}
             </div>
           </div>
         </div>
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { SearchResponse, ConfirmarAsistenciaRequest, ConfirmarAsistenciaResponse, AsistenciaStats, Invitado, Usuario } from '../types';
+import type { SearchResponse, ConfirmarAsistenciaRequest, ConfirmarAsistenciaResponse, AsistenciaStats, Invitado, Usuario, TrabajoImportacion } from '../types';
 
 // Configuración base de axios
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
@@ -12,9 +12,37 @@ const apiClient = axios.create({
   },
 });
 
+// Posición del WAL (LSN, p. ej. "0/16B3748") de la última escritura de este
+// cliente. Se reenvía en cada petición para que, con réplica de lectura, el
+// backend no responda con datos anteriores a esa escritura (p. ej. buscar
+// justo después de confirmar).
+const HEADER_ULTIMA_ESCRITURA = 'X-Ultima-Escritura';
+let ultimaEscritura = '';
+
+// Un LSN son dos números hexadecimales de 32 bits: "alto/bajo"
+const lsnANumero = (lsn: string): bigint | null => {
+  const partes = /^([0-9A-Fa-f]{1,8})\/([0-9A-Fa-f]{1,8})$/.exec(lsn);
+  return partes ? (BigInt(`0x${partes[1]}`) << 32n) + BigInt(`0x${partes[2]}`) : null;
+};
+
+apiClient.interceptors.request.use((config) => {
+  if (ultimaEscritura) {
+    config.headers.set(HEADER_ULTIMA_ESCRITURA, ultimaEscritura);
+  }
+  return config;
+});
+
 // Interceptor para manejo de errores
 apiClient.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const lsn = String(response.headers[HEADER_ULTIMA_ESCRITURA.toLowerCase()] ?? '');
+    const posicion = lsnANumero(lsn);
+    const anterior = lsnANumero(ultimaEscritura);
+    if (posicion !== null && (anterior === null || posicion > anterior)) {
+      ultimaEscritura = lsn;
+    }
+    return response;
+  },
   (error) => {
     console.error('API Error:', error);
     return Promise.reject(error);
@@ -101,6 +129,57 @@ export class AsistenciaService {
     }
   }
 
+  /**
+   * Encola la importación de un archivo Excel en segundo plano
+   */
+  static async crearTrabajoImportacion(file: File): Promise<TrabajoImportacion> {
+    try {
+      const formData = new FormData();
+      formData.append('file', file);
+      
+      const response = await apiClient.post<TrabajoImportacion>('/import/jobs', formData, {
+        headers: {
+          'Content-Type': 'multipart/form-data',
+        },
+      });
+      return response.data;
+    } catch (error) {
+      if (axios.isAxiosError(error) && error.response?.data?.detail) {
+        throw new Error(error.response.data.detail);
+      }
+      throw new Error('Error al importar el archivo Excel.');
+    }
+  }
+
+  /**
+   * Consulta el progreso de un trabajo de importación
+   */
+  static async getTrabajoImportacion(jobId: string): Promise<TrabajoImportacion> {
+    try {
+      const response = await apiClient.get<TrabajoImportacion>(`/import/jobs/${jobId}`);
+      return response.data;
+    } catch (error) {
+      if (axios.isAxiosError(error) && error.response?.data?.detail) {
+        throw new Error(error.response.data.detail);
+      }
+      throw new Error('Error al consultar el progreso de la importación.');
+    }
+  }
+
+  /**
+   * Descarga en CSV las filas rechazadas de un trabajo de importación
+   */
+  static async downloadRechazosImportacion(jobId: string): Promise<Blob> {
+    try {
+      const response = await apiClient.get(`/import/jobs/${jobId}/rechazos`, {
+        responseType: 'blob',
+      });
+      return response.data;
+    } catch (error) {
+      throw new Error('Error al descargar el reporte de filas rechazadas.');
+    }
+  }
+
   /**
    * Descarga la plantilla Excel para importación
    */
@@ -57,3 +57,22 @@ export interface Usuario {
   created_at: string;
   updated_at: string;
 }
+
+export interface TrabajoImportacion {
+  job_id: string;
+  archivo: string;
+  estado: 'pendiente' | 'procesando' | 'completado' | 'error';
+  total_filas: number | null;
+  filas_procesadas: number;
+  filas_saltadas: number;
+  filas_fallidas: number;
+  total_rechazos: number;
+  partes_confirmadas: number;
+  invitados_creados: number;
+  acompanantes_creados: number;
+  errores: string[];
+  error: string | null;
+  tiempos_ms: Record<string, number>;
+  creado: string;
+  actualizado: string;
+}
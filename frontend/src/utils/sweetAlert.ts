@@ -82,3 +82,8 @@ export const showLoadingAlert = (title = 'Cargando...', text?: string) => {
 export const closeLoadingAlert = () => {
   if (MySwal) MySwal.close();
 };
+
+export const updateLoadingAlert = (text: string) => {
+  const container = Swal.getHtmlContainer();
+  if (container) container.textContent = text;
+};